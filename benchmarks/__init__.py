@@ -0,0 +1,12 @@
+
+
+"""
+The benchmarks of the storages and the Weller dispatcher
+
+    python -m benchmarks
+    python -m benchmarks --sizes 100 100000 --json results.json
+    python -m benchmarks --compare old.json new.json
+
+Every scenario runs for each storage class and for Weller.get, across the key space sizes.
+The reports contain ops/s, p50/p99 latency and the allocations per operation
+"""
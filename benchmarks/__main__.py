@@ -0,0 +1,78 @@
+
+
+import asyncio
+import argparse
+
+import benchmarks
+from benchmarks.targets import get_targets
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.runner import measure
+from benchmarks.report import print_header, print_row, dump, compare
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=benchmarks.__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=20_000)
+    parser.add_argument("--allocation-operations", type=int, default=2_000)
+    parser.add_argument("--budget", type=float, default=5, help="The seconds limit of one measurement")
+    parser.add_argument("--concurrency", type=int, default=32, help="The callers of the fan_in scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--targets", nargs="+")
+    parser.add_argument("--redis", metavar="URL", help="Benchmark the redis storages too")
+    parser.add_argument("--json", metavar="PATH", help="Write the results to the file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON results")
+
+    return parser.parse_args()
+
+
+async def main(arguments: argparse.Namespace):
+    targets = get_targets(arguments.redis)
+    results = []
+
+    print_header()
+
+    for scenario_name in arguments.scenarios or SCENARIOS:
+        scenario = SCENARIOS[scenario_name]()
+
+        for target_name in arguments.targets or targets:
+            factory = targets[target_name]
+            target = factory()
+            applies = scenario.applies(target)
+
+            await target.close()
+
+            if not applies:
+                continue
+
+            for size in arguments.sizes:
+                result = await measure(
+                    scenario=scenario,
+                    factory=factory,
+                    size=size,
+                    operations=arguments.operations,
+                    allocation_operations=arguments.allocation_operations,
+                    concurrency=arguments.concurrency,
+                    budget=arguments.budget
+                )
+
+                print_row(result)
+                results.append(result)
+
+    if arguments.json:
+        dump(results, arguments.json)
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+
+    if arguments.compare:
+        compare(*arguments.compare)
+
+    else:
+        asyncio.run(main(arguments))
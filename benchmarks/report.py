@@ -0,0 +1,87 @@
+
+
+"""
+The text and JSON reports and the comparison of two JSON reports
+"""
+
+import sys
+import json
+import platform
+from dataclasses import asdict
+from typing import Iterable, TextIO
+
+from benchmarks.runner import Result
+
+
+COLUMNS = (
+    ("scenario", 16, "{}"),
+    ("target", 30, "{}"),
+    ("keys", 8, "{}"),
+    ("ops_per_second", 12, "{:.0f}"),
+    ("p50_ns", 10, "{:.0f}"),
+    ("p99_ns", 10, "{:.0f}"),
+    ("allocated_blocks", 17, "{:.2f}"),
+    ("allocated_bytes", 16, "{:.1f}"),
+)
+
+
+def print_row(result: Result, file: TextIO = sys.stdout):
+    data = asdict(result)
+
+    print(" ".join(pattern.format(data[name]).rjust(width) for name, width, pattern in COLUMNS), file=file)
+
+
+def print_header(file: TextIO = sys.stdout):
+    print(" ".join(name.rjust(width) for name, width, _ in COLUMNS), file=file)
+
+
+def dump(results: Iterable[Result], path: str):
+    from importlib import metadata
+
+    try:
+        version = metadata.version("weller")
+
+    except metadata.PackageNotFoundError:
+        version = None
+
+    report = {
+        "weller": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": [asdict(result) for result in results],
+    }
+
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def compare(old_path: str, new_path: str, file: TextIO = sys.stdout):
+    """
+    Print the changes of ops/s and p99 between two JSON reports, by scenario, target and keys
+    """
+
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old, new = json.load(old_file), json.load(new_file)
+
+    old_results = {
+        (result["scenario"], result["target"], result["keys"]): result
+        for result in old["results"]
+    }
+
+    print(f"{'scenario':>16} {'target':>30} {'keys':>8} {'ops/s':>9} {'p99':>9}", file=file)
+
+    for result in new["results"]:
+        previous = old_results.get((result["scenario"], result["target"], result["keys"]))
+
+        if previous is None:
+            continue
+
+        throughput = result["ops_per_second"] / previous["ops_per_second"] - 1
+        latency = result["p99_ns"] / previous["p99_ns"] - 1
+
+        print(
+            f"{result['scenario']:>16} {result['target']:>30} {result['keys']:>8} "
+            f"{throughput:>+9.1%} {latency:>+9.1%}",
+            file=file
+        )
@@ -0,0 +1,167 @@
+
+
+"""
+The measurement of one scenario against one target
+"""
+
+import gc
+import time
+import asyncio
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from benchmarks.targets import Target
+from benchmarks.scenarios import Scenario
+
+
+# The background tasks (refreshes, the scheduler) get the loop between the batches
+BATCH = 100
+
+
+@dataclass
+class Result:
+    scenario: str
+    target: str
+    keys: int
+    operations: int
+    concurrency: int
+    ops_per_second: float
+    p50_ns: float
+    p99_ns: float
+    allocated_blocks: float
+    allocated_bytes: float
+    peak_bytes: int
+
+
+def percentile(values: list[int], fraction: float) -> float:
+    """
+    :param values: The sorted values
+    :param fraction: 0.5 for the median, 0.99 for p99
+    :return: The nearest rank percentile
+    """
+
+    return float(values[min(len(values) - 1, int(len(values) * fraction))])
+
+
+async def _timed(scenario: Scenario, target: Target, context, index: int, latencies: list[int]):
+    start = time.perf_counter_ns()
+
+    await scenario.operation(target, context, index)
+
+    latencies.append(time.perf_counter_ns() - start)
+
+
+async def _run(
+        scenario: Scenario,
+        target: Target,
+        context,
+        first: int,
+        rounds: int,
+        concurrency: int,
+        latencies: list[int],
+        budget: float
+) -> tuple[int, int]:
+    """
+    :param budget: The seconds after which the rest rounds are skipped,
+    so a slow target at a big key space doesn't stall the whole run
+    :return: The rounds done and their wall time in nanoseconds
+    """
+
+    elapsed = 0
+    limit = budget * 1e9
+
+    for index in range(first, first + rounds):
+        if elapsed > limit:
+            return index - first, elapsed
+
+        await scenario.before(target, context, index)
+
+        start = time.perf_counter_ns()
+
+        if concurrency == 1:
+            await _timed(scenario, target, context, index, latencies)
+
+        else:
+            await asyncio.gather(*(
+                _timed(scenario, target, context, index, latencies)
+                for _ in range(concurrency)
+            ))
+
+        elapsed += time.perf_counter_ns() - start
+
+        if index % BATCH == 0:
+            await asyncio.sleep(0)
+
+    return rounds, elapsed
+
+
+async def measure(
+        scenario: Scenario,
+        factory: Callable[[], Target],
+        size: int,
+        operations: int,
+        allocation_operations: int,
+        concurrency: int,
+        budget: float
+) -> Result:
+    """
+    Measure the latencies first and the allocations after them on the same target.
+    The allocations are the net ones: what the operations left in memory, per operation
+    :param size: The key space size
+    :param operations: The timed operations count
+    :param allocation_operations: The operations count under tracemalloc
+    :param concurrency: The callers of one operation, only for the concurrent scenarios
+    :param budget: The seconds limit of each pass
+    """
+
+    concurrency = concurrency if scenario.concurrent else 1
+    rounds = max(1, operations // concurrency)
+    allocation_rounds = max(1, allocation_operations // concurrency)
+
+    target = factory()
+
+    try:
+        context = await scenario.prepare(target, size)
+
+        latencies = []
+
+        gc.collect()
+        rounds, elapsed = await _run(scenario, target, context, 0, rounds, concurrency, latencies, budget)
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_memory, _ = tracemalloc.get_traced_memory()
+
+        allocation_rounds, _ = await _run(
+            scenario, target, context, rounds, allocation_rounds, concurrency, [], budget
+        )
+
+        _, peak_memory = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    finally:
+        await target.close()
+
+    ignored = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    statistics = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "filename")
+    allocation_count = allocation_rounds * concurrency
+
+    latencies.sort()
+
+    return Result(
+        scenario=scenario.name,
+        target=target.name,
+        keys=size,
+        operations=len(latencies),
+        concurrency=concurrency,
+        ops_per_second=len(latencies) / (elapsed / 1e9),
+        p50_ns=percentile(latencies, 0.5),
+        p99_ns=percentile(latencies, 0.99),
+        allocated_blocks=sum(stat.count_diff for stat in statistics) / allocation_count,
+        allocated_bytes=sum(stat.size_diff for stat in statistics) / allocation_count,
+        peak_bytes=peak_memory - start_memory
+    )
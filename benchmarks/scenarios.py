@@ -0,0 +1,123 @@
+
+
+"""
+The benchmarked workloads
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Awaitable
+
+from benchmarks.targets import Target
+
+
+# A prime stride spreads the consecutive operations over the key space
+STRIDE = 7919
+HOT_KEYS = 100
+
+
+class Scenario(ABC):
+    name: str
+    concurrent: bool = False
+
+    def applies(self, target: Target) -> bool:
+        return True
+
+    async def prepare(self, target: Target, size: int) -> Any:
+        """
+        Fill the target before the measurement
+        :param size: The key space size
+        :return: The context of the operations
+        """
+
+        keys = [f"key_{i}" for i in range(size)]
+
+        await target.fill(keys, duration=3600)
+
+        # Weller starts by the first get
+        await target.get(keys[0])
+
+        return keys
+
+    async def before(self, target: Target, context: Any, index: int):
+        """
+        The untimed preparation of the operation
+        """
+
+    @abstractmethod
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        pass
+
+
+class WarmHit(Scenario):
+    name = "warm_hit"
+
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        return target.get(context[index * STRIDE % len(context)])
+
+
+class ColdMiss(Scenario):
+    name = "cold_miss"
+
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        return target.miss(f"miss_{index}")
+
+
+class OverdueRefresh(Scenario):
+    name = "overdue_refresh"
+
+    def applies(self, target: Target) -> bool:
+        return target.auto
+
+    async def prepare(self, target: Target, size: int) -> Any:
+        hot = [f"hot_{i}" for i in range(min(size, HOT_KEYS))]
+
+        await target.fill(hot, duration=0)
+        await super().prepare(target, size - len(hot) or 1)
+
+        return hot
+
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        return target.get(context[index % len(context)])
+
+
+class StrictSweep(Scenario):
+    name = "strict_sweep"
+
+    def applies(self, target: Target) -> bool:
+        return target.strict and not target.auto
+
+    async def before(self, target: Target, context: Any, index: int):
+        await target.fill([f"overdue_{index}"], duration=0)
+
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        return target.get(context[index * STRIDE % len(context)])
+
+
+async def load_slowly(key: Any) -> Any:
+    await asyncio.sleep(0)
+
+    return key
+
+
+class FanIn(Scenario):
+    name = "fan_in"
+    concurrent = True
+
+    def applies(self, target: Target) -> bool:
+        return target.auto
+
+    async def prepare(self, target: Target, size: int) -> Any:
+        await target.fill(["fan_in"], duration=0, fun=load_slowly)
+        await super().prepare(target, size)
+
+        return "fan_in"
+
+    def operation(self, target: Target, context: Any, index: int) -> Awaitable[Any]:
+        return target.get(context)
+
+
+SCENARIOS: dict[str, Callable[[], Scenario]] = {
+    scenario.name: scenario
+    for scenario in (WarmHit, ColdMiss, OverdueRefresh, StrictSweep, FanIn)
+}
@@ -0,0 +1,167 @@
+
+
+"""
+The benchmarked objects behind the one interface
+"""
+
+from uuid import uuid4
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Optional
+
+from weller import Weller
+from weller.storage.memory import (
+    LazyCachedMemoryStorage,
+    StrictCachedMemoryStorage,
+    LazyAutoCachedMemoryStorage,
+    StrictAutoCachedMemoryStorage
+)
+from weller.dispather.storage import WellerMemoryStorage
+
+
+async def load(key: Any) -> Any:
+    return key
+
+
+class Target(ABC):
+    name: str
+    auto: bool
+    strict: bool
+
+    @abstractmethod
+    async def fill(self, keys: Iterable[Any], duration: float, fun: Callable[..., Any] = load):
+        """
+        Put the values of the keys for a while
+        :param fun: The loader of the values, if the target reloads them itself
+        """
+
+    @abstractmethod
+    async def get(self, key: Any) -> Any:
+        pass
+
+    @abstractmethod
+    async def miss(self, key: Any) -> Any:
+        """
+        Get the value of the key that is not in the cache yet
+        """
+
+    async def close(self):
+        pass
+
+
+class StorageTarget(Target):
+    def __init__(self, name: str, storage: Any, auto: bool, strict: bool):
+        self.name = name
+        self.auto = auto
+        self.strict = strict
+
+        self._storage = storage
+
+    async def fill(self, keys: Iterable[Any], duration: float, fun: Callable[..., Any] = load):
+        for key in keys:
+            if self.auto:
+                await self._storage.set(key, duration=duration, fun=fun, value=key)
+
+            else:
+                await self._storage.set(key, value=key, duration=duration)
+
+    async def get(self, key: Any) -> Any:
+        return await self._storage.get(key)
+
+    async def miss(self, key: Any) -> Any:
+        if self.auto:
+            await self._storage.set(key, duration=3600, fun=load)
+
+            return await self._storage.get(key)
+
+        try:
+            return await self._storage.get(key)
+
+        except KeyError:
+            await self._storage.set(key, value=key, duration=3600)
+
+            return key
+
+    async def close(self):
+        await self._storage.close()
+
+
+class WellerTarget(Target):
+    name = "Weller"
+    auto = True
+    strict = True
+
+    def __init__(self):
+        self._weller = Weller(storage=WellerMemoryStorage(scheduled=True), first_long=True)
+
+        @self._weller.cached(duration=3600)
+        async def missed(key: str) -> str:
+            return key
+
+        self._missed = missed
+
+    async def fill(self, keys: Iterable[Any], duration: float, fun: Callable[..., Any] = load):
+        for key in keys:
+            self._weller.add(key, duration=duration)(fun)
+
+    async def get(self, key: Any) -> Any:
+        return await self._weller.get(key)
+
+    async def miss(self, key: Any) -> Any:
+        return await self._missed(key)
+
+    async def close(self):
+        await self._weller.close()
+
+
+def get_targets(redis_url: Optional[str] = None) -> dict[str, Callable[[], Target]]:
+    """
+    :param redis_url: If specified, the redis storages are benchmarked too
+    :return: The factories of the targets by their names
+    """
+
+    targets = {
+        "LazyCachedMemoryStorage": lambda: StorageTarget(
+            "LazyCachedMemoryStorage", LazyCachedMemoryStorage(), auto=False, strict=False
+        ),
+        "StrictCachedMemoryStorage": lambda: StorageTarget(
+            "StrictCachedMemoryStorage", StrictCachedMemoryStorage(), auto=False, strict=True
+        ),
+        "LazyAutoCachedMemoryStorage": lambda: StorageTarget(
+            "LazyAutoCachedMemoryStorage", LazyAutoCachedMemoryStorage(), auto=True, strict=False
+        ),
+        "StrictAutoCachedMemoryStorage": lambda: StorageTarget(
+            "StrictAutoCachedMemoryStorage", StrictAutoCachedMemoryStorage(), auto=True, strict=True
+        ),
+        "Weller": WellerTarget,
+    }
+
+    if redis_url is None:
+        return targets
+
+    from weller.storage.redis import (
+        LazyCachedRedisStorage,
+        StrictCachedRedisStorage,
+        LazyAutoCachedRedisStorage,
+        StrictAutoCachedRedisStorage
+    )
+
+    redis_storages = (
+        (LazyCachedRedisStorage, False, False),
+        (StrictCachedRedisStorage, False, True),
+        (LazyAutoCachedRedisStorage, True, False),
+        (StrictAutoCachedRedisStorage, True, True),
+    )
+
+    for storage_class, auto, strict in redis_storages:
+        name = storage_class.__name__
+
+        targets[name] = (
+            lambda name=name, storage_class=storage_class, auto=auto, strict=strict: StorageTarget(
+                name,
+                storage_class(url=redis_url, prefix=f"weller-benchmark-{uuid4().hex}"),
+                auto=auto,
+                strict=strict
+            )
+        )
+
+    return targets
@@ -0,0 +1,49 @@
+
+
+"""
+The warm hit latency of Weller.get
+
+    python -m benchmarks.weller_get
+"""
+
+import time
+import asyncio
+import statistics
+
+from weller import Weller
+from weller.dispather.storage import WellerMemoryStorage
+
+
+KEYS = 100
+ROUNDS = 5
+OPERATIONS = 100_000
+
+
+async def main():
+    weller = Weller(storage=WellerMemoryStorage(scheduled=True), first_long=True)
+
+    for i in range(KEYS):
+        @weller.add(f"key_{i}", duration=3600)
+        async def get_value(key: str) -> str:
+            return key
+
+    await weller.get("key_0")
+
+    keys = [f"key_{i % KEYS}" for i in range(OPERATIONS)]
+    results = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+
+        for key in keys:
+            await weller.get(key)
+
+        results.append((time.perf_counter() - start) / OPERATIONS)
+
+    await weller._storage.close()
+
+    print(f"Weller.get warm hit: {statistics.median(results) * 1e9:.0f} ns/op (median of {ROUNDS} rounds)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
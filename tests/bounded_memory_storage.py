@@ -0,0 +1,158 @@
+
+
+import asyncio
+
+import pytest
+
+from weller import Weller
+from weller.storage.memory import LazyCachedMemoryStorage, StrictAutoCachedMemoryStorage
+from weller.storage.memory.eviction import LRUPolicy, LFUPolicy, WTinyLFUPolicy
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_STR_VALUE = "some_value"
+
+
+async def get_some_value() -> str:
+    return SOME_STR_VALUE
+
+
+async def test_unbounded_by_default():
+    storage = LazyCachedMemoryStorage()
+
+    for i in range(1000):
+        await storage.set(i, i, 10)
+
+    assert len(storage._storage) == 1000
+    assert storage.evictions == 0
+
+
+async def test_max_entries_lru():
+    storage = LazyCachedMemoryStorage(max_entries=3)
+
+    for i in range(3):
+        await storage.set(i, i, 10)
+
+    assert await storage.get(0) == 0
+
+    await storage.set(3, 3, 10)
+
+    assert sorted(storage._storage) == [0, 2, 3]
+    assert storage.evictions == 1
+
+    with pytest.raises(KeyError):
+        await storage.get(1)
+
+
+async def test_max_entries_lfu():
+    storage = LazyCachedMemoryStorage(max_entries=3, eviction="lfu")
+
+    for i in range(3):
+        await storage.set(i, i, 10)
+
+    for _ in range(3):
+        await storage.get(0)
+        await storage.get(2)
+
+    await storage.set(3, 3, 10)
+
+    assert sorted(storage._storage) == [0, 2, 3]
+
+
+async def test_max_bytes():
+    storage = LazyCachedMemoryStorage(max_bytes=10, sizeof=len)
+
+    await storage.set(0, "12345", 10)
+    await storage.set(1, "12345", 10)
+    await storage.set(2, "1", 10)
+
+    assert sorted(storage._storage) == [1, 2]
+    assert storage._bytes == 6
+
+    await storage.set(1, "1", 10)
+
+    assert storage._bytes == 2
+
+
+async def test_deleted_value_is_forgotten():
+    storage = LazyCachedMemoryStorage(max_entries=2, max_bytes=100, sizeof=len)
+
+    await storage.set(0, "1", 0.05)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        await storage.get(0)
+
+    assert storage._bytes == 0
+
+    await storage.set(1, "1", 10)
+    await storage.set(2, "1", 10)
+
+    assert storage.evictions == 0
+
+
+async def test_tinylfu_resists_scan():
+    storage = LazyCachedMemoryStorage(max_entries=100, eviction="w-tinylfu")
+
+    for i in range(100):
+        await storage.set(i, i, 10)
+
+    for _ in range(5):
+        for i in range(50):
+            await storage.get(i)
+
+    for i in range(1000, 2000):
+        await storage.set(i, i, 10)
+
+    assert len(storage._storage) == 100
+    assert all(i in storage._storage for i in range(50))
+
+
+async def test_policies_return_each_key_once():
+    for policy in (LRUPolicy(), LFUPolicy(), WTinyLFUPolicy()):
+        for i in range(100):
+            policy.add(i)
+
+        for i in range(0, 100, 3):
+            policy.touch(i)
+
+        policy.remove(50)
+
+        victims = [policy.pop_victim() for _ in range(99)]
+
+        assert sorted(victims) == [i for i in range(100) if i != 50]
+
+
+async def test_weller_reloads_evicted_value():
+    weller = Weller(storage=StrictAutoCachedMemoryStorage(max_entries=1), first_long=True)
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_str():
+        return SOME_STR_VALUE
+
+    @weller.add("other_key", duration=10)
+    async def get_other():
+        return "other_value"
+
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await weller.get("other_key") == "other_value"
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+
+async def test_background_refresh_does_not_touch_lru():
+    storage = StrictAutoCachedMemoryStorage(max_entries=3)
+
+    for key in ("a", "b", "c"):
+        await storage.set(key, duration=10, fun=get_some_value, value=key)
+
+    for _ in range(5):
+        assert await storage.get("a") == "a"
+
+        await asyncio.sleep(0)
+
+    await storage.set("d", duration=10, fun=get_some_value, value="d")
+
+    assert set(storage._storage) == {"a", "c", "d"}
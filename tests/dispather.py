@@ -6,6 +6,8 @@ from dataclasses import dataclass
 
 import pytest
 
+from weller import Depends, Weller
+from weller.dispather.storage import WellerMemoryStorage
 from weller.storage.memory import LazyAutoCachedMemoryStorage
 
 
@@ -24,3 +26,432 @@ async def long_get_data() -> int:
     return 123
 
 
+async def test_cold_key_loaded_once():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_data():
+        calls.append(1)
+
+        await asyncio.sleep(0.1)
+
+        return SOME_STR_VALUE
+
+    result = await asyncio.gather(*[weller.get(SOME_STR_KEY) for _ in range(1000)])
+
+    assert result == [SOME_STR_VALUE] * 1000
+    assert len(calls) == 1
+
+
+async def test_cached_by_arguments():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=10)
+    async def get_user(user_id: int, tenant: str = "default") -> str:
+        calls.append(user_id)
+
+        return f"{tenant}:{user_id}"
+
+    assert await get_user(1) == "default:1"
+    assert await get_user(user_id=1) == "default:1"
+    assert await get_user(2, tenant="other") == "other:2"
+    assert await get_user(2, "other") == "other:2"
+
+    assert calls == [1, 2]
+
+
+async def test_cached_default_arguments_share_key():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    def get_prefix() -> str:
+        return "user"
+
+    @weller.cached(duration=10)
+    async def get_user(user_id: int, tenant: str = "default", prefix: str = Depends(get_prefix)) -> str:
+        calls.append(user_id)
+
+        return f"{prefix}:{tenant}:{user_id}"
+
+    assert await get_user(1) == "user:default:1"
+    assert await get_user(1, "default") == "user:default:1"
+    assert await get_user(1, tenant="default") == "user:default:1"
+
+    assert calls == [1]
+
+
+async def test_cached_arguments_named_as_storage_parameters():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    @weller.cached(duration=10)
+    async def get_value(key: str, value: int, duration: float = 0.5, fun: str = "fun") -> str:
+        return f"{key}:{value}:{duration}:{fun}"
+
+    assert await get_value("a", 1) == "a:1:0.5:fun"
+    assert await get_value("a", 2, fun="other") == "a:2:0.5:other"
+
+
+async def test_cached_variadic_arguments():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=10, use_di=False)
+    async def get_sum(first: int, *items: int, **options: int) -> tuple:
+        calls.append(1)
+
+        return first, items, options
+
+    assert await get_sum(1, 2, 3, scale=4) == (1, (2, 3), {"scale": 4})
+    assert await get_sum(1, 2, 3, scale=4) == (1, (2, 3), {"scale": 4})
+    assert await get_sum(1) == (1, (), {})
+
+    assert len(calls) == 2
+
+
+async def test_cached_variadic_keyword_arguments():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    @weller.cached(duration=10, use_di=False)
+    def get_options(**options: int) -> dict:
+        return options
+
+    # The storage's key and duration don't get into them
+    assert await get_options(b=2) == {"b": 2}
+
+
+async def test_cached_variadic_arguments_with_di():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    with pytest.raises(TypeError):
+        @weller.cached(duration=10)
+        async def get_items(*items: int) -> tuple:
+            return items
+
+
+async def test_cached_container_types_differ():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    @weller.cached(duration=10)
+    async def get_type(value: Any) -> str:
+        return type(value).__name__
+
+    assert await get_type({"a": 1}) == "dict"
+    assert await get_type([("a", 1)]) == "list"
+    assert await get_type((("a", 1),)) == "tuple"
+    assert await get_type({1, 2}) == "set"
+    assert await get_type((1, 2)) == "tuple"
+    assert await get_type([1, 2]) == "list"
+
+
+async def test_cached_unhashable_arguments():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=10)
+    async def get_sum(numbers: list[int], options: dict[str, Any]) -> int:
+        calls.append(1)
+
+        return sum(numbers)
+
+    assert await get_sum([1, 2], {"a": [1]}) == 3
+    assert await get_sum([1, 2], {"a": [1]}) == 3
+    assert await get_sum([1, 3], {"a": [1]}) == 4
+
+    assert len(calls) == 2
+
+
+async def test_cached_key_builder():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=10, key_builder=lambda user_id, request_id: ("user", user_id))
+    async def get_user(user_id: int, request_id: str) -> int:
+        calls.append(request_id)
+
+        return user_id
+
+    assert await get_user(1, "a") == 1
+    assert await get_user(1, "b") == 1
+
+    assert calls == ["a"]
+
+
+async def test_cached_is_refreshed():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=0.05)
+    async def get_user(user_id: int) -> int:
+        calls.append(user_id)
+
+        return len(calls)
+
+    assert await get_user(1) == 1
+
+    await asyncio.sleep(0.1)
+
+    assert await get_user(1) == 2
+
+
+async def test_cached_concurrent_calls_once():
+    weller = Weller(storage=WellerMemoryStorage())
+    calls = []
+
+    @weller.cached(duration=10)
+    async def get_user(user_id: int) -> int:
+        calls.append(user_id)
+
+        await asyncio.sleep(0.1)
+
+        return user_id
+
+    result = await asyncio.gather(*[get_user(i % 10) for i in range(1000)])
+
+    assert result == [i % 10 for i in range(1000)]
+    assert sorted(calls) == list(range(10))
+
+
+async def test_get_many():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    for key in ("a", "b", "c"):
+        @weller.add(key, duration=10)
+        async def get_data(key: str) -> str:
+            return key.upper()
+
+    assert await weller.get_many(["a", "b"]) == {"a": "A", "b": "B"}
+
+    await asyncio.sleep(0.01)
+
+    assert await weller.get_many(["c", "a", "b"]) == {"c": "C", "a": "A", "b": "B"}
+
+
+async def test_refresh_ahead():
+    weller = Weller(storage=WellerMemoryStorage(), refresh_ahead=0.5, refresh_jitter=0)
+    calls = []
+
+    @weller.add(SOME_STR_KEY, duration=0.2)
+    async def get_data():
+        calls.append(1)
+
+        return len(calls)
+
+    assert await weller.get(SOME_STR_KEY) == 1
+
+    await asyncio.sleep(0.15)
+
+    assert len(calls) == 2
+
+    # The value is refreshed before the expiry, so the request doesn't wait
+    await asyncio.sleep(0.1)
+
+    data = await weller._storage._get_data_from_storage(SOME_STR_KEY)
+
+    assert data.value >= 3
+    assert not weller._storage._get_data_is_overdue(data)
+
+    await weller.close()
+
+
+async def test_refresh_ahead_concurrency_limit():
+    weller = Weller(
+        storage=WellerMemoryStorage(scheduled=True),
+        first_long=True,
+        refresh_ahead=0.5,
+        refresh_jitter=0.1,
+        max_concurrent_refreshes=2
+    )
+
+    running = []
+    max_running = []
+
+    for i in range(10):
+        @weller.add(str(i), duration=1)
+        async def get_data():
+            running.append(1)
+            max_running.append(len(running))
+
+            await asyncio.sleep(0.05)
+
+            running.pop()
+
+            return len(max_running)
+
+    await weller.get("0")
+
+    max_running.clear()
+
+    await asyncio.sleep(0.8)
+
+    assert len(max_running) == 10
+    assert max(max_running) <= 2
+
+    await weller.close()
+    await weller._storage.close()
+
+
+async def test_add_without_di():
+    weller = Weller(storage=WellerMemoryStorage())
+
+    @weller.add(SOME_STR_KEY, duration=10, use_di=False)
+    async def get_data(key: str):
+        return key
+
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_KEY
+    assert weller._storage._storage[SOME_STR_KEY].fun is get_data
+
+
+async def test_warmup_concurrency_and_priority():
+    weller = Weller(storage=WellerMemoryStorage(), warmup_concurrency=2)
+    running = []
+    max_running = []
+    order = []
+
+    for i in range(6):
+        @weller.add(str(i), duration=10, priority=i)
+        async def get_data(i=i):
+            order.append(i)
+            running.append(1)
+            max_running.append(len(running))
+
+            await asyncio.sleep(0.02)
+
+            running.pop()
+
+            return i
+
+    report = await weller.warmup()
+
+    assert order == [5, 4, 3, 2, 1, 0]
+    assert max(max_running) == 2
+    assert [result.key for result in report.results] == ["5", "4", "3", "2", "1", "0"]
+    assert report.failed == {}
+    assert weller._ready
+    assert await weller.get("3") == 3
+
+
+async def test_warmup_collects_failures():
+    weller = Weller(storage=WellerMemoryStorage(), warmup_timeout=0.05)
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_data():
+        return SOME_STR_VALUE
+
+    @weller.add("broken", duration=10)
+    async def get_broken():
+        raise ValueError("broken")
+
+    @weller.add("slow", duration=10)
+    async def get_slow():
+        await asyncio.sleep(1)
+
+    report = await weller.warmup()
+
+    assert report.loaded == [SOME_STR_KEY]
+    assert isinstance(report.failed["broken"], ValueError)
+    assert isinstance(report.failed["slow"], asyncio.TimeoutError)
+    assert all(result.duration < 0.5 for result in report.results)
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+
+async def test_warmup_timeout_cancels_function():
+    weller = Weller(storage=WellerMemoryStorage(), warmup_concurrency=2, warmup_timeout=0.05)
+    running = []
+    max_running = []
+
+    for i in range(6):
+        @weller.add(str(i), duration=10)
+        async def get_data(i=i):
+            running.append(1)
+            max_running.append(len(running))
+
+            try:
+                await asyncio.sleep(0.2)
+
+            finally:
+                running.pop()
+
+            return i
+
+    report = await weller.warmup()
+
+    await asyncio.sleep(0.2)
+
+    assert max(max_running) == 2
+    assert all(isinstance(error, asyncio.TimeoutError) for error in report.failed.values())
+    assert len(report.failed) == 6
+    assert weller._storage._storage == {}
+
+
+async def test_initialization_loads_each_key_once():
+    storage = WellerMemoryStorage()
+    weller = Weller(storage=storage)
+    calls = []
+    storage_set = storage.set
+
+    async def set_value(key, **kwargs):
+        calls.append(key)
+
+        await storage_set(key=key, **kwargs)
+
+    storage.set = set_value
+
+    for i in range(5):
+        @weller.add(str(i), duration=10)
+        async def get_data(i=i):
+            await asyncio.sleep(0.1)
+
+            return i
+
+    result = await asyncio.gather(*[weller.get(str(i % 5)) for i in range(100)])
+
+    assert result == [i % 5 for i in range(100)]
+
+    await asyncio.sleep(0.15)
+
+    assert sorted(calls) == ["0", "1", "2", "3", "4"]
+    assert await weller.get("4") == 4
+
+
+async def test_warmup_skips_value_loaded_by_get():
+    weller = Weller(storage=WellerMemoryStorage(), warmup_concurrency=1)
+    calls = []
+
+    for i in range(5):
+        @weller.add(f"k{i}", duration=10)
+        async def get_data(i=i):
+            calls.append(i)
+
+            await asyncio.sleep(0.02)
+
+            return i
+
+    warmup = asyncio.create_task(weller.warmup())
+
+    await asyncio.sleep(0.01)
+
+    assert await weller.get("k4") == 4
+
+    report = await warmup
+
+    assert sorted(calls) == [0, 1, 2, 3, 4]
+    assert report.failed == {}
+
+
+async def test_waiter_loads_value_cancelled_by_warmup():
+    weller = Weller(storage=WellerMemoryStorage(), warmup_timeout=0.05)
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_data():
+        await asyncio.sleep(0.1)
+
+        return SOME_STR_VALUE
+
+    warmup = asyncio.create_task(weller.warmup())
+
+    await asyncio.sleep(0.01)
+
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert isinstance((await warmup).failed[SOME_STR_KEY], asyncio.TimeoutError)
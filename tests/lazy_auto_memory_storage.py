@@ -1,6 +1,8 @@
 
 
+import gc
 import asyncio
+import weakref
 from typing import Any
 from dataclasses import dataclass
 
@@ -221,3 +223,252 @@ async def test_block_by_fun():
     print(result[0], result[1], result[2])
 
     return result[0] != result[1] and result[1] == result[2]
+
+
+async def test_concurrent_set_calls_fun_once():
+    storage = LazyAutoCachedMemoryStorage()
+
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        await asyncio.sleep(0.1)
+
+        return SOME_INT_VALUE
+
+    await asyncio.gather(*[storage.set(SOME_STR_KEY, duration=1, fun=fn) for _ in range(100)])
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert len(calls) == 1
+
+
+async def test_concurrent_refresh_calls_fun_once():
+    storage = LazyAutoCachedMemoryStorage()
+
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        await asyncio.sleep(0.1)
+
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.1)
+
+    result = await asyncio.gather(*[storage.get(SOME_STR_KEY) for _ in range(100)])
+
+    assert SOME_INT_VALUE in result
+    assert len(calls) == 1
+
+
+async def test_failed_refresh_is_retried():
+    storage = LazyAutoCachedMemoryStorage()
+
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        if len(calls) == 1:
+            raise ValueError()
+
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(ValueError):
+        await storage.get(SOME_STR_KEY)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_get_many_refreshes_concurrently():
+    storage = LazyAutoCachedMemoryStorage()
+
+    for i in range(10):
+        await storage.set(i, duration=0.05, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_2_delay, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.1)
+
+    start = asyncio.get_running_loop().time()
+    result = await storage.get_many([*range(10), SOME_STR_KEY, "missing_key"])
+    end = asyncio.get_running_loop().time()
+
+    assert result == {**{i: SOME_INT_VALUE for i in range(10)}, SOME_STR_KEY: SOME_STR_VALUE}
+    assert [*result] == [*range(10), SOME_STR_KEY]
+    assert end - start < 0.5
+
+
+async def test_set_many():
+    storage = LazyAutoCachedMemoryStorage(some_key=SOME_INT_VALUE)
+
+    await storage.set_many({SOME_STR_KEY: get_values_from_args, SOME_INT_KEY: get_some_value_with_01_delay}, 1)
+
+    assert await storage.get_many([SOME_STR_KEY, SOME_INT_KEY]) == {
+        SOME_STR_KEY: SOME_INT_VALUE,
+        SOME_INT_KEY: SOME_INT_VALUE
+    }
+
+
+async def test_stale_while_revalidate():
+    storage = LazyAutoCachedMemoryStorage(stale_while_revalidate=1)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.1)
+
+    start = asyncio.get_running_loop().time()
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert asyncio.get_running_loop().time() - start < 0.05
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_stale_while_revalidate_window_passed():
+    storage = LazyAutoCachedMemoryStorage(stale_while_revalidate=0.05)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_max_stale_waits_for_refresh():
+    storage = LazyAutoCachedMemoryStorage(stale_while_revalidate=1, max_stale=0.05)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_max_stale_waits_for_running_refresh():
+    storage = LazyAutoCachedMemoryStorage(max_stale=0.05)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.15)
+
+    result = await asyncio.gather(*[storage.get(SOME_STR_KEY) for _ in range(10)])
+
+    assert result == [SOME_INT_VALUE] * 10
+
+
+async def test_max_stale_refreshes_externally_blocked_value():
+    storage = LazyAutoCachedMemoryStorage(max_stale=0.05)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    # The refresher of other process has blocked it and crashed
+    storage._storage[SOME_STR_KEY].bloked = True
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert not storage._storage[SOME_STR_KEY].bloked
+
+
+async def test_refresh_updates_data_in_place():
+    storage = LazyAutoCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value=SOME_STR_VALUE)
+
+    data = storage._storage[SOME_STR_KEY]
+    expire_time = data.expire_time
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    assert storage._storage[SOME_STR_KEY] is data
+    assert data.expire_time > expire_time
+    assert not data.bloked
+
+
+async def test_function_is_injected_once():
+    from weller.storage.service import injection
+
+    storage = LazyAutoCachedMemoryStorage()
+
+    async def fn(some_key: int) -> int:
+        return some_key
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, some_key=SOME_INT_VALUE)
+    await storage.set(SOME_INT_KEY, duration=0.05, fun=fn, some_key=SOME_INT_VALUE)
+
+    assert storage._storage[SOME_STR_KEY].fun is storage._storage[SOME_INT_KEY].fun
+    assert storage._storage[SOME_STR_KEY].fun is injection.get_injected(fn)
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_injected_function_does_not_keep_original():
+    from weller.storage.service import injection
+
+    references = []
+
+    for _ in range(10):
+        async def fn(some_key: int) -> int:
+            return some_key
+
+        references.append(weakref.ref(fn))
+
+        injection.get_injected(fn)
+
+    del fn
+
+    gc.collect()
+
+    assert all(reference() is None for reference in references)
+
+
+async def test_without_di():
+    storage = LazyAutoCachedMemoryStorage(some_key=SOME_INT_VALUE, other_key=SOME_STR_VALUE)
+
+    async def fn(some_key):
+        return some_key
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, use_di=False)
+
+    data = storage._storage[SOME_STR_KEY]
+
+    assert data.fun is fn
+    assert data.fun_data == {"some_key": SOME_INT_VALUE}
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_cancel_load():
+    storage = LazyAutoCachedMemoryStorage()
+
+    loading = asyncio.create_task(storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_2_delay))
+
+    await asyncio.sleep(0.05)
+
+    assert await storage.cancel_load(SOME_STR_KEY)
+    assert not await storage.cancel_load(SOME_STR_KEY)
+
+    with pytest.raises(asyncio.CancelledError):
+        await loading
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
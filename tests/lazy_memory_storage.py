@@ -142,3 +142,26 @@ async def test_second_get_override_data():
 
     except KeyError:
         assert True
+
+
+async def test_set_many_get_many():
+    storage = LazyCachedMemoryStorage()
+
+    await storage.set_many({SOME_STR_KEY: SOME_STR_VALUE, SOME_INT_KEY: SOME_INT_VALUE}, 1)
+
+    assert await storage.get_many([SOME_INT_KEY, "missing_key", SOME_STR_KEY]) == {
+        SOME_INT_KEY: SOME_INT_VALUE,
+        SOME_STR_KEY: SOME_STR_VALUE
+    }
+
+
+async def test_get_many_skips_overdue():
+    storage = LazyCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, 0.1)
+    await storage.set(SOME_INT_KEY, SOME_INT_VALUE, 1)
+
+    time.sleep(0.15)
+
+    assert await storage.get_many([SOME_STR_KEY, SOME_INT_KEY]) == {SOME_INT_KEY: SOME_INT_VALUE}
+    assert SOME_STR_KEY not in storage._storage
@@ -0,0 +1,115 @@
+
+
+import asyncio
+
+import pytest
+
+from weller.lease import MemoryLease
+from weller.storage.memory import LazyAutoCachedMemoryStorage, StrictAutoCachedMemoryStorage
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def test_memory_lease_is_exclusive():
+    lease = MemoryLease()
+
+    token = await lease.acquire(SOME_STR_KEY, 1)
+
+    assert token
+    assert await lease.acquire(SOME_STR_KEY, 1) is None
+
+    assert await lease.release(SOME_STR_KEY, token)
+    assert await lease.acquire(SOME_STR_KEY, 1)
+
+
+async def test_memory_lease_expires():
+    lease = MemoryLease()
+
+    token = await lease.acquire(SOME_STR_KEY, 0.1)
+
+    await asyncio.sleep(0.15)
+
+    assert await lease.acquire(SOME_STR_KEY, 1)
+    assert not await lease.release(SOME_STR_KEY, token)
+
+
+async def test_redis_lease():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    from weller.lease.redis_lease import RedisLease
+
+    lease = RedisLease(fakeredis.FakeAsyncRedis())
+
+    token = await lease.acquire(SOME_STR_KEY, 1)
+
+    assert token
+    assert await lease.acquire(SOME_STR_KEY, 1) is None
+    assert not await lease.release(SOME_STR_KEY, "other_token")
+
+    assert await lease.release(SOME_STR_KEY, token)
+    assert await lease.acquire(SOME_STR_KEY, 1)
+
+
+async def test_only_lease_owner_refreshes():
+    lease = MemoryLease()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        await asyncio.sleep(0.1)
+
+        return SOME_INT_VALUE
+
+    workers = [LazyAutoCachedMemoryStorage(lease=lease) for _ in range(5)]
+
+    for storage in workers:
+        await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.1)
+
+    result = await asyncio.gather(*[storage.get(SOME_STR_KEY) for storage in workers])
+
+    assert sorted(result, key=str) == [SOME_INT_VALUE] + [SOME_STR_VALUE] * 4
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.01)
+
+    # The lease is released after the refresh
+    assert await lease.acquire(SOME_STR_KEY, 1)
+
+
+async def test_lost_lease_is_retried_later():
+    lease = MemoryLease()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        return SOME_INT_VALUE
+
+    storage = StrictAutoCachedMemoryStorage(lease=lease, scheduled=True)
+    storage._retry_delay = 0.1
+
+    # Other worker refreshes the value
+    token = await lease.acquire(SOME_STR_KEY, 10)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=fn, value=SOME_STR_VALUE)
+
+    await asyncio.sleep(0.15)
+
+    assert not calls
+
+    await lease.release(SOME_STR_KEY, token)
+    await asyncio.sleep(0.15)
+
+    assert calls == [1]
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    await storage.close()
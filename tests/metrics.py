@@ -0,0 +1,140 @@
+
+
+import asyncio
+
+import pytest
+
+from weller.metrics import MemoryMetrics, to_prometheus
+from weller.storage.memory import (
+    LazyCachedMemoryStorage,
+    StrictCachedMemoryStorage,
+    LazyAutoCachedMemoryStorage
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def test_lazy_storage_counts():
+    metrics = MemoryMetrics()
+    storage = LazyCachedMemoryStorage(metrics=metrics)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.05)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_OTHER_KEY)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
+
+    assert metrics.counters == {
+        ("hits", SOME_STR_KEY): 1,
+        ("misses", SOME_OTHER_KEY): 1,
+        ("overdue", SOME_STR_KEY): 1,
+    }
+
+
+async def test_strict_storage_get_many_counts():
+    metrics = MemoryMetrics()
+    storage = StrictCachedMemoryStorage(metrics=metrics)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    assert await storage.get_many([SOME_STR_KEY, SOME_OTHER_KEY]) == {SOME_STR_KEY: SOME_STR_VALUE}
+
+    assert metrics.get_count("hits") == 1
+    assert metrics.get_count("misses") == 1
+
+
+async def test_auto_storage_measures_functions():
+    metrics = MemoryMetrics()
+    storage = LazyAutoCachedMemoryStorage(metrics=metrics)
+    fail = False
+
+    async def fn():
+        await asyncio.sleep(0.01)
+
+        if fail:
+            raise ValueError()
+
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    await asyncio.sleep(0.1)
+    fail = True
+
+    with pytest.raises(ValueError):
+        await storage.get(SOME_STR_KEY)
+
+    histogram = metrics.histograms[("load_seconds", SOME_STR_KEY)]
+
+    assert histogram.count == 2
+    assert histogram.sum >= 0.02
+    assert metrics.get_count("hits") == 1
+    assert metrics.get_count("overdue") == 1
+    assert metrics.get_count("load_errors") == 1
+
+
+async def test_auto_storage_counts_blocked_and_stale():
+    metrics = MemoryMetrics()
+    storage = LazyAutoCachedMemoryStorage(metrics=metrics, stale_while_revalidate=10)
+
+    async def fn():
+        await asyncio.sleep(0.05)
+
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.2, fun=fn, value=SOME_STR_VALUE)
+    await asyncio.sleep(0.25)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    assert metrics.get_count("stale") == 1
+    assert metrics.get_count("blocked") == 1
+    assert metrics.get_count("hits") == 1
+
+
+async def test_evictions_and_key_group():
+    metrics = MemoryMetrics(key_group=lambda key: key.split(":")[0])
+    storage = LazyCachedMemoryStorage(max_entries=1, metrics=metrics)
+
+    await storage.set("user:1", SOME_STR_VALUE, duration=10)
+    await storage.set("user:2", SOME_STR_VALUE, duration=10)
+
+    assert metrics.counters == {("evictions", "user"): 1}
+
+
+async def test_prometheus_text():
+    metrics = MemoryMetrics(buckets=(0.1, 1))
+
+    metrics.increment("hits", 'some "key"')
+    metrics.observe("load_seconds", SOME_STR_KEY, 0.5)
+
+    assert to_prometheus(metrics) == (
+        "# TYPE weller_hits_total counter\n"
+        'weller_hits_total{group="some \\"key\\""} 1\n'
+        "# TYPE weller_load_seconds histogram\n"
+        'weller_load_seconds_bucket{group="some_key",le="0.1"} 0\n'
+        'weller_load_seconds_bucket{group="some_key",le="1.0"} 1\n'
+        'weller_load_seconds_bucket{group="some_key",le="+Inf"} 1\n'
+        'weller_load_seconds_sum{group="some_key"} 0.5\n'
+        'weller_load_seconds_count{group="some_key"} 1\n'
+    )
@@ -0,0 +1,279 @@
+
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from weller.storage.redis import (
+    LazyCachedRedisStorage,
+    StrictCachedRedisStorage,
+    LazyAutoCachedRedisStorage,
+    StrictAutoCachedRedisStorage
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_KEY = 123
+SOME_INT_VALUE = 321
+
+
+async def get_some_value_with_01_delay() -> int:
+    await asyncio.sleep(0.1)
+
+    return SOME_INT_VALUE
+
+
+async def get_values_from_args(some_key: int) -> int:
+    return some_key
+
+
+async def test_lazy_get_value():
+    storage = LazyCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, 1)
+    await storage.set(SOME_INT_KEY, SOME_INT_VALUE, 1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await storage.get(SOME_INT_KEY) == SOME_INT_VALUE
+
+
+async def test_lazy_data_is_overdue():
+    storage = LazyCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, 0.1)
+
+    await asyncio.sleep(0.15)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
+
+
+async def test_storages_share_redis():
+    redis = fakeredis.FakeAsyncRedis()
+
+    await LazyCachedRedisStorage(redis=redis).set(SOME_STR_KEY, SOME_STR_VALUE, 1)
+
+    assert await LazyCachedRedisStorage(redis=redis).get(SOME_STR_KEY) == SOME_STR_VALUE
+
+
+async def test_strict_sweep_deletes_overdue():
+    redis = fakeredis.FakeAsyncRedis()
+    storage = StrictCachedRedisStorage(redis=redis)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, 10)
+    await storage.set(SOME_INT_KEY, SOME_INT_VALUE, 0.1)
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert [*await storage._get_all_data()] == [SOME_STR_KEY]
+    assert await redis.zcard(storage._index_key) == 1
+
+
+async def test_strict_sweep_counts_overdue():
+    from weller.metrics import MemoryMetrics
+
+    metrics = MemoryMetrics()
+    storage = StrictCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), metrics=metrics)
+
+    await storage.set(SOME_INT_KEY, SOME_INT_VALUE, 0.1)
+
+    await asyncio.sleep(0.15)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_INT_KEY)
+
+    assert metrics.get_count("overdue") == 1
+
+
+async def test_lazy_auto_refresh():
+    storage = LazyAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    assert await storage.get(SOME_STR_KEY) == "broken_data"
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_lazy_auto_default_arguments():
+    storage = LazyAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), some_key=SOME_INT_VALUE)
+
+    await storage.set(key=SOME_STR_KEY, duration=1, fun=get_values_from_args)
+
+    assert await storage.get(key=SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_lazy_auto_reload_evicted_value():
+    redis = fakeredis.FakeAsyncRedis()
+    storage = LazyAutoCachedRedisStorage(redis=redis, keep_overdue=0)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_strict_auto_full_refresh():
+    storage = StrictAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+
+    await storage.set(SOME_INT_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+    await storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == "broken_data"
+
+    await asyncio.sleep(0.15)
+
+    assert (await storage._get_data_from_storage(SOME_INT_KEY)).value == SOME_INT_VALUE
+
+
+async def test_strict_auto_full_refresh_decodes_overdue_only():
+    from weller.serializers import PickleSerializer
+
+    loads = []
+
+    class CountingSerializer(PickleSerializer):
+        def loads(self, payload):
+            value = super().loads(payload)
+
+            loads.append(value)
+
+            return value
+
+    storage = StrictAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), serializer=CountingSerializer())
+
+    await storage.set(SOME_INT_KEY, duration=10, fun=get_some_value_with_01_delay, value="other_data")
+    await storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    assert await storage.get(SOME_STR_KEY) == "broken_data"
+
+    await asyncio.sleep(0.05)
+
+    assert loads == ["broken_data"]
+
+
+async def test_strict_auto_get_reads_overdue_values_only():
+    redis = fakeredis.FakeAsyncRedis()
+    storage = StrictAutoCachedRedisStorage(redis=redis)
+    reads = []
+
+    for i in range(50):
+        await storage.set(i, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.1)
+
+    redis_get, redis_mget = redis.get, redis.mget
+
+    async def get(name):
+        reads.append(name)
+
+        return await redis_get(name)
+
+    async def mget(names):
+        reads.extend(names)
+
+        return await redis_mget(names)
+
+    redis.get, redis.mget = get, mget
+
+    assert await storage.get(1) == "broken_data"
+
+    await asyncio.sleep(0.15)
+
+    # The requested value and the overdue one
+    assert len(reads) == 2
+    assert (await storage._get_data_from_storage(SOME_STR_KEY)).value == SOME_INT_VALUE
+
+
+async def test_strict_auto_scheduled():
+    storage = StrictAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), scheduled=True)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.3)
+
+    assert (await storage._get_data_from_storage(SOME_STR_KEY)).value == SOME_INT_VALUE
+
+    await storage.close()
+
+
+async def test_strict_auto_scheduled_retries_failed_refresh():
+    storage = StrictAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), scheduled=True)
+    storage._retry_delay = 0.2
+
+    calls = []
+
+    async def get_broken_value():
+        calls.append(1)
+
+        raise ValueError("broken")
+
+    await storage.set(SOME_STR_KEY, duration=0.5, fun=get_broken_value, value="broken_data")
+
+    await asyncio.sleep(0.6)
+
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.2)
+
+    assert len(calls) == 2
+
+    await storage.close()
+
+
+async def test_lazy_get_many():
+    storage = LazyCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+
+    await storage.set_many({SOME_STR_KEY: SOME_STR_VALUE, SOME_INT_KEY: SOME_INT_VALUE}, 1)
+
+    assert await storage.get_many([SOME_STR_KEY, "missing_key", SOME_INT_KEY]) == {
+        SOME_STR_KEY: SOME_STR_VALUE,
+        SOME_INT_KEY: SOME_INT_VALUE
+    }
+
+
+async def test_lazy_auto_get_many_reloads_evicted():
+    storage = LazyAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis(), keep_overdue=0)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+    await storage.set(SOME_INT_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get_many([SOME_STR_KEY, SOME_INT_KEY]) == {
+        SOME_STR_KEY: SOME_INT_VALUE,
+        SOME_INT_KEY: "broken_data"
+    }
+
+
+async def test_serializer():
+    from weller.serializers import JsonSerializer, CompressedSerializer
+
+    storage = LazyAutoCachedRedisStorage(
+        redis=fakeredis.FakeAsyncRedis(),
+        serializer=CompressedSerializer(JsonSerializer(), threshold=10)
+    )
+
+    async def fn() -> list[str]:
+        return [SOME_STR_VALUE] * 10
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn)
+
+    assert await storage.get(SOME_STR_KEY) == [SOME_STR_VALUE] * 10
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == [SOME_STR_VALUE] * 10
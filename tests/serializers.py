@@ -0,0 +1,80 @@
+
+
+import pytest
+
+from weller.serializers import (
+    AbstractSerializer,
+    PickleSerializer,
+    JsonSerializer,
+    CompressedSerializer,
+    dump_entry,
+    load_entry,
+    read_header
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_VALUE = {"some_key": [1, 2, 3], "other_key": "some_value"}
+BIG_VALUE = "some_value" * 1000
+
+
+class FailingSerializer(AbstractSerializer):
+    def dumps(self, value) -> bytes:
+        return b"value"
+
+    def loads(self, payload: bytes):
+        raise AssertionError("The value mustn't be loaded")
+
+
+async def test_round_trip():
+    for serializer in (PickleSerializer(), JsonSerializer()):
+        assert serializer.loads(serializer.dumps(SOME_VALUE)) == SOME_VALUE
+        assert serializer.loads(memoryview(serializer.dumps(SOME_VALUE))) == SOME_VALUE
+
+
+async def test_compression_threshold():
+    serializer = CompressedSerializer(JsonSerializer(), threshold=100)
+
+    small = serializer.dumps(SOME_VALUE)
+    big = serializer.dumps(BIG_VALUE)
+
+    assert small[0] == 0
+    assert big[0] == 1
+    assert len(big) < len(BIG_VALUE) // 10
+
+    assert serializer.loads(small) == SOME_VALUE
+    assert serializer.loads(big) == BIG_VALUE
+
+
+async def test_unknown_compression():
+    with pytest.raises(ValueError):
+        CompressedSerializer(PickleSerializer(), compression="brotli")
+
+
+async def test_entry_header():
+    payload = dump_entry(FailingSerializer(), SOME_VALUE, set_time=1.5, duration=10, blocked=True)
+
+    assert read_header(payload) == (1.5, 10, True)
+
+    payload = dump_entry(PickleSerializer(), SOME_VALUE, set_time=1.5, duration=10)
+
+    assert load_entry(PickleSerializer(), payload) == (SOME_VALUE, 1.5, 10, False)
+
+
+async def test_msgpack():
+    pytest.importorskip("msgpack")
+
+    from weller.serializers.msgpack_serializer import MsgpackSerializer
+
+    serializer = MsgpackSerializer()
+
+    assert serializer.loads(serializer.dumps(SOME_VALUE)) == SOME_VALUE
+
+
+async def test_lz4():
+    pytest.importorskip("lz4")
+
+    serializer = CompressedSerializer(PickleSerializer(), compression="lz4", threshold=100)
+
+    assert serializer.loads(serializer.dumps(BIG_VALUE)) == BIG_VALUE
@@ -0,0 +1,166 @@
+
+
+import asyncio
+
+import pytest
+
+from weller import Weller
+from weller.metrics import MemoryMetrics
+from weller.storage.memory.eviction import LRUPolicy
+from weller.storage.sharded import (
+    LazyCachedShardedMemoryStorage,
+    StrictCachedShardedMemoryStorage,
+    LazyAutoCachedShardedMemoryStorage,
+    StrictAutoCachedShardedMemoryStorage
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def get_some_value_with_01_delay() -> int:
+    await asyncio.sleep(0.1)
+
+    return SOME_INT_VALUE
+
+
+async def test_set_and_get():
+    storage = LazyCachedShardedMemoryStorage(shards=4)
+
+    await storage.set_many({i: i for i in range(100)}, duration=0.05)
+
+    assert await storage.get(7) == 7
+    assert await storage.get_many([1, 2, 1000]) == {1: 1, 2: 2}
+    assert sum(storage.shard_sizes) == 100
+    assert all(size > 0 for size in storage.shard_sizes)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        await storage.get(7)
+
+
+async def test_bounded_shards():
+    metrics = MemoryMetrics()
+    storage = LazyCachedShardedMemoryStorage(shards=4, max_entries=40, metrics=metrics)
+
+    await storage.set_many({i: i for i in range(100)}, duration=10)
+
+    assert max(storage.shard_sizes) <= 10
+    assert storage.evictions == 100 - sum(storage.shard_sizes)
+    assert metrics.get_count("evictions") == storage.evictions
+
+
+async def test_eviction_policy_instance():
+    with pytest.raises(ValueError):
+        LazyCachedShardedMemoryStorage(max_entries=10, eviction=LRUPolicy())
+
+
+async def test_strict_sweeps_one_shard_per_request():
+    storage = StrictCachedShardedMemoryStorage(shards=4)
+
+    await storage.set_many({i: i for i in range(100)}, duration=0.05)
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert 0 < sum(storage.shard_sizes) - 1 < 100
+
+    # The overdue values of the other shards are never returned
+    with pytest.raises(KeyError):
+        await storage.get(7)
+
+    assert await storage.get_many([1, 2, SOME_STR_KEY]) == {SOME_STR_KEY: SOME_STR_VALUE}
+
+    for _ in range(4):
+        await storage.get(SOME_STR_KEY)
+
+    assert sum(storage.shard_sizes) == 1
+
+
+async def test_strict_timer_wheel():
+    storage = StrictCachedShardedMemoryStorage(shards=4, timer_wheel=True)
+
+    await storage.set_many({i: i for i in range(100)}, duration=0.05)
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    await asyncio.sleep(0.15)
+
+    assert sum(storage.shard_sizes) == 1
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await storage.close()
+
+
+async def test_lazy_auto_refresh():
+    storage = LazyAutoCachedShardedMemoryStorage(shards=4)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    assert await storage.get(SOME_STR_KEY) == "broken_data"
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_strict_auto_refresh():
+    storage = StrictAutoCachedShardedMemoryStorage(shards=2)
+
+    for i in range(10):
+        await storage.set(i, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.15)
+
+    await storage.refresh()
+    await asyncio.sleep(0.3)
+
+    # The refreshed values may be overdue again, so they are read without the checks
+    datum = await storage._get_all_data()
+
+    assert {i: datum[i].value for i in range(10)} == {i: SOME_INT_VALUE for i in range(10)}
+
+
+async def test_strict_auto_scheduled():
+    storage = StrictAutoCachedShardedMemoryStorage(shards=4, scheduled=True)
+
+    for i in range(10):
+        await storage.set(i, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.3)
+
+    assert all(storage._get_shard(i)._storage[i].value == SOME_INT_VALUE for i in range(10))
+
+    await storage.close()
+
+
+async def test_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot")
+    storage = StrictCachedShardedMemoryStorage(shards=4)
+
+    await storage.set_many({i: i for i in range(20)}, duration=10)
+    await storage.save_snapshot(path)
+
+    restored = StrictCachedShardedMemoryStorage(shards=8)
+
+    assert await restored.load_snapshot(path) == 20
+    assert await restored.get_many(range(20)) == {i: i for i in range(20)}
+
+
+async def test_weller():
+    weller = Weller(storage=StrictAutoCachedShardedMemoryStorage(shards=4))
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_str():
+        return SOME_STR_VALUE
+
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
@@ -0,0 +1,302 @@
+
+
+import time
+import asyncio
+import multiprocessing
+
+import pytest
+
+from weller.lease import MemoryLease
+from weller.metrics import MemoryMetrics
+from weller.storage.shared import (
+    SharedSegment,
+    LazyCachedSharedMemoryStorage,
+    StrictCachedSharedMemoryStorage,
+    LazyAutoCachedSharedMemoryStorage,
+    StrictAutoCachedSharedMemoryStorage
+)
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "weller.cache")
+
+
+async def test_set_and_get(path):
+    storage = LazyCachedSharedMemoryStorage(path=path)
+
+    await storage.set(SOME_STR_KEY, {"value": SOME_INT_VALUE}, duration=0.05)
+
+    assert await storage.get(SOME_STR_KEY) == {"value": SOME_INT_VALUE}
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_OTHER_KEY)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
+
+    await storage.close()
+
+
+async def test_storages_share_values(path):
+    storage = LazyCachedSharedMemoryStorage(path=path)
+    other_storage = LazyCachedSharedMemoryStorage(path=path)
+
+    await storage.set_many({SOME_STR_KEY: SOME_STR_VALUE, SOME_OTHER_KEY: SOME_INT_VALUE}, duration=10)
+
+    assert await other_storage.get_many([SOME_STR_KEY, SOME_OTHER_KEY]) == {
+        SOME_STR_KEY: SOME_STR_VALUE,
+        SOME_OTHER_KEY: SOME_INT_VALUE,
+    }
+
+    await storage.close()
+    await other_storage.close()
+
+
+def _set_in_process(path: str):
+    async def main():
+        storage = LazyCachedSharedMemoryStorage(path=path)
+
+        await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+        await storage.close()
+
+    asyncio.run(main())
+
+
+async def test_processes_share_values(path):
+    storage = LazyCachedSharedMemoryStorage(path=path)
+
+    process = multiprocessing.get_context("spawn").Process(target=_set_in_process, args=(path,))
+    process.start()
+
+    await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+    assert process.exitcode == 0
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await storage.close()
+
+
+async def test_evictions(path):
+    metrics = MemoryMetrics()
+    storage = LazyCachedSharedMemoryStorage(path=path, max_entries=4, size=1024, metrics=metrics)
+
+    for i in range(6):
+        await storage.set(i, i, duration=10 + i)
+
+    assert await storage.get_many(range(6)) == {2: 2, 3: 3, 4: 4, 5: 5}
+
+    await storage.set(SOME_STR_KEY, "x" * 900, duration=100)
+
+    assert await storage.get(SOME_STR_KEY) == "x" * 900
+    assert metrics.get_count("evictions") > 2
+
+    with pytest.raises(ValueError):
+        await storage.set(SOME_OTHER_KEY, "x" * 2000, duration=100)
+
+    await storage.close()
+
+
+async def test_deleted_slots_are_reused(path):
+    storage = LazyCachedSharedMemoryStorage(path=path, max_entries=4, size=1024)
+
+    for i in range(100):
+        await storage.set(i, i, duration=0)
+        await storage.set(SOME_STR_KEY, i, duration=10)
+
+        with pytest.raises(KeyError):
+            await storage.get(i)
+
+    assert await storage.get(SOME_STR_KEY) == 99
+
+    await storage.close()
+
+
+async def test_strict_storage_deletes_overdue(path):
+    storage = StrictCachedSharedMemoryStorage(path=path)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.05)
+    await storage.set(SOME_OTHER_KEY, SOME_STR_VALUE, duration=10)
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_OTHER_KEY) == SOME_STR_VALUE
+    assert await storage._get_all_keys() == [SOME_OTHER_KEY]
+
+    await storage.close()
+
+
+async def test_auto_storage_takes_loaded_value(path):
+    calls = []
+
+    async def fn(key: str):
+        calls.append(key)
+
+        return SOME_INT_VALUE
+
+    storage = LazyAutoCachedSharedMemoryStorage(path=path)
+    other_storage = LazyAutoCachedSharedMemoryStorage(path=path)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=fn)
+    await other_storage.set(SOME_STR_KEY, duration=0.1, fun=fn)
+
+    assert await other_storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert calls == [SOME_STR_KEY]
+
+    await asyncio.sleep(0.15)
+
+    assert await other_storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert calls == [SOME_STR_KEY, SOME_STR_KEY]
+
+    await storage.close()
+    await other_storage.close()
+
+
+async def test_auto_storage_reloads_missing_value(path):
+    async def fn():
+        return SOME_INT_VALUE
+
+    storage = LazyAutoCachedSharedMemoryStorage(path=path)
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=fn, value=SOME_STR_VALUE)
+    await storage._del_data_from_storage(SOME_STR_KEY)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    await storage.close()
+
+
+async def test_only_lease_owner_reloads_missing_value(path):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+
+        await asyncio.sleep(0.1)
+
+        return SOME_INT_VALUE
+
+    lease = MemoryLease()
+    storage = LazyAutoCachedSharedMemoryStorage(path=path, lease=lease)
+    other_storage = LazyAutoCachedSharedMemoryStorage(path=path, lease=lease)
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=fn, value=SOME_STR_VALUE)
+    await other_storage.set(SOME_STR_KEY, duration=10, fun=fn, value=SOME_STR_VALUE)
+    await storage._del_data_from_storage(SOME_STR_KEY)
+
+    assert await asyncio.gather(storage.get(SOME_STR_KEY), other_storage.get(SOME_STR_KEY)) == [
+        SOME_INT_VALUE,
+        SOME_INT_VALUE
+    ]
+    assert calls == [1]
+
+    await storage.close()
+    await other_storage.close()
+
+
+async def test_scheduled_storage_refreshes(path):
+    value = 0
+
+    async def fn():
+        nonlocal value
+        value += 1
+
+        return value
+
+    storage = StrictAutoCachedSharedMemoryStorage(path=path, scheduled=True)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn)
+    await asyncio.sleep(0.08)
+
+    assert await storage.get(SOME_STR_KEY) == 2
+
+    await storage.close()
+
+
+async def test_scheduled_storage_retries_failed_refresh(path):
+    storage = StrictAutoCachedSharedMemoryStorage(path=path, scheduled=True)
+    storage._retry_delay = 0.2
+
+    calls = []
+
+    async def get_broken_value():
+        calls.append(1)
+
+        raise ValueError("broken")
+
+    await storage.set(SOME_STR_KEY, duration=0.5, fun=get_broken_value, value="broken_data")
+
+    await asyncio.sleep(0.6)
+
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.2)
+
+    assert len(calls) == 2
+
+    await storage.close()
+
+
+async def test_pop_overdue_waits_for_deadline(path):
+    segment = SharedSegment(path)
+    locks = []
+
+    def lock_exclusive():
+        locks.append(1)
+
+        SharedSegment._lock_exclusive(segment)
+
+    segment._lock_exclusive = lock_exclusive
+
+    now = time.monotonic()
+
+    segment.set(b"fresh", b"value", now, 10)
+    segment.set(b"overdue", b"value", now - 2, 1)
+
+    locks.clear()
+
+    assert segment.pop_overdue(now - 2) == []
+    assert not locks
+
+    assert segment.pop_overdue(now) == [b"overdue"]
+    assert segment.next_deadline() == now + 10
+
+    segment.close()
+
+
+async def test_refresh_appends_payload_once(path):
+    async def fn():
+        return SOME_STR_VALUE
+
+    storage = LazyAutoCachedSharedMemoryStorage(path=path)
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+
+    tail, *_ = storage._segment._read_header()
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert storage._segment._read_header()[0] == 2 * tail
+    assert not (await storage._get_data_from_storage(SOME_STR_KEY)).bloked
+
+    await storage.close()
+
+
+async def test_foreign_file(path):
+    with open(path, "wb") as file:
+        file.write(b"not a segment" * 10)
+
+    with pytest.raises(ValueError):
+        SharedSegment(path)
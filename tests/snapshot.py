@@ -0,0 +1,118 @@
+
+
+import os
+import asyncio
+
+import pytest
+
+from weller import Weller
+from weller.serializers import JsonSerializer
+from weller.dispather.storage import WellerMemoryStorage
+from weller.storage.memory import LazyCachedMemoryStorage, LazyAutoCachedMemoryStorage
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def test_snapshot_keeps_remaining_time(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    storage = LazyCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.3)
+    await storage.set(SOME_OTHER_KEY, SOME_STR_VALUE, duration=0.05)
+    await asyncio.sleep(0.1)
+    await storage.save_snapshot(path)
+
+    assert os.listdir(tmp_path) == ["cache.snapshot"]
+
+    restored = LazyCachedMemoryStorage()
+
+    assert await restored.load_snapshot(path) == 1
+    assert await restored.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    with pytest.raises(KeyError):
+        await restored.get(SOME_OTHER_KEY)
+
+    await asyncio.sleep(0.25)
+
+    with pytest.raises(KeyError):
+        await restored.get(SOME_STR_KEY)
+
+
+async def test_snapshot_serializer(tmp_path):
+    path = str(tmp_path / "cache.json")
+    storage = LazyCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, SOME_INT_VALUE, duration=10)
+    await storage.save_snapshot(path, serializer=JsonSerializer())
+
+    restored = LazyCachedMemoryStorage()
+
+    await restored.load_snapshot(path, serializer=JsonSerializer())
+
+    assert await restored.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_auto_storage_uses_restored_values(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    calls = []
+
+    async def fn(key: str):
+        calls.append(key)
+
+        return SOME_INT_VALUE
+
+    storage = LazyAutoCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=fn, value=SOME_STR_VALUE)
+    await storage.set(SOME_OTHER_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+    await asyncio.sleep(0.1)
+    await storage.save_snapshot(path)
+
+    restored = LazyAutoCachedMemoryStorage()
+
+    await restored.load_snapshot(path)
+    await restored.set(SOME_STR_KEY, duration=10, fun=fn)
+    await restored.set(SOME_OTHER_KEY, duration=10, fun=fn)
+
+    assert await restored.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await restored.get(SOME_OTHER_KEY) == SOME_INT_VALUE
+    assert calls == [SOME_OTHER_KEY]
+
+
+async def test_weller_starts_from_snapshot(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    calls = []
+
+    def make_weller() -> Weller:
+        weller = Weller(storage=WellerMemoryStorage())
+
+        @weller.add(SOME_STR_KEY, duration=10)
+        async def get_data():
+            calls.append(SOME_STR_KEY)
+
+            return len(calls)
+
+        return weller
+
+    weller = make_weller()
+
+    assert await weller.get(SOME_STR_KEY) == 1
+
+    await weller._storage.save_snapshot(path)
+    await weller.close()
+
+    weller = make_weller()
+
+    await weller._storage.load_snapshot(path)
+
+    assert await weller.get(SOME_STR_KEY) == 1
+    assert len(calls) == 1
+
+    await weller.close()
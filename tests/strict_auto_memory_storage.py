@@ -238,3 +238,85 @@ async def test_block_by_fun():
     print(result[0], result[1], result[2])
 
     return result[0] != result[1] and result[1] == result[2]
+
+
+async def test_scheduled_refresh_without_get():
+    storage = StrictAutoCachedMemoryStorage(scheduled=True)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.3)
+
+    assert storage._storage[SOME_STR_KEY].value == SOME_INT_VALUE
+
+    await storage.close()
+
+
+async def test_scheduled_get_does_not_touch_other_keys():
+    storage = StrictAutoCachedMemoryStorage(scheduled=True)
+
+    calls = []
+
+    def get_fn(key: str):
+        async def fn():
+            calls.append(key)
+
+            return key
+
+        return fn
+
+    for i in range(100):
+        await storage.set(str(i), duration=10, fun=get_fn(str(i)), value="broken_data")
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_fn(SOME_STR_KEY), value="broken_data")
+
+    await asyncio.sleep(0.15)
+
+    assert await storage.get("1") == "broken_data"
+    assert calls == [SOME_STR_KEY]
+
+    await storage.close()
+
+
+async def test_scheduled_wakes_on_nearer_deadline():
+    storage = StrictAutoCachedMemoryStorage(scheduled=True)
+
+    await storage.set(SOME_INT_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.3)
+
+    assert storage._storage[SOME_STR_KEY].value == SOME_INT_VALUE
+    assert storage._storage[SOME_INT_KEY].value == "broken_data"
+
+    await storage.close()
+
+
+async def test_scheduled_failed_refresh_is_retried_later():
+    storage = StrictAutoCachedMemoryStorage(scheduled=True)
+    storage._retry_delay = 0.2
+
+    calls = []
+
+    async def get_broken_value():
+        calls.append(1)
+
+        raise ValueError("broken")
+
+    await storage.set(SOME_STR_KEY, duration=0.5, fun=get_broken_value, value="broken_data")
+
+    await asyncio.sleep(0.6)
+
+    # The failed value isn't retried at once
+    assert len(calls) == 1
+
+    await asyncio.sleep(0.2)
+
+    assert len(calls) == 2
+
+    with pytest.raises(ValueError):
+        await storage.get(SOME_STR_KEY)
+
+    assert len(calls) == 3
+
+    await storage.close()
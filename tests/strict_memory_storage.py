@@ -142,3 +142,55 @@ async def test_second_get_override_data():
 
     except KeyError:
         assert True
+
+
+async def test_sweep_deletes_only_overdue():
+    storage = StrictCachedMemoryStorage()
+
+    for i in range(100):
+        await storage.set(i, i, 0.1 if i % 2 else 10)
+
+    time.sleep(0.15)
+
+    assert await storage.get(0) == 0
+
+    assert sorted(storage._storage) == list(range(0, 100, 2))
+
+
+async def test_replaced_value_is_not_swept():
+    storage = StrictCachedMemoryStorage()
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, 0.1)
+    await storage.set(SOME_STR_KEY, SOME_INT_VALUE, 10)
+
+    time.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_sweep_does_not_copy_values():
+    storage = StrictCachedMemoryStorage()
+
+    class_ = SomeDataclass(str_value=SOME_STR_VALUE, int_value=SOME_INT_VALUE)
+
+    await storage.set(SOME_STR_KEY, class_, 1)
+    await storage.set(SOME_INT_KEY, SOME_INT_VALUE, 0.1)
+
+    time.sleep(0.15)
+
+    assert await storage.get(SOME_STR_KEY) is class_
+
+
+async def test_get_many_sweeps_once():
+    storage = StrictCachedMemoryStorage()
+
+    await storage.set_many({SOME_STR_KEY: SOME_STR_VALUE, SOME_INT_KEY: SOME_INT_VALUE}, 1)
+    await storage.set("overdue_key", SOME_STR_VALUE, 0.1)
+
+    time.sleep(0.15)
+
+    assert await storage.get_many([SOME_STR_KEY, SOME_INT_KEY]) == {
+        SOME_STR_KEY: SOME_STR_VALUE,
+        SOME_INT_KEY: SOME_INT_VALUE
+    }
+    assert "overdue_key" not in storage._storage
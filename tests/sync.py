@@ -0,0 +1,150 @@
+
+
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weller import Weller
+from weller.metrics import MemoryMetrics
+from weller.dispather.storage import WellerMemoryStorage
+from weller.storage.memory import LazyCachedMemoryStorage, LazyAutoCachedMemoryStorage
+from weller.sync import SyncRunner, SyncStorage, SyncWeller
+
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+def test_many_threads():
+    storage = SyncStorage(LazyCachedMemoryStorage())
+
+    def work(i: int) -> int:
+        storage.set(i, i, duration=10)
+
+        return storage.get(i) + storage.get_many([i, SOME_OTHER_KEY]).get(i)
+
+    with ThreadPoolExecutor(16) as executor:
+        assert [*executor.map(work, range(200))] == [i * 2 for i in range(200)]
+
+    with pytest.raises(KeyError):
+        storage.get(SOME_OTHER_KEY)
+
+    storage.close()
+
+
+def test_sync_function_is_called_in_thread():
+    storage = SyncStorage(LazyAutoCachedMemoryStorage())
+    calls = []
+
+    def get_value() -> str:
+        calls.append(threading.current_thread().name)
+
+        time.sleep(0.05)
+
+        return SOME_STR_VALUE
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [
+            executor.submit(storage.set, SOME_STR_KEY, duration=0.1, fun=get_value)
+            for _ in range(8)
+        ]
+
+        for future in futures:
+            future.result()
+
+    assert storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert len(calls) == 1
+    assert calls[0].startswith("weller-loader")
+
+    time.sleep(0.15)
+
+    assert storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert len(calls) == 2
+
+    storage.close()
+
+
+def test_warm_hit_skips_loop():
+    metrics = MemoryMetrics()
+    storage = SyncStorage(LazyCachedMemoryStorage(max_entries=2, metrics=metrics))
+    runs = []
+
+    storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+    storage.set(SOME_OTHER_KEY, SOME_INT_VALUE, duration=10)
+
+    run = storage._runner.run
+
+    def run_in_loop(coroutine, timeout=None):
+        runs.append(coroutine)
+
+        return run(coroutine, timeout)
+
+    storage._runner.run = run_in_loop
+
+    assert storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert not runs
+
+    with pytest.raises(KeyError):
+        storage.get(SOME_INT_VALUE)
+
+    assert len(runs) == 1
+
+    # The loop has counted the hit and touched the value before the set, so the other one is evicted
+    storage.set(SOME_INT_VALUE, SOME_INT_VALUE, duration=10)
+
+    assert metrics.get_count("hits") == 1
+    assert storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    with pytest.raises(KeyError):
+        storage.get(SOME_OTHER_KEY)
+
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_with_async_api():
+    async_storage = LazyCachedMemoryStorage()
+    storage = SyncStorage(async_storage, runner=SyncRunner(loop=asyncio.get_running_loop()))
+
+    await async_storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    assert await asyncio.to_thread(storage.get, SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.to_thread(storage.set, SOME_OTHER_KEY, SOME_INT_VALUE, duration=10)
+
+    assert await async_storage.get(SOME_OTHER_KEY) == SOME_INT_VALUE
+
+    # The loop's thread can't wait for itself
+    with pytest.raises(RuntimeError):
+        storage.get(SOME_STR_KEY)
+
+
+def test_weller():
+    weller = SyncWeller(Weller(storage=WellerMemoryStorage()))
+    calls = []
+
+    @weller.weller.add(SOME_STR_KEY, duration=10)
+    def get_str():
+        return SOME_STR_VALUE
+
+    @weller.cached(duration=10)
+    def get_user(user_id: int) -> str:
+        calls.append(user_id)
+
+        return f"user:{user_id}"
+
+    assert weller.warmup().loaded == [SOME_STR_KEY]
+    assert weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    with ThreadPoolExecutor(8) as executor:
+        assert [*executor.map(get_user, [1] * 20)] == ["user:1"] * 20
+
+    assert calls == [1]
+
+    weller.close()
@@ -0,0 +1,173 @@
+
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from weller import Weller
+from weller.storage.memory import LazyCachedMemoryStorage, LazyAutoCachedMemoryStorage
+from weller.storage.redis import LazyCachedRedisStorage, StrictAutoCachedRedisStorage
+from weller.storage.tiered import (
+    LazyCachedTieredStorage,
+    StrictCachedTieredStorage,
+    LazyAutoCachedTieredStorage,
+    StrictAutoCachedTieredStorage
+)
+from weller.storage.tiered.redis_invalidation import RedisInvalidation
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def get_some_value_with_01_delay() -> int:
+    await asyncio.sleep(0.1)
+
+    return SOME_INT_VALUE
+
+
+async def test_set_and_get():
+    storage = LazyCachedTieredStorage(storage=LazyCachedMemoryStorage())
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_OTHER_KEY)
+
+    await asyncio.sleep(0.15)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
+
+
+async def test_first_tier_hit_skips_second_tier():
+    second_tier = LazyCachedRedisStorage(redis=fakeredis.FakeAsyncRedis())
+    storage = LazyCachedTieredStorage(storage=second_tier, ttl=10)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+    await second_tier._redis.flushall()
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await storage.get_many([SOME_STR_KEY, SOME_OTHER_KEY]) == {SOME_STR_KEY: SOME_STR_VALUE}
+
+
+async def test_first_tier_expires():
+    redis = fakeredis.FakeAsyncRedis()
+    storage = LazyCachedTieredStorage(storage=LazyCachedRedisStorage(redis=redis), ttl=0.05)
+    other = LazyCachedRedisStorage(redis=redis)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+    await other.set(SOME_STR_KEY, "other_value", duration=10)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == "other_value"
+
+
+async def test_first_tier_is_bounded():
+    storage = LazyCachedTieredStorage(storage=LazyCachedMemoryStorage(), max_entries=1)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+    await storage.set(SOME_OTHER_KEY, SOME_STR_VALUE, duration=10)
+
+    assert list(storage._first_tier) == [SOME_OTHER_KEY]
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+
+async def test_strict_delete_overdue():
+    second_tier = LazyCachedMemoryStorage()
+    storage = StrictCachedTieredStorage(storage=second_tier)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.05)
+
+    await asyncio.sleep(0.1)
+
+    with pytest.raises(KeyError):
+        await storage.get(SOME_STR_KEY)
+
+    assert not storage._first_tier
+
+
+async def test_lazy_auto_refresh_writes_both_tiers():
+    second_tier = LazyAutoCachedMemoryStorage()
+    storage = LazyAutoCachedTieredStorage(storage=second_tier, ttl=10)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+
+    assert await storage.get(SOME_STR_KEY) == "broken_data"
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+    assert (await second_tier._get_data_from_storage(SOME_STR_KEY)).value == SOME_INT_VALUE
+
+
+async def test_auto_reload_evicted_value():
+    redis = fakeredis.FakeAsyncRedis()
+    storage = LazyAutoCachedTieredStorage(
+        storage=StrictAutoCachedRedisStorage(redis=redis),
+        ttl=0.05
+    )
+
+    await storage.set(SOME_STR_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+    await redis.flushall()
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+
+async def test_invalidation():
+    server = fakeredis.FakeServer()
+    storages = []
+
+    for _ in range(2):
+        redis = fakeredis.FakeAsyncRedis(server=server)
+        storages.append(LazyCachedTieredStorage(
+            storage=LazyCachedRedisStorage(redis=redis),
+            ttl=10,
+            invalidation=RedisInvalidation(redis)
+        ))
+
+    first, second = storages
+
+    await first.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    assert await second.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await first.set(SOME_STR_KEY, "other_value", duration=10)
+    await asyncio.sleep(0.05)
+
+    assert await second.get(SOME_STR_KEY) == "other_value"
+    assert await first.get(SOME_STR_KEY) == "other_value"
+
+    for storage in storages:
+        await storage.close()
+
+
+async def test_weller():
+    storage = StrictAutoCachedTieredStorage(storage=StrictAutoCachedRedisStorage(redis=fakeredis.FakeAsyncRedis()))
+    weller = Weller(storage=storage)
+    calls = []
+
+    @weller.add(SOME_STR_KEY, duration=10)
+    async def get_str():
+        calls.append(1)
+
+        return SOME_STR_VALUE
+
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert await weller.get(SOME_STR_KEY) == SOME_STR_VALUE
+    assert len(calls) == 1
+
+    await storage.close()
@@ -0,0 +1,204 @@
+
+
+import gc
+import time
+import asyncio
+import weakref
+
+import pytest
+
+from weller.storage.memory import StrictCachedMemoryStorage, StrictAutoCachedMemoryStorage
+from weller.storage.service.timer_wheel import TimerWheel, get_timer_wheel
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_OTHER_KEY = "some_other_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+async def get_some_value_with_01_delay() -> int:
+    await asyncio.sleep(0.1)
+
+    return SOME_INT_VALUE
+
+
+async def test_fire_after_deadline():
+    wheel = TimerWheel(tick=0.005)
+    fired = []
+
+    def callback(name: str):
+        fired.append((name, time.monotonic()))
+
+    start = time.monotonic()
+
+    for delay in (0.05, 0.01, 0.03):
+        wheel.schedule(start + delay, callback, str(delay))
+
+    await asyncio.sleep(0.1)
+
+    assert [name for name, _ in fired] == ["0.01", "0.03", "0.05"]
+    assert all(fired_time >= start + float(name) for name, fired_time in fired)
+    assert len(wheel) == 0
+
+
+async def test_cancel():
+    wheel = TimerWheel(tick=0.005)
+    fired = []
+
+    timer = wheel.schedule(time.monotonic() + 0.02, fired.append, SOME_STR_KEY)
+    wheel.schedule(time.monotonic() + 0.02, fired.append, SOME_OTHER_KEY)
+
+    timer.cancel()
+    timer.cancel()
+
+    assert not timer.active
+    assert len(wheel) == 1
+
+    await asyncio.sleep(0.05)
+
+    assert fired == [SOME_OTHER_KEY]
+
+
+async def test_far_timers_move_to_lower_levels():
+    wheel = TimerWheel(tick=0.0001, levels=2)
+    fired = []
+    start = time.monotonic()
+
+    # Beyond the 64 ** 2 ticks of the wheel and within its levels
+    for delay in (0.5, 0.2, 0.003, 0.05):
+        wheel.schedule(start + delay, fired.append, delay)
+
+    await asyncio.sleep(0.6)
+
+    assert fired == [0.003, 0.05, 0.2, 0.5]
+
+
+async def test_higher_level_moves_before_farther_lower_timer():
+    wheel = TimerWheel(tick=0.01)
+    fired = []
+    start = time.monotonic()
+
+    wheel.schedule(start + 0.1, fired.append, 0.1)
+
+    await asyncio.sleep(0.15)
+
+    # The first one is in the level 0 beyond its next boundary, the second one is in the level 1 before it
+    wheel.schedule(start + 0.7, fired.append, 0.7)
+    wheel.schedule(start + 1.0, fired.append, 1.0)
+
+    await asyncio.sleep(1)
+
+    assert fired == [0.1, 0.7, 1.0]
+
+
+async def test_callback_error_does_not_stop_others():
+    wheel = TimerWheel(tick=0.005)
+    fired = []
+
+    def broken():
+        raise ValueError()
+
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: fired.append(context["exception"]))
+
+    wheel.schedule(time.monotonic() + 0.01, broken)
+    wheel.schedule(time.monotonic() + 0.01, fired.append, SOME_STR_KEY)
+
+    await asyncio.sleep(0.05)
+
+    assert SOME_STR_KEY in fired
+    assert any(isinstance(item, ValueError) for item in fired)
+
+
+async def test_loop_wide_wheel():
+    assert get_timer_wheel() is get_timer_wheel()
+
+
+async def test_loop_wide_wheel_does_not_keep_loop():
+    loops = []
+
+    async def schedule():
+        loops.append(weakref.ref(asyncio.get_running_loop()))
+
+        get_timer_wheel().schedule(time.monotonic() + 10, print)
+
+    await asyncio.to_thread(asyncio.run, schedule())
+
+    gc.collect()
+
+    assert loops[0]() is None
+
+
+async def test_strict_deletes_without_requests():
+    storage = StrictCachedMemoryStorage(timer_wheel=True)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.05)
+    await storage.set_many({SOME_OTHER_KEY: SOME_STR_VALUE}, duration=10)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.sleep(0.1)
+
+    assert SOME_STR_KEY not in storage._storage
+    assert await storage.get_many([SOME_STR_KEY, SOME_OTHER_KEY]) == {SOME_OTHER_KEY: SOME_STR_VALUE}
+
+    await storage.close()
+
+    assert not storage._timers
+
+
+async def test_strict_replaced_value_keeps_new_deadline():
+    storage = StrictCachedMemoryStorage(timer_wheel=True)
+
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=0.05)
+    await storage.set(SOME_STR_KEY, SOME_STR_VALUE, duration=10)
+
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+
+async def test_strict_auto_refresh_without_requests():
+    storage = StrictAutoCachedMemoryStorage(timer_wheel=True)
+
+    await storage.set(SOME_STR_KEY, duration=0.1, fun=get_some_value_with_01_delay, value="broken_data")
+    await storage.set(SOME_OTHER_KEY, duration=10, fun=get_some_value_with_01_delay, value="broken_data")
+
+    await asyncio.sleep(0.25)
+
+    assert storage._storage[SOME_STR_KEY].value == SOME_INT_VALUE
+    assert storage._storage[SOME_OTHER_KEY].value == "broken_data"
+    assert not storage._get_data_is_overdue(storage._storage[SOME_STR_KEY])
+
+    # The refreshed value is planned again
+    assert storage._timers[SOME_STR_KEY].active
+
+    await storage.close()
+
+
+async def test_strict_auto_failed_refresh_is_retried_later():
+    storage = StrictAutoCachedMemoryStorage(timer_wheel=True)
+    storage._retry_delay = 0.2
+
+    calls = []
+
+    async def get_broken_value():
+        calls.append(1)
+
+        raise ValueError("broken")
+
+    await storage.set(SOME_STR_KEY, duration=0.5, fun=get_broken_value, value="broken_data")
+
+    await asyncio.sleep(0.6)
+
+    assert len(calls) == 1
+    assert storage._timers[SOME_STR_KEY].active
+
+    await asyncio.sleep(0.2)
+
+    assert len(calls) == 2
+
+    await storage.close()
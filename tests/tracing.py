@@ -0,0 +1,109 @@
+
+
+import asyncio
+
+import pytest
+
+from weller import Weller
+from weller.tracing import AbstractLoadHook, LoadEvent
+from weller.dispather.storage import WellerMemoryStorage
+from weller.storage.memory import LazyAutoCachedMemoryStorage, StrictAutoCachedMemoryStorage
+
+
+pytestmark = pytest.mark.asyncio
+
+SOME_STR_KEY = "some_key"
+SOME_STR_VALUE = "some_value"
+
+SOME_INT_VALUE = 321
+
+
+class RecordingHook(AbstractLoadHook):
+    def __init__(self):
+        self.calls: list[tuple[str, LoadEvent]] = []
+
+    def before(self, event: LoadEvent):
+        event.context = len(self.calls)
+
+        self.calls.append(("before", event))
+
+    def after(self, event: LoadEvent):
+        self.calls.append(("after", event))
+
+    @property
+    def reasons(self) -> list[str]:
+        return [event.reason for name, event in self.calls if name == "after"]
+
+
+async def test_hooks_get_reasons():
+    hook = RecordingHook()
+    storage = LazyAutoCachedMemoryStorage(load_hooks=[hook])
+
+    async def fn():
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn)
+    await asyncio.sleep(0.1)
+    await storage.get(SOME_STR_KEY)
+    await storage.reload(SOME_STR_KEY)
+
+    assert hook.reasons == ["cold", "overdue", "manual"]
+
+    name, event = hook.calls[1]
+
+    assert name == "after"
+    assert event.key == SOME_STR_KEY
+    assert event.context == 0
+    assert event.duration >= 0
+    assert event.exception is None
+
+
+async def test_hooks_get_exception():
+    hook = RecordingHook()
+    storage = LazyAutoCachedMemoryStorage(load_hooks=[hook])
+    error = ValueError()
+
+    async def fn():
+        raise error
+
+    with pytest.raises(ValueError):
+        await storage.set(SOME_STR_KEY, duration=1, fun=fn)
+
+    assert [name for name, _ in hook.calls] == ["before", "after"]
+    assert hook.calls[1][1].exception is error
+
+
+async def test_hooks_get_background_reasons():
+    hook = RecordingHook()
+    storage = LazyAutoCachedMemoryStorage(load_hooks=[hook], stale_while_revalidate=10)
+    strict_storage = StrictAutoCachedMemoryStorage(load_hooks=[hook], scheduled=True)
+
+    async def fn():
+        return SOME_INT_VALUE
+
+    await storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+    await strict_storage.set(SOME_STR_KEY, duration=0.05, fun=fn, value=SOME_STR_VALUE)
+    await asyncio.sleep(0.1)
+
+    assert await storage.get(SOME_STR_KEY) == SOME_STR_VALUE
+
+    await asyncio.sleep(0.01)
+    await strict_storage.close()
+
+    assert set(hook.reasons) == {"background", "stale"}
+
+
+async def test_weller_refresh_ahead_reason():
+    hook = RecordingHook()
+    weller = Weller(storage=WellerMemoryStorage(load_hooks=[hook]), refresh_ahead=0.5, refresh_jitter=0)
+
+    @weller.add(SOME_STR_KEY, duration=0.1)
+    async def get_data():
+        return SOME_INT_VALUE
+
+    assert await weller.get(SOME_STR_KEY) == SOME_INT_VALUE
+
+    await asyncio.sleep(0.07)
+    await weller.close()
+
+    assert hook.reasons == ["cold", "refresh-ahead"]
@@ -1,12 +1,20 @@
 
 
 from fast_depends import Depends
+from . import lease
+from . import metrics
 from . import storage
+from . import sync
+from . import tracing
 from .dispather import Weller
 
 
 __all__ = (
     "Depends",
+    "lease",
+    "metrics",
     "storage",
+    "sync",
+    "tracing",
     "Weller",
 )
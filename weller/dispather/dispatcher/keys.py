@@ -0,0 +1,50 @@
+
+
+from typing import Any, Callable, Hashable
+
+
+def normalize_key(value: Any) -> Hashable:
+    """
+    Make a hashable equivalent of a value, so it can be a part of a key
+    :param value: Some argument
+    :return: The value itself if it is hashable else the tuple or frozenset of its items.
+    A container is tagged by its type, so e.g. a list and a tuple of the same items differ
+    """
+
+    name = type(value).__qualname__
+
+    if isinstance(value, dict):
+        return name, tuple(sorted(
+            ((normalize_key(key), normalize_key(item)) for key, item in value.items()),
+            key=repr
+        ))
+
+    if isinstance(value, (list, tuple)):
+        return name, tuple(normalize_key(item) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return name, frozenset(normalize_key(item) for item in value)
+
+    try:
+        hash(value)
+
+    except TypeError:
+        raise TypeError(
+            f"The argument of type {type(value).__name__} can't be a part of a key, use the key_builder"
+        ) from None
+
+    return value
+
+
+def build_key(func: Callable[..., Any], arguments: dict[str, Any]) -> Hashable:
+    """
+    Make a key from a function and its call arguments
+    :param func: The cached function
+    :param arguments: The arguments by their names
+    :return: The key, it is the same for the same arguments however they were passed
+    """
+
+    return (
+        f"{func.__module__}.{func.__qualname__}",
+        tuple(sorted((name, normalize_key(value)) for name, value in arguments.items()))
+    )
@@ -0,0 +1,59 @@
+
+
+import time
+import asyncio
+from typing import Any, Callable, Coroutine, Iterable, Optional
+
+from weller.types.weller_service_data import FunctionData
+from weller.types.warmup_report import WarmupResult, WarmupReport
+
+
+async def run_warmup(
+        functions: Iterable[FunctionData],
+        load: Callable[[FunctionData], Coroutine[Any, Any, Any]],
+        concurrency: int = 10,
+        timeout: Optional[float] = None
+) -> WarmupReport:
+    """
+    Load the values by a few workers, the higher priority first.
+    A failed or too long function doesn't stop the others
+    :param functions: The values' functions
+    :param load: Loads one value into the storage
+    :param concurrency: How many functions may be called at once
+    :param timeout: If specified, a load is cancelled after this time
+    :return: The report with each value's duration and exception
+    """
+
+    # The sort is stable, so the values with the same priority keep their registration order
+    queue = sorted(functions, key=lambda func: -func.priority)
+    results: list[Optional[WarmupResult]] = [None] * len(queue)
+    position = 0
+
+    async def worker():
+        nonlocal position
+
+        while position < len(queue):
+            index = position
+            position += 1
+
+            func = queue[index]
+            exception = None
+            start = time.perf_counter()
+
+            try:
+                if timeout is None:
+                    await load(func)
+
+                else:
+                    await asyncio.wait_for(load(func), timeout)
+
+            except Exception as e:
+                exception = e
+
+            results[index] = WarmupResult(func.key, time.perf_counter() - start, exception)
+
+    start = time.perf_counter()
+
+    await asyncio.gather(*[worker() for _ in range(min(max(concurrency, 1), len(queue)))])
+
+    return WarmupReport(results, time.perf_counter() - start)
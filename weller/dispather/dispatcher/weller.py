@@ -1,25 +1,78 @@
 
 
+import random
 import asyncio
-from typing import Callable, Any, Coroutine
+import inspect
+import functools
+from typing import Callable, Any, Hashable, Iterable, Optional
+
+from fast_depends.dependencies import Depends
 
 from weller.storage.service.abstract_auto_cached import AbstractStrictAutoCached
+from weller.storage.service.injection import bind_arguments, has_variadic_parameters
 from weller.types.weller_service_data import FunctionData
+from weller.types.warmup_report import WarmupReport
+from weller.dispather.dispatcher.keys import build_key
+from weller.dispather.dispatcher.warmup import run_warmup
 
 
 class Weller:
     def __init__(
             self,
             storage: AbstractStrictAutoCached,
-            first_long: bool = False
+            first_long: bool = False,
+            refresh_ahead: Optional[float] = None,
+            refresh_jitter: float = 0.1,
+            max_concurrent_refreshes: int = 10,
+            warmup_concurrency: int = 10,
+            warmup_timeout: Optional[float] = None
     ):
+        """
+        :param storage: The storage of the values
+        :param first_long: If true, the first get waits for all values
+        :param refresh_ahead: If specified, each value is reloaded in background
+        when this part of its duration has passed, e.g. 0.8
+        :param refresh_jitter: The random part of the duration added to or subtracted from the refresh time,
+        so the values with the same duration aren't reloaded together
+        :param max_concurrent_refreshes: How many functions may be called by the refresh-ahead at once
+        :param warmup_concurrency: How many functions may be called at once by the loading of all values
+        :param warmup_timeout: If specified, a function is cancelled after this time by the loading of all values,
+        its value is loaded again by the first get. A sync function ends in its thread, but its value isn't saved
+        """
+
         self._storage: AbstractStrictAutoCached = storage
-        self._functions: list[FunctionData] = []
+        self._functions: dict[str, FunctionData] = {}
         self._was_started: bool = False
         self._initialization_process: bool = False
         self._first_long: bool = first_long
 
-    def add(self, key: str, duration: int) -> Callable[..., Any]:
+        # Was started and isn't initializing, so the get reads the storage without any checks
+        self._ready: bool = False
+
+        self._refresh_ahead = refresh_ahead
+        self._refresh_jitter = refresh_jitter
+        self._max_concurrent_refreshes = max_concurrent_refreshes
+        self._refresh_semaphore: Optional[asyncio.Semaphore] = None
+        self._refresh_handles: dict[str, asyncio.TimerHandle] = {}
+        self._refresh_tasks: set[asyncio.Task] = set()
+
+        self._warmup_concurrency = warmup_concurrency
+        self._warmup_timeout = warmup_timeout
+
+        # The keys whose functions are being called, the concurrent callers wait for them
+        self._loading: dict[str, asyncio.Future] = {}
+        self._loaded: set[str] = set()
+
+    def add(self, key: str, duration: int, use_di: bool = True, priority: int = 0) -> Callable[..., Any]:
+        """
+        Register a function whose value is cached by the key
+        :param key: Value's index
+        :param duration: Value's cache time
+        :param use_di: If false, the function is called without the dependency injection
+        :param priority: The values with the higher priority are loaded first by the warmup
+        :return: The decorator
+        """
+
         def decorator(func) -> Callable[..., Any]:
             fun_data = {}
 
@@ -27,48 +80,297 @@ class Weller:
                 fun=func,
                 duration=duration,
                 key=key,
-                fun_data=fun_data
+                fun_data=fun_data,
+                use_di=use_di,
+                priority=priority
             )
 
-            self._functions.append(data)
+            self._functions[key] = data
 
             return func
 
         return decorator
 
-    async def _set_all_functions_to_storage(self, *except_key: str):
+    def cached(
+            self,
+            duration: float,
+            key_builder: Optional[Callable[..., Hashable]] = None,
+            use_di: bool = True
+    ) -> Callable[..., Any]:
+        """
+        Cache a function's result per each distinct call arguments
+        :param duration: Value's cache time
+        :param key_builder: Makes the storage key from the call arguments,
+        if not specified, the key is made from the function name and the normalized arguments
+        :param use_di: If false, the function is called without the dependency injection
+        :return: The decorator
+        """
+
+        def decorator(func) -> Callable[..., Any]:
+            signature = inspect.signature(func)
+
+            # The dependencies are not bound, they are resolved by the storage
+            defaults = {
+                name: parameter.default
+                for name, parameter in signature.parameters.items()
+                if parameter.default is not inspect.Parameter.empty and not isinstance(parameter.default, Depends)
+            }
+
+            fun = func
+
+            # The storage calls the functions by the keyword arguments,
+            # so the *args and the **kwargs are expanded from their names
+            if has_variadic_parameters(func):
+                # The dependency injection can't pass them
+                if use_di:
+                    raise TypeError(f"{func.__qualname__} takes the *args or the **kwargs, cache it with use_di=False")
+
+                fun = bind_arguments(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                # The calls with and without the default arguments share the key
+                arguments = {**defaults, **signature.bind_partial(*args, **kwargs).arguments}
+
+                if key_builder is None:
+                    key = build_key(func, arguments)
+
+                else:
+                    key = key_builder(*args, **kwargs)
+
+                try:
+                    return await self._storage.get(key)
+
+                except KeyError:
+                    pass
+
+                # The arguments may be named as the set's parameters
+                await self._storage.set(
+                    key=key,
+                    duration=duration,
+                    fun=fun,
+                    use_di=use_di,
+                    arguments=arguments
+                )
+
+                return await self._storage.get(key)
+
+            return wrapper
+
+        return decorator
+
+    def _update_ready(self):
+        self._ready = self._was_started and not self._initialization_process
+
+    async def _set_all_functions_to_storage(
+            self,
+            *except_key: str,
+            concurrency: Optional[int] = None,
+            timeout: Optional[float] = None
+    ) -> WarmupReport:
         self._initialization_process = True
+        self._update_ready()
+
+        # The values loaded by the gets before are skipped
+        except_keys = {*except_key, *self._loaded}
+
+        try:
+            return await run_warmup(
+                [func for func in self._functions.values() if func.key not in except_keys],
+                self._warm_up_function,
+                concurrency=self._warmup_concurrency if concurrency is None else concurrency,
+                timeout=self._warmup_timeout if timeout is None else timeout
+            )
+
+        finally:
+            self._initialization_process = False
+            self._update_ready()
+
+    async def _warm_up_function(self, func: FunctionData):
+        # The value may be loaded by a get while the warmup waits for a worker
+        if func.key in self._loaded:
+            return
+
+        # A timed out function is stopped, so it doesn't run beyond the concurrency
+        await self._set_function_to_storage(func, cancel_load=True)
+
+    async def warmup(self, concurrency: Optional[int] = None, timeout: Optional[float] = None) -> WarmupReport:
+        """
+        Load all values before the first get, e.g. at the application startup.
+        The failed values don't stop the others, they are loaded again by their first get
+        :param concurrency: How many functions may be called at once, warmup_concurrency by default
+        :param timeout: If specified, a function is cancelled after this time, warmup_timeout by default
+        :return: The report with each value's duration and exception
+        """
+
+        report = await self._set_all_functions_to_storage(concurrency=concurrency, timeout=timeout)
+
+        self._was_started = True
+        self._update_ready()
+
+        return report
+
+    async def _set_function_to_storage(self, func: FunctionData, cancel_load: bool = False):
+        """
+        Load the value or wait for its running load
+        :param func: The value's function data
+        :param cancel_load: If true, the cancellation of this call also stops the function,
+        otherwise the storage finishes the load without its caller
+        :return: nothing
+        """
+
+        while func.key in self._loading:
+            future = self._loading[func.key]
 
-        result: list[Coroutine[Any, Any, Any]] = []
+            try:
+                return await asyncio.shield(future)
 
-        for func in self._functions:
-            if func.key in except_key:
-                continue
+            # The loader was cancelled, e.g. by the warmup timeout, so this caller loads the value by itself
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
 
-            setter = self._storage.set(
+        future = asyncio.get_running_loop().create_future()
+        self._loading[func.key] = future
+
+        try:
+            await self._storage.set(
                 key=func.key,
                 duration=func.duration,
                 fun=func.fun,
+                use_di=func.use_di,
                 **func.fun_data
             )
 
-            result.append(setter)
+        except asyncio.CancelledError:
+            # Before the waiters are woken, so they don't join the cancelled load
+            if cancel_load:
+                await self._storage.cancel_load(func.key)
 
-        await asyncio.gather(*result)
+            future.cancel()
 
-        self._initialization_process = False
+            raise
 
-    def _get_function_by_key(self, key: str) -> FunctionData:
-        for func in self._functions:
-            if func.key == key:
-                return func
+        except BaseException as e:
+            future.set_exception(e)
+
+            # Nobody may wait for it
+            future.exception()
+
+            raise
+
+        else:
+            future.set_result(None)
+
+        finally:
+            del self._loading[func.key]
+
+        self._loaded.add(func.key)
+        self._schedule_refresh(func)
+
+    def _schedule_refresh(self, func: FunctionData):
+        """
+        Plan the reload of a value before it becomes overdue
+        :param func: The value's function data
+        :return: nothing
+        """
+
+        if self._refresh_ahead is None:
+            return
+
+        jitter = random.uniform(-self._refresh_jitter, self._refresh_jitter)
+        delay = min(max(self._refresh_ahead + jitter, 0), 1) * func.duration
+
+        handle = self._refresh_handles.pop(func.key, None)
+
+        if handle is not None:
+            handle.cancel()
+
+        self._refresh_handles[func.key] = asyncio.get_running_loop().call_later(
+            delay,
+            self._start_refresh,
+            func
+        )
+
+    def _start_refresh(self, func: FunctionData):
+        del self._refresh_handles[func.key]
+
+        task = asyncio.ensure_future(self._refresh(func))
+
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, func: FunctionData):
+        if self._refresh_semaphore is None:
+            self._refresh_semaphore = asyncio.Semaphore(self._max_concurrent_refreshes)
+
+        async with self._refresh_semaphore:
+            try:
+                await self._storage.reload(func.key, reason="refresh-ahead")
+
+            # The value will be refreshed by the next request if it becomes overdue
+            except Exception:
+                pass
 
-        raise KeyError
+        self._schedule_refresh(func)
+
+    async def close(self):
+        """
+        Stop the refresh-ahead of the values
+        :return: nothing
+        """
+
+        for handle in self._refresh_handles.values():
+            handle.cancel()
+
+        self._refresh_handles.clear()
+
+        for task in [*self._refresh_tasks]:
+            task.cancel()
+
+        await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+
+    def _get_function_by_key(self, key: str) -> FunctionData:
+        return self._functions[key]
 
     async def get(self, key: str) -> Any:
-        if self._was_started and not self._initialization_process:
-            return await self._storage.get(key)
+        if self._ready or key in self._loaded:
+            try:
+                return await self._storage.get(key)
+
+            # The value was evicted from a bounded storage
+            except KeyError:
+                return await self._load(key)
+
+        return await self._start(key)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        Get many values by one storage access
+        :param keys: Values' indexes
+        :return: The values by their keys
+        """
 
+        keys = [*keys]
+
+        if not self._ready:
+            values = await asyncio.gather(*[self.get(key) for key in keys])
+
+            return dict(zip(keys, values))
+
+        result = await self._storage.get_many(keys)
+
+        # The values were evicted from a bounded storage
+        missing = [key for key in keys if key not in result]
+
+        if missing:
+            values = await asyncio.gather(*[self._load(key) for key in missing])
+
+            result.update(zip(missing, values))
+
+        return {key: result[key] for key in keys}
+
+    async def _start(self, key: str) -> Any:
         if not self._initialization_process:
             if self._first_long:
                 await self._set_all_functions_to_storage(key)
@@ -76,15 +378,14 @@ class Weller:
             else:
                 asyncio.create_task(self._set_all_functions_to_storage(key))
 
+        return await self._load(key)
+
+    async def _load(self, key: str) -> Any:
         func = self._get_function_by_key(key)
 
-        await self._storage.set(
-            key=key,
-            duration=func.duration,
-            fun=func.fun,
-            **func.fun_data
-        )
+        await self._set_function_to_storage(func)
 
         self._was_started = True
+        self._update_ready()
 
         return await self._storage.get(key)
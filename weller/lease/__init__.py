@@ -0,0 +1,4 @@
+
+
+from .abstract import AbstractLease
+from .memory import MemoryLease
@@ -0,0 +1,29 @@
+
+
+from typing import Any, Optional
+from abc import ABC, abstractmethod
+
+
+class AbstractLease(ABC):
+    """
+    A lock with a TTL that is shared by the workers.
+    Only the owner of the lease refreshes the value, the others serve the old one
+    """
+
+    @abstractmethod
+    async def acquire(self, key: Any, ttl: float) -> Optional[str]:
+        """
+        Try to take the lease of the key
+        :param key: Value's index
+        :param ttl: The lease is released by itself after this time
+        :return: The token of the owner or None if somebody else has the lease
+        """
+
+    @abstractmethod
+    async def release(self, key: Any, token: str) -> bool:
+        """
+        Release the lease if it is still owned by the token
+        :param key: Value's index
+        :param token: The token from the acquire
+        :return: False if the lease has expired or was taken by somebody else
+        """
@@ -0,0 +1,38 @@
+
+
+import time
+import uuid
+from typing import Any, Optional
+
+from weller.lease.abstract import AbstractLease
+
+
+class MemoryLease(AbstractLease):
+    """
+    The lease of one process, the storages that share it refresh each value once
+    """
+
+    def __init__(self):
+        self._leases: dict[Any, tuple[str, float]] = {}
+
+    async def acquire(self, key: Any, ttl: float) -> Optional[str]:
+        now = time.monotonic()
+        lease = self._leases.get(key)
+
+        if lease is not None and lease[1] > now:
+            return None
+
+        token = uuid.uuid4().hex
+        self._leases[key] = (token, now + ttl)
+
+        return token
+
+    async def release(self, key: Any, token: str) -> bool:
+        lease = self._leases.get(key)
+
+        if lease is None or lease[0] != token:
+            return False
+
+        del self._leases[key]
+
+        return lease[1] > time.monotonic()
@@ -0,0 +1,63 @@
+
+
+import pickle
+import uuid
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+from weller.lease.abstract import AbstractLease
+
+
+class RedisLease(AbstractLease):
+    """
+    The lease that is shared by all workers of a redis
+    """
+
+    def __init__(self, redis: Redis, prefix: str = "weller"):
+        """
+        :param redis: A client
+        :param prefix: The namespace of the leases' redis keys
+        """
+
+        self._redis = redis
+        self._prefix = prefix.encode() + b":lease:"
+
+    def _get_redis_key(self, key: Any) -> bytes:
+        return self._prefix + pickle.dumps(key, protocol=4)
+
+    async def acquire(self, key: Any, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+
+        is_set = await self._redis.set(
+            self._get_redis_key(key),
+            token,
+            px=max(int(ttl * 1000), 1),
+            nx=True
+        )
+
+        return token if is_set else None
+
+    async def release(self, key: Any, token: str) -> bool:
+        redis_key = self._get_redis_key(key)
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(redis_key)
+
+                if await pipe.get(redis_key) != token.encode():
+                    await pipe.unwatch()
+
+                    return False
+
+                pipe.multi()
+                pipe.delete(redis_key)
+
+                await pipe.execute()
+
+            # The lease was expired and taken by somebody else after the check
+            except WatchError:
+                return False
+
+        return True
@@ -0,0 +1,5 @@
+
+
+from .abstract import AbstractMetrics
+from .memory import MemoryMetrics, Histogram
+from .prometheus import to_prometheus
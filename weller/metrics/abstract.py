@@ -0,0 +1,29 @@
+
+
+from typing import Any
+from abc import ABC, abstractmethod
+
+
+class AbstractMetrics(ABC):
+    """
+    Receives the events of the storages.
+    The counters: "hits", "misses", "overdue", "stale", "blocked", "evictions", "load_errors".
+    The durations: "load_seconds" of the values' functions
+    """
+
+    @abstractmethod
+    def increment(self, name: str, key: Any):
+        """
+        Count the event
+        :param name: The counter's name
+        :param key: Value's index
+        """
+
+    @abstractmethod
+    def observe(self, name: str, key: Any, seconds: float):
+        """
+        Record the duration
+        :param name: The histogram's name
+        :param key: Value's index
+        :param seconds: The duration
+        """
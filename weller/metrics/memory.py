@@ -0,0 +1,82 @@
+
+
+from bisect import bisect_left
+from typing import Any, Callable, Optional
+
+from weller.metrics.abstract import AbstractMetrics
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """
+        :param buckets: The sorted upper bounds
+        """
+
+        self.buckets = buckets
+        # The last one is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MemoryMetrics(AbstractMetrics):
+    """
+    The in-process collector of the counters and the histograms by the key groups
+    """
+
+    def __init__(
+            self,
+            key_group: Optional[Callable[[Any], str]] = None,
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """
+        :param key_group: Makes the group of the value's key, if not specified, each key is its own group.
+        The keys of the Weller.cached functions are better grouped, there are one per each arguments
+        :param buckets: The upper bounds of the histograms' buckets in seconds
+        """
+
+        self._key_group = str if key_group is None else key_group
+        self._buckets = tuple(sorted(buckets))
+
+        self.counters: dict[tuple[str, str], int] = {}
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+
+    def increment(self, name: str, key: Any):
+        index = (name, self._key_group(key))
+
+        self.counters[index] = self.counters.get(index, 0) + 1
+
+    def observe(self, name: str, key: Any, seconds: float):
+        index = (name, self._key_group(key))
+        histogram = self.histograms.get(index)
+
+        if histogram is None:
+            histogram = self.histograms[index] = Histogram(self._buckets)
+
+        histogram.observe(seconds)
+
+    def get_count(self, name: str, group: Optional[str] = None) -> int:
+        """
+        :param name: The counter's name
+        :param group: The key group, if not specified, the sum of all groups
+        :return: The count
+        """
+
+        if group is not None:
+            return self.counters.get((name, group), 0)
+
+        return sum(count for (counter, _), count in self.counters.items() if counter == name)
+
+    def clear(self):
+        self.counters.clear()
+        self.histograms.clear()
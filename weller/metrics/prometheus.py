@@ -0,0 +1,59 @@
+
+
+from weller.metrics.memory import MemoryMetrics
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def to_prometheus(metrics: MemoryMetrics, namespace: str = "weller") -> str:
+    """
+    Render the collected metrics in the Prometheus text format
+    :param metrics: The collector
+    :param namespace: The prefix of the metrics' names
+    :return: The text for the /metrics response
+    """
+
+    lines = []
+
+    counters: dict[str, list[tuple[str, int]]] = {}
+    histograms = {}
+
+    for (name, group), count in sorted(metrics.counters.items()):
+        counters.setdefault(name, []).append((group, count))
+
+    for (name, group), histogram in sorted(metrics.histograms.items()):
+        histograms.setdefault(name, []).append((group, histogram))
+
+    for name, rows in counters.items():
+        full_name = f"{namespace}_{name}_total"
+
+        lines.append(f"# TYPE {full_name} counter")
+
+        for group, count in rows:
+            lines.append(f'{full_name}{{group="{_escape(group)}"}} {count}')
+
+    for name, rows in histograms.items():
+        full_name = f"{namespace}_{name}"
+
+        lines.append(f"# TYPE {full_name} histogram")
+
+        for group, histogram in rows:
+            label = f'group="{_escape(group)}"'
+            cumulative = 0
+
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+
+                lines.append(f'{full_name}_bucket{{{label},le="{_format_float(bound)}"}} {cumulative}')
+
+            lines.append(f'{full_name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"{full_name}_sum{{{label}}} {_format_float(histogram.sum)}")
+            lines.append(f"{full_name}_count{{{label}}} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,7 @@
+
+
+from .abstract import AbstractSerializer
+from .pickle_serializer import PickleSerializer
+from .json_serializer import JsonSerializer
+from .compressed import CompressedSerializer
+from .entry import dump_entry, load_entry, read_header
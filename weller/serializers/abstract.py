@@ -0,0 +1,24 @@
+
+
+from typing import Any
+from abc import ABC, abstractmethod
+
+
+class AbstractSerializer(ABC):
+    """
+    Encodes the values for the storages that keep them out of the process
+    """
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """
+        :param value: Some value
+        :return: Its bytes
+        """
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Any:
+        """
+        :param payload: The bytes or a memoryview of them, the serializer shouldn't keep it
+        :return: The value
+        """
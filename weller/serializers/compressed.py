@@ -0,0 +1,74 @@
+
+
+import zlib
+from typing import Any
+
+from weller.serializers.abstract import AbstractSerializer
+
+
+RAW = 0
+ZLIB = 1
+LZ4 = 2
+
+
+class CompressedSerializer(AbstractSerializer):
+    """
+    Compresses the payloads of the other serializer that are bigger than the threshold.
+    The first byte of the payload tells how it is compressed
+    """
+
+    def __init__(
+            self,
+            serializer: AbstractSerializer,
+            compression: str = "zlib",
+            threshold: int = 1024,
+            level: int = -1
+    ):
+        """
+        :param serializer: Encodes the values
+        :param compression: "zlib" or "lz4", the lz4 needs: pip install weller[lz4]
+        :param threshold: The smaller payloads are not compressed
+        :param level: The compression level, the default of the compression if -1
+        """
+
+        if compression not in ("zlib", "lz4"):
+            raise ValueError(f"Unknown compression {compression!r}, expected 'zlib' or 'lz4'")
+
+        # It fails at once if the lz4 isn't installed
+        if compression == "lz4":
+            import lz4.frame
+
+        self._serializer = serializer
+        self._compression = ZLIB if compression == "zlib" else LZ4
+        self._threshold = threshold
+        self._level = level
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self._serializer.dumps(value)
+
+        if len(payload) < self._threshold:
+            return bytes((RAW,)) + payload
+
+        if self._compression == ZLIB:
+            return bytes((ZLIB,)) + zlib.compress(payload, self._level)
+
+        import lz4.frame
+
+        return bytes((LZ4,)) + lz4.frame.compress(payload, compression_level=max(self._level, 0))
+
+    def loads(self, payload: bytes) -> Any:
+        payload = memoryview(payload)
+        compression = payload[0]
+
+        if compression == RAW:
+            return self._serializer.loads(payload[1:])
+
+        if compression == ZLIB:
+            return self._serializer.loads(zlib.decompress(payload[1:]))
+
+        if compression == LZ4:
+            import lz4.frame
+
+            return self._serializer.loads(lz4.frame.decompress(payload[1:]))
+
+        raise ValueError(f"Unknown compression {compression}")
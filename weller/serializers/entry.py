@@ -0,0 +1,65 @@
+
+
+"""
+The entry's bytes: the fixed header and the value's payload.
+The header keeps the set time, the duration and the flags,
+so the expiry is checked without the value's deserialization
+"""
+
+import struct
+from typing import Any
+
+from weller.serializers.abstract import AbstractSerializer
+
+
+ENTRY_VERSION = 1
+BLOCKED = 1
+
+# Version, set time, duration, flags
+HEADER = struct.Struct("<BddB")
+
+
+def dump_entry(
+        serializer: AbstractSerializer,
+        value: Any,
+        set_time: float,
+        duration: float,
+        blocked: bool = False
+) -> bytes:
+    """
+    :param serializer: Encodes the value
+    :param set_time: The time of the set, the storage chooses the clock
+    :param blocked: True if the value is refreshed now
+    :return: The entry's bytes
+    """
+
+    return HEADER.pack(ENTRY_VERSION, set_time, duration, BLOCKED if blocked else 0) + serializer.dumps(value)
+
+
+def read_header(payload: bytes) -> tuple[float, float, bool]:
+    """
+    :param payload: The entry's bytes
+    :return: The set time, the duration and the blocked flag
+    """
+
+    version, set_time, duration, flags = HEADER.unpack_from(payload)
+
+    if version != ENTRY_VERSION:
+        raise ValueError(f"Unsupported entry version {version}")
+
+    return set_time, duration, bool(flags & BLOCKED)
+
+
+def load_entry(serializer: AbstractSerializer, payload: bytes) -> tuple[Any, float, float, bool]:
+    """
+    :param serializer: Decodes the value
+    :param payload: The entry's bytes
+    :return: The value, the set time, the duration and the blocked flag
+    """
+
+    set_time, duration, blocked = read_header(payload)
+
+    with memoryview(payload) as view:
+        value = serializer.loads(view[HEADER.size:])
+
+    return value, set_time, duration, blocked
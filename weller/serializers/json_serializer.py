@@ -0,0 +1,25 @@
+
+
+import json
+from typing import Any, Callable, Optional
+
+from weller.serializers.abstract import AbstractSerializer
+
+
+class JsonSerializer(AbstractSerializer):
+    """
+    The values are readable by the other languages, but only the json types are kept
+    """
+
+    def __init__(self, default: Optional[Callable[[Any], Any]] = None):
+        """
+        :param default: Converts the values that the json doesn't support
+        """
+
+        self._encoder = json.JSONEncoder(default=default, separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(self, value: Any) -> bytes:
+        return self._encoder.encode(value).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(bytes(payload))
@@ -0,0 +1,19 @@
+
+
+from typing import Any
+
+import msgpack
+
+from weller.serializers.abstract import AbstractSerializer
+
+
+class MsgpackSerializer(AbstractSerializer):
+    """
+    The compact binary json, it needs the msgpack: pip install weller[msgpack]
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
@@ -0,0 +1,17 @@
+
+
+import pickle
+from typing import Any
+
+from weller.serializers.abstract import AbstractSerializer
+
+
+class PickleSerializer(AbstractSerializer):
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL):
+        self._protocol = protocol
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=self._protocol)
+
+    def loads(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
@@ -1,29 +1,301 @@
 
 
-from typing import Any
+import sys
+import time
+import asyncio
+from typing import Any, Callable, Iterable, Optional, Union
 
+from weller.lease import AbstractLease
+from weller.metrics import AbstractMetrics
+from weller.tracing import AbstractLoadHook
+from weller.serializers import AbstractSerializer, PickleSerializer
 from weller.types.cache_data import CacheServiceData
+from weller.storage.memory.expiry import ExpiryIndex
+from weller.storage.memory.snapshot import SnapshotEntry, write_snapshot, read_snapshot
+from weller.storage.memory.eviction import AbstractEvictionPolicy, get_eviction_policy
 
 
 class BaseMemoryStorage:
-    def __init__(self):
+    def __init__(
+            self,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            eviction: Union[str, AbstractEvictionPolicy] = "lru",
+            sizeof: Optional[Callable[[Any], int]] = None,
+            metrics: Optional[AbstractMetrics] = None
+    ):
+        """
+        :param max_entries: If specified, the storage keeps no more values than this
+        :param max_bytes: If specified, the storage keeps no more bytes of the values than this
+        :param eviction: The policy that chooses evicted values: "lru", "lfu", "w-tinylfu" or an instance
+        :param sizeof: Measures a value for the max_bytes, the sys.getsizeof by default
+        :param metrics: Receives the hits, the misses, the evictions and the other events
+        """
+
+        self._metrics = metrics
         self._storage = dict()
+        self._expiry_index = ExpiryIndex()
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._eviction: Optional[AbstractEvictionPolicy] = None
+
+        if max_entries is not None or max_bytes is not None:
+            self._eviction = get_eviction_policy(eviction)
+
+        self._sizeof = sys.getsizeof if sizeof is None else sizeof
+        self._sizes: dict[Any, int] = {}
+        self._bytes = 0
+        self._evictions = 0
+
+    @property
+    def evictions(self) -> int:
+        """
+        The number of values deleted because the storage was overflowed
+        """
+
+        return self._evictions
 
     async def _del_data_from_storage(self, key: Any):
         del self._storage[key]
 
+        self._expiry_index.discard(key)
+
+        if self._eviction is not None:
+            self._eviction.remove(key)
+            self._bytes -= self._sizes.pop(key, 0)
+
     async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
+        data = self._storage[key]
+
+        if self._eviction is not None:
+            self._eviction.touch(key)
+
+        return data
+
+    async def _peek_data_from_storage(self, key: Any) -> CacheServiceData:
         return self._storage[key]
 
+    def _get_fresh_value(self, key: Any) -> Any:
+        # The dict's get is atomic, the value read after the expiry check may only be newer
+        data = self._storage.get(key)
+
+        if data is None or time.monotonic() > data.expire_time:
+            return ...
+
+        return data.value
+
+    def _count_fresh_hit(self, key: Any):
+        # The value may be deleted before the loop got to it
+        if self._eviction is not None and key in self._storage:
+            self._eviction.touch(key)
+
+        if self._metrics is not None:
+            self._metrics.increment("hits", key)
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        storage = self._storage
+        result = {key: storage[key] for key in keys if key in storage}
+
+        if self._eviction is not None:
+            for key in result:
+                self._eviction.touch(key)
+
+        return result
+
     async def _add_data_to_storage(self, key: Any, data: CacheServiceData):
+        is_new = key not in self._storage
+
         self._storage[key] = data
 
+        self._expiry_index.push(key, data.expire_time)
+
+        if self._eviction is not None:
+            self._admit(key, data, is_new)
+
+    def _admit(self, key: Any, data: CacheServiceData, is_new: bool):
+        if is_new:
+            self._eviction.add(key)
+
+        else:
+            self._eviction.touch(key)
+
+        if self._max_bytes is not None:
+            size = self._sizeof(data.value)
+
+            self._bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+
+        while self._is_overflowed():
+            self._evict(self._eviction.pop_victim())
+
+    def _is_overflowed(self) -> bool:
+        if self._max_entries is not None and len(self._storage) > self._max_entries:
+            return True
+
+        return self._max_bytes is not None and self._bytes > self._max_bytes
+
+    def _evict(self, key: Any):
+        del self._storage[key]
+
+        self._expiry_index.discard(key)
+        self._bytes -= self._sizes.pop(key, 0)
+        self._evictions += 1
+
+        if self._metrics is not None:
+            self._metrics.increment("evictions", key)
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        return self._expiry_index.pop_overdue(time.monotonic())
+
+    async def _get_next_deadline(self) -> Optional[float]:
+        return self._expiry_index.next_deadline()
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        self._expiry_index.push_if_due(key, deadline, time.monotonic())
+
+    async def save_snapshot(self, path: str, serializer: Optional[AbstractSerializer] = None):
+        """
+        Write the values that are not overdue and their remaining time to the file atomically
+        :param path: The snapshot's file
+        :param serializer: Encodes the snapshot, the PickleSerializer by default
+        :return: nothing
+        """
+
+        entries = await self._get_snapshot_entries()
+
+        # The values are taken now, the serialization and the disk don't block the loop
+        serializer = PickleSerializer() if serializer is None else serializer
+
+        await asyncio.get_running_loop().run_in_executor(None, write_snapshot, path, entries, serializer)
+
+    async def _get_snapshot_entries(self) -> list[SnapshotEntry]:
+        now = time.monotonic()
+
+        return [
+            SnapshotEntry(key=key, value=data.value, age=now - data.set_time, duration=data.duration)
+            for key, data in self._storage.items()
+            if data.expire_time >= now
+        ]
+
+    async def load_snapshot(self, path: str, serializer: Optional[AbstractSerializer] = None) -> int:
+        """
+        Restore the values from the file, the overdue ones are skipped
+        :param path: The snapshot's file
+        :param serializer: The same serializer that wrote it
+        :return: The number of the restored values
+        """
+
+        serializer = PickleSerializer() if serializer is None else serializer
+        elapsed, entries = await asyncio.get_running_loop().run_in_executor(None, read_snapshot, path, serializer)
+        now = time.monotonic()
+        restored = 0
+
+        for entry in entries:
+            set_time = entry.get_set_time(elapsed)
+
+            if set_time + entry.duration < now:
+                continue
+
+            await self._restore_entry(entry, set_time)
+
+            restored += 1
+
+        return restored
+
+    async def _restore_entry(self, entry: SnapshotEntry, set_time: float):
+        data = CacheServiceData(value=entry.value, duration=entry.duration, set_time=set_time)
+
+        await self._add_data_to_storage(key=entry.key, data=data)
+
+        if self._timer_wheel:
+            self._schedule_deadline(entry.key, data.expire_time)
+
 
 class BaseAutoMemoryStorage(BaseMemoryStorage):
-    def __init__(self, **kwargs):
-        super().__init__()
+    def __init__(
+            self,
+            lease: Optional[AbstractLease] = None,
+            lease_ttl: float = 30,
+            stale_while_revalidate: Optional[float] = None,
+            max_stale: Optional[float] = None,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            eviction: Union[str, AbstractEvictionPolicy] = "lru",
+            sizeof: Optional[Callable[[Any], int]] = None,
+            metrics: Optional[AbstractMetrics] = None,
+            load_hooks: Iterable[AbstractLoadHook] = (),
+            **kwargs
+    ):
+        """
+        :param lease: The lease that is acquired before a refresh
+        :param lease_ttl: The lease is released by itself after this time
+        :param stale_while_revalidate: Within this time after the expiry,
+        the old value is returned at once and refreshed in background
+        :param max_stale: The value overdue longer than this is never returned, the callers wait for its refresh
+        :param max_entries: If specified, the storage keeps no more values than this
+        :param max_bytes: If specified, the storage keeps no more bytes of the values than this
+        :param eviction: The policy that chooses evicted values: "lru", "lfu", "w-tinylfu" or an instance
+        :param sizeof: Measures a value for the max_bytes, the sys.getsizeof by default
+        :param metrics: Receives the hits, the misses, the evictions, the functions' durations and the other events
+        :param load_hooks: They wrap each call of the functions, e.g. by a tracing span
+        :param kwargs: The default arguments of the functions
+        """
+
+        super().__init__(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            eviction=eviction,
+            sizeof=sizeof,
+            metrics=metrics
+        )
 
         self._arguments = kwargs
+        self._lease = lease
+        self._lease_ttl = lease_ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._max_stale = max_stale
+        self._load_hooks = tuple(load_hooks)
+
+        # The snapshot has no functions, so the restored values wait for the set of their keys
+        self._restored: dict[Any, tuple[SnapshotEntry, float]] = {}
 
     def _get_default_arguments(self) -> dict[str, Any]:
         return self._arguments
+
+    async def _restore_entry(self, entry: SnapshotEntry, set_time: float):
+        self._restored[entry.key] = (entry, set_time)
+
+    async def set(
+            self,
+            key: Any,
+            duration: float,
+            fun: Callable[..., Any],
+            value: Any = ...,
+            use_di: bool = True,
+            arguments: Optional[dict[str, Any]] = None,
+            **kwargs
+    ):
+        restored = self._restored.pop(key, None)
+
+        if value is not Ellipsis or restored is None or restored[1] + duration < time.monotonic():
+            return await super().set(key=key, duration=duration, fun=fun, value=value, use_di=use_di, arguments=arguments, **kwargs)
+
+        entry, set_time = restored
+
+        # The function isn't called, the value keeps its age from the snapshot
+        await super().set(key=key, duration=duration, fun=fun, value=entry.value, use_di=use_di, arguments=arguments, **kwargs)
+
+        try:
+            data = await self._peek_data_from_storage(key)
+
+        # The bounded storage may not admit it
+        except KeyError:
+            return
+
+        data.renew(entry.value, set_time)
+
+        await self._add_data_to_storage(key=key, data=data)
+
+        if self._timer_wheel:
+            self._schedule_deadline(key, data.expire_time)
@@ -0,0 +1,257 @@
+
+
+from typing import Any, Union
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class AbstractEvictionPolicy(ABC):
+    """
+    Chooses the keys that are deleted when a storage is overflowed.
+    Each method should be O(1)
+    """
+
+    @abstractmethod
+    def add(self, key: Any):
+        """
+        A new key was added to the storage
+        """
+
+    @abstractmethod
+    def touch(self, key: Any):
+        """
+        A key was read or replaced
+        """
+
+    @abstractmethod
+    def remove(self, key: Any):
+        """
+        A key was deleted from the storage
+        """
+
+    @abstractmethod
+    def pop_victim(self) -> Any:
+        """
+        Choose a key to evict, it is no longer tracked by the policy
+        :return: The key, it may be the key that was just added
+        """
+
+
+class LRUPolicy(AbstractEvictionPolicy):
+    """
+    Evicts the least recently used key
+    """
+
+    def __init__(self):
+        self._keys: OrderedDict[Any, None] = OrderedDict()
+
+    def add(self, key: Any):
+        self._keys[key] = None
+
+    def touch(self, key: Any):
+        self._keys.move_to_end(key)
+
+    def remove(self, key: Any):
+        del self._keys[key]
+
+    def pop_victim(self) -> Any:
+        return self._keys.popitem(last=False)[0]
+
+
+class LFUPolicy(AbstractEvictionPolicy):
+    """
+    Evicts the least frequently used key, the least recently used one of them
+    """
+
+    def __init__(self):
+        self._frequencies: dict[Any, int] = {}
+
+        # The dicts keep the order of the keys with the same frequency
+        self._buckets: dict[int, dict[Any, None]] = {}
+        self._min_frequency = 0
+
+    def _unlink(self, key: Any, frequency: int):
+        bucket = self._buckets[frequency]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[frequency]
+
+    def add(self, key: Any):
+        self._frequencies[key] = 1
+        self._buckets.setdefault(1, {})[key] = None
+        self._min_frequency = 1
+
+    def touch(self, key: Any):
+        frequency = self._frequencies[key]
+
+        self._unlink(key, frequency)
+
+        if self._min_frequency == frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+
+        self._frequencies[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, {})[key] = None
+
+    def remove(self, key: Any):
+        self._unlink(key, self._frequencies.pop(key))
+
+    def pop_victim(self) -> Any:
+        # The minimum is lost only by the remove, which is rare for the overflowed storage
+        if self._min_frequency not in self._buckets:
+            self._min_frequency = min(self._buckets)
+
+        key = next(iter(self._buckets[self._min_frequency]))
+
+        self.remove(key)
+
+        return key
+
+
+class FrequencySketch:
+    """
+    A count-min sketch with 4-bit counters, which are halved periodically,
+    so the old popularity is forgotten
+    """
+
+    __slots__ = ("_rows", "_mask", "_additions", "_sample_size")
+
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MAX_COUNT = 15
+    HALVE_TABLE = bytes(i >> 1 for i in range(256))
+
+    def __init__(self, width: int):
+        width = 1 << max(4, (width - 1).bit_length())
+
+        self._rows = [bytearray(width) for _ in self.SEEDS]
+        self._mask = width - 1
+        self._additions = 0
+        self._sample_size = width * 10
+
+    def _indexes(self, key: Any) -> list[int]:
+        hashed = hash(key) & 0xFFFFFFFFFFFFFFFF
+        mask = self._mask
+
+        return [(((hashed * seed) & 0xFFFFFFFFFFFFFFFF) >> 32) & mask for seed in self.SEEDS]
+
+    def increment(self, key: Any):
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+
+        self._additions += 1
+
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def frequency(self, key: Any) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _reset(self):
+        for row in self._rows:
+            row[:] = row.translate(self.HALVE_TABLE)
+
+        self._additions //= 2
+
+
+class WTinyLFUPolicy(AbstractEvictionPolicy):
+    """
+    The new keys are put in a small LRU window. A key leaving the window
+    is admitted to the main segmented LRU only if it is used more frequently
+    than the main's victim, so one scan can't wash out the popular keys
+    """
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, sketch_width: int = 1 << 16):
+        """
+        :param sketch_width: The counters per a sketch row, about the expected number of keys
+        """
+
+        self._window: OrderedDict[Any, None] = OrderedDict()
+        self._probation: OrderedDict[Any, None] = OrderedDict()
+        self._protected: OrderedDict[Any, None] = OrderedDict()
+        self._sketch = FrequencySketch(sketch_width)
+
+    def add(self, key: Any):
+        self._sketch.increment(key)
+        self._window[key] = None
+
+    def touch(self, key: Any):
+        self._sketch.increment(key)
+
+        if key in self._window:
+            self._window.move_to_end(key)
+
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+
+            protected_limit = max(1, int((len(self._probation) + len(self._protected)) * self.PROTECTED_RATIO))
+
+            if len(self._protected) > protected_limit:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+        else:
+            self._protected.move_to_end(key)
+
+    def remove(self, key: Any):
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+
+                return
+
+        raise KeyError(key)
+
+    def _pop_main_victim(self) -> Any:
+        segment = self._probation if self._probation else self._protected
+
+        return segment.popitem(last=False)[0]
+
+    def pop_victim(self) -> Any:
+        window = self._window
+        window_limit = max(1, int((len(window) + len(self._probation) + len(self._protected)) * self.WINDOW_RATIO))
+
+        # The window grows while the storage isn't full, only its last key competes for the main
+        while len(window) > window_limit + 1:
+            self._probation[window.popitem(last=False)[0]] = None
+
+        if not self._probation and not self._protected:
+            return window.popitem(last=False)[0]
+
+        if len(window) <= window_limit:
+            return self._pop_main_victim()
+
+        candidate, _ = window.popitem(last=False)
+
+        segment = self._probation if self._probation else self._protected
+        victim = next(iter(segment))
+
+        if self._sketch.frequency(candidate) <= self._sketch.frequency(victim):
+            return candidate
+
+        del segment[victim]
+        self._probation[candidate] = None
+
+        return victim
+
+
+POLICIES = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "w-tinylfu": WTinyLFUPolicy,
+}
+
+
+def get_eviction_policy(policy: Union[str, AbstractEvictionPolicy]) -> AbstractEvictionPolicy:
+    if isinstance(policy, AbstractEvictionPolicy):
+        return policy
+
+    try:
+        return POLICIES[policy]()
+
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy {policy!r}, expected one of {[*POLICIES]}") from None
@@ -0,0 +1,108 @@
+
+
+import heapq
+import itertools
+from typing import Any, Optional
+
+
+class ExpiryIndex:
+    """
+    A min-heap of the storage's entries keyed on their expire time.
+    Replaced or deleted entries are not searched in the heap,
+    they are skipped when popped and dropped by a compaction
+    """
+
+    __slots__ = ("_heap", "_deadlines", "_counter")
+
+    # The heap is rebuilt when it is this times bigger than the live entries
+    COMPACT_RATIO = 2
+    COMPACT_MIN_SIZE = 64
+
+    def __init__(self):
+        self._heap: list[tuple[Any, int, Any]] = []
+        self._deadlines: dict[Any, Any] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def push(self, key: Any, deadline: Any):
+        """
+        Add or replace the deadline of a key
+        :param key: Value's index
+        :param deadline: The time when a value become overdue
+        :return: nothing
+        """
+
+        self._deadlines[key] = deadline
+
+        # The counter keeps the keys of the different types out of comparison
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+
+        if len(self._heap) > self.COMPACT_MIN_SIZE + len(self._deadlines) * self.COMPACT_RATIO:
+            self._compact()
+
+    def push_if_due(self, key: Any, deadline: Any, now: Any):
+        """
+        Add the deadline of a key unless its current deadline is not reached yet
+        :param key: Value's index
+        :param deadline: The time when a value should be checked again
+        :param now: The current time
+        :return: nothing
+        """
+
+        current = self._deadlines.get(key, ...)
+
+        if current is Ellipsis or current < now:
+            self.push(key, deadline)
+
+    def discard(self, key: Any):
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self) -> Optional[Any]:
+        """
+        Get the nearest deadline of the live entries
+        :return: The deadline or None if the index is empty
+        """
+
+        heap = self._heap
+
+        while heap:
+            deadline, _, key = heap[0]
+
+            if self._deadlines.get(key, ...) == deadline:
+                return deadline
+
+            heapq.heappop(heap)
+
+        return None
+
+    def pop_overdue(self, now: Any) -> list[Any]:
+        """
+        Pop all keys whose deadline has passed
+        :param now: The current time
+        :return: The overdue keys, they are no longer in the index
+        """
+
+        heap = self._heap
+        deadlines = self._deadlines
+        result = []
+
+        while heap and heap[0][0] < now:
+            deadline, _, key = heapq.heappop(heap)
+
+            # The entry was replaced or deleted after the push
+            if deadlines.get(key, ...) != deadline:
+                continue
+
+            del deadlines[key]
+            result.append(key)
+
+        return result
+
+    def _compact(self):
+        counter = self._counter
+
+        self._heap = [(deadline, next(counter), key) for key, deadline in self._deadlines.items()]
+
+        heapq.heapify(self._heap)
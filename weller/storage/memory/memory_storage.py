@@ -18,6 +18,17 @@ class LazyCachedMemoryStorage(BaseMemoryStorage, AbstractLazyCached):
 
 
 class StrictCachedMemoryStorage(BaseMemoryStorage, AbstractStrictCached):
+    def __init__(self, timer_wheel: bool = False, **kwargs):
+        """
+        :param timer_wheel: Delete the overdue values by the event loop's timer wheel
+        instead of the sweep per each request
+        :param kwargs: The storage settings
+        """
+
+        super().__init__(**kwargs)
+
+        self._timer_wheel = timer_wheel
+
     async def _get_all_data(self) -> dict[Any, CacheServiceData]:
         return self._storage
 
@@ -27,5 +38,17 @@ class LazyAutoCachedMemoryStorage(BaseAutoMemoryStorage, AbstractLazyAutoCached)
 
 
 class StrictAutoCachedMemoryStorage(BaseAutoMemoryStorage, AbstractStrictAutoCached):
+    def __init__(self, scheduled: bool = False, timer_wheel: bool = False, **kwargs):
+        """
+        :param scheduled: Refresh the overdue values by one background task
+        :param timer_wheel: Refresh the overdue values by the event loop's timer wheel, shared by all storages
+        :param kwargs: The default arguments of the functions
+        """
+
+        super().__init__(**kwargs)
+
+        self._scheduled = scheduled
+        self._timer_wheel = timer_wheel
+
     async def _get_all_keys(self) -> Iterable[Any]:
         return self._storage.keys()
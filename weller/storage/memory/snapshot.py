@@ -0,0 +1,85 @@
+
+
+"""
+The file of the memory storage's values.
+It keeps the age of each value and the wall time of the snapshot,
+so the restored values expire when they would expire without the restart
+"""
+
+import os
+import time
+import tempfile
+from typing import Any, Iterable
+
+from weller.serializers import AbstractSerializer
+
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotEntry:
+    __slots__ = ("key", "value", "age", "duration")
+
+    def __init__(self, key: Any, value: Any, age: float, duration: float):
+        self.key = key
+        self.value = value
+        self.age = age
+        self.duration = duration
+
+    def get_set_time(self, elapsed: float) -> float:
+        """
+        :param elapsed: The wall seconds since the snapshot
+        :return: The monotonic time of the value's set in this process
+        """
+
+        return time.monotonic() - self.age - elapsed
+
+
+def write_snapshot(path: str, entries: Iterable[SnapshotEntry], serializer: AbstractSerializer):
+    """
+    Write the entries atomically: to a temporary file that replaces the old one
+    :param path: The snapshot's file
+    :param entries: The values with their ages
+    :param serializer: Encodes the entries
+    :return: nothing
+    """
+
+    payload = serializer.dumps((
+        SNAPSHOT_VERSION,
+        time.time(),
+        [(entry.key, entry.value, entry.age, entry.duration) for entry in entries]
+    ))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".weller-snapshot-")
+
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.unlink(temporary_path)
+
+        raise
+
+
+def read_snapshot(path: str, serializer: AbstractSerializer) -> tuple[float, list[SnapshotEntry]]:
+    """
+    :param path: The snapshot's file
+    :param serializer: The same serializer that wrote it
+    :return: The wall seconds since the snapshot and its entries
+    """
+
+    with open(path, "rb") as file:
+        version, wall_time, rows = serializer.loads(file.read())
+
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    elapsed = max(time.time() - wall_time, 0)
+
+    return elapsed, [SnapshotEntry(*row) for row in rows]
@@ -0,0 +1,8 @@
+
+
+from .redis_storage import (
+    LazyCachedRedisStorage,
+    StrictCachedRedisStorage,
+    LazyAutoCachedRedisStorage,
+    StrictAutoCachedRedisStorage
+)
@@ -0,0 +1,281 @@
+
+
+import time
+import pickle
+from typing import Any, Iterable, Optional
+
+from redis.asyncio import Redis
+
+from weller.lease import AbstractLease
+from weller.metrics import AbstractMetrics
+from weller.tracing import AbstractLoadHook
+from weller.serializers import AbstractSerializer, PickleSerializer, dump_entry, load_entry, read_header
+from weller.types.cache_data import CacheServiceData, CallableCacheServiceData
+from weller.storage.service.shared import BaseAutoSharedStorage, ValueMissing
+
+
+class BaseRedisStorage:
+    # If true, the keys are kept in a sorted set by their expire time
+    _indexed: bool = False
+
+    def __init__(
+            self,
+            redis: Optional[Redis] = None,
+            url: str = "redis://localhost:6379/0",
+            prefix: str = "weller",
+            serializer: Optional[AbstractSerializer] = None,
+            metrics: Optional[AbstractMetrics] = None
+    ):
+        """
+        :param redis: A client, if not specified, it is created from the url with a connection pool
+        :param url: The redis url
+        :param prefix: The namespace of the storage's redis keys
+        :param serializer: Encodes the values, the PickleSerializer by default
+        :param metrics: Receives the hits, the misses and the other events
+        """
+
+        self._metrics = metrics
+        self._serializer = PickleSerializer() if serializer is None else serializer
+        self._own_redis = redis is None
+        self._redis: Redis = Redis.from_url(url) if redis is None else redis
+        self._prefix = prefix.encode()
+        self._index_key = self._prefix + b":index"
+
+    @staticmethod
+    def _encode_key(key: Any) -> bytes:
+        return pickle.dumps(key, protocol=4)
+
+    @staticmethod
+    def _decode_key(member: bytes) -> Any:
+        return pickle.loads(member)
+
+    def _get_redis_key(self, member: bytes) -> bytes:
+        return self._prefix + b":value:" + member
+
+    def _get_ttl(self, data: CacheServiceData) -> float:
+        return data.duration
+
+    # The entries keep the monotonic time of a process, the redis keeps the wall time for all of them
+    @staticmethod
+    def _to_wall_time(monotonic_time: float) -> float:
+        return time.time() - (time.monotonic() - monotonic_time)
+
+    @staticmethod
+    def _to_monotonic_time(wall_time: float) -> float:
+        return time.monotonic() - (time.time() - wall_time)
+
+    def _is_blocked(self, data: CacheServiceData) -> bool:
+        return False
+
+    def _make_data(self, key: Any, value: Any, set_time: float, duration: float, blocked: bool) -> CacheServiceData:
+        return CacheServiceData(value=value, set_time=set_time, duration=duration)
+
+    def _dumps(self, data: CacheServiceData) -> bytes:
+        return dump_entry(
+            self._serializer,
+            data.value,
+            self._to_wall_time(data.set_time),
+            data.duration,
+            self._is_blocked(data)
+        )
+
+    def _loads(self, key: Any, payload: bytes) -> CacheServiceData:
+        value, set_time, duration, blocked = load_entry(self._serializer, payload)
+
+        return self._make_data(key, value, self._to_monotonic_time(set_time), duration, blocked)
+
+    async def _add_data_to_storage(self, key: Any, data: CacheServiceData):
+        member = self._encode_key(key)
+        ttl = max(int(self._get_ttl(data) * 1000), 1)
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(self._get_redis_key(member), self._dumps(data), px=ttl)
+
+        if self._indexed:
+            pipe.zadd(self._index_key, {member: self._to_wall_time(data.expire_time)})
+
+        await pipe.execute()
+
+    async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
+        payload = await self._redis.get(self._get_redis_key(self._encode_key(key)))
+
+        if payload is None:
+            raise ValueMissing(key)
+
+        return self._loads(key, payload)
+
+    async def _add_many_data_to_storage(self, datum: dict[Any, CacheServiceData]):
+        if not datum:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        index = {}
+
+        for key, data in datum.items():
+            member = self._encode_key(key)
+            ttl = max(int(self._get_ttl(data) * 1000), 1)
+
+            pipe.set(self._get_redis_key(member), self._dumps(data), px=ttl)
+            index[member] = self._to_wall_time(data.expire_time)
+
+        if self._indexed:
+            pipe.zadd(self._index_key, index)
+
+        await pipe.execute()
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        if not keys:
+            return {}
+
+        payloads = await self._redis.mget([self._get_redis_key(self._encode_key(key)) for key in keys])
+
+        return {
+            key: self._loads(key, payload)
+            for key, payload in zip(keys, payloads)
+            if payload is not None
+        }
+
+    async def _del_data_from_storage(self, key: Any):
+        await self._del_members([self._encode_key(key)])
+
+    async def _del_members(self, members: list[bytes]):
+        if not members:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.delete(*[self._get_redis_key(member) for member in members])
+
+        if self._indexed:
+            pipe.zrem(self._index_key, *members)
+
+        await pipe.execute()
+
+    async def _pop_overdue_members(self) -> list[bytes]:
+        members = await self._redis.zrangebyscore(
+            self._index_key,
+            "-inf",
+            f"({time.time()}"
+        )
+
+        if not members:
+            return []
+
+        pipe = self._redis.pipeline(transaction=False)
+
+        for member in members:
+            pipe.zrem(self._index_key, member)
+
+        removed = await pipe.execute()
+
+        # Each overdue key is given only to the one process that removed it
+        return [member for member, is_removed in zip(members, removed) if is_removed]
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        return [self._decode_key(member) for member in await self._pop_overdue_members()]
+
+    async def _get_next_deadline(self) -> Optional[float]:
+        result = await self._redis.zrange(self._index_key, 0, 0, withscores=True)
+
+        if not result:
+            return None
+
+        return self._to_monotonic_time(result[0][1])
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        if self._indexed:
+            # Only a later score replaces the current one, so the deadline that is later than the retry is kept
+            await self._redis.zadd(self._index_key, {self._encode_key(key): self._to_wall_time(deadline)}, gt=True)
+
+    async def _get_all_keys(self) -> Iterable[Any]:
+        members = await self._redis.zrange(self._index_key, 0, -1)
+
+        return [self._decode_key(member) for member in members]
+
+    async def close(self):
+        await super().close()
+
+        if self._own_redis:
+            await self._redis.aclose()
+
+
+class BaseAutoRedisStorage(BaseAutoSharedStorage, BaseRedisStorage):
+    def __init__(
+            self,
+            redis: Optional[Redis] = None,
+            url: str = "redis://localhost:6379/0",
+            prefix: str = "weller",
+            serializer: Optional[AbstractSerializer] = None,
+            keep_overdue: float = 60,
+            lease: Optional[AbstractLease] = None,
+            lease_ttl: float = 30,
+            stale_while_revalidate: Optional[float] = None,
+            max_stale: Optional[float] = None,
+            metrics: Optional[AbstractMetrics] = None,
+            load_hooks: Iterable[AbstractLoadHook] = (),
+            **kwargs
+    ):
+        """
+        :param redis: A client, if not specified, it is created from the url with a connection pool
+        :param url: The redis url
+        :param prefix: The namespace of the storage's redis keys
+        :param serializer: Encodes the values, the PickleSerializer by default
+        :param keep_overdue: How long an overdue value is kept in the redis for its refresh
+        :param lease: The lease that is acquired before a refresh, e.g. the RedisLease
+        :param lease_ttl: The lease is released by itself after this time
+        :param stale_while_revalidate: Within this time after the expiry,
+        the old value is returned at once and refreshed in background
+        :param max_stale: The value overdue longer than this is never returned, the callers wait for its refresh
+        :param metrics: Receives the hits, the misses, the functions' durations and the other events
+        :param load_hooks: They wrap each call of the functions, e.g. by a tracing span
+        :param kwargs: The default arguments of the functions
+        """
+
+        super().__init__(redis=redis, url=url, prefix=prefix, serializer=serializer, metrics=metrics)
+
+        self._arguments = kwargs
+        self._keep_overdue = keep_overdue
+        self._lease = lease
+        self._lease_ttl = lease_ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._max_stale = max_stale
+        self._load_hooks = tuple(load_hooks)
+
+    def _get_default_arguments(self) -> dict[str, Any]:
+        return self._arguments
+
+    def _get_ttl(self, data: CacheServiceData) -> float:
+        return data.duration + self._keep_overdue
+
+    def _is_blocked(self, data: CallableCacheServiceData) -> bool:
+        return data.bloked
+
+    async def _needs_refresh(self, key: Any) -> bool:
+        payload = await self._redis.get(self._get_redis_key(self._encode_key(key)))
+
+        # The evicted value is loaded again by its function
+        if payload is None:
+            return key in self._functions
+
+        # Most values aren't overdue, so only the header is decoded
+        set_time, duration, blocked = read_header(payload)
+
+        return not blocked and self._to_monotonic_time(set_time) + duration < time.monotonic()
+
+    def _make_data(
+            self,
+            key: Any,
+            value: Any,
+            set_time: float,
+            duration: float,
+            blocked: bool
+    ) -> CallableCacheServiceData:
+        function = self._functions[key]
+
+        return CallableCacheServiceData(
+            value=value,
+            set_time=set_time,
+            duration=duration,
+            fun=function.fun,
+            fun_data=function.fun_data,
+            bloked=blocked
+        )
@@ -0,0 +1,85 @@
+
+
+import time
+import asyncio
+from typing import Any
+
+from weller.storage.service import (
+    AbstractLazyCached,
+    AbstractStrictCached,
+    AbstractLazyAutoCached,
+    AbstractStrictAutoCached
+)
+
+from weller.types.cache_data import CacheServiceData
+from weller.storage.redis.base import BaseRedisStorage, BaseAutoRedisStorage
+
+
+class LazyCachedRedisStorage(BaseRedisStorage, AbstractLazyCached):
+    pass
+
+
+class StrictCachedRedisStorage(BaseRedisStorage, AbstractStrictCached):
+    _indexed = True
+
+    async def _get_all_data(self) -> dict[Any, CacheServiceData]:
+        members = await self._redis.zrange(self._index_key, 0, -1)
+
+        if not members:
+            return {}
+
+        payloads = await self._redis.mget([self._get_redis_key(member) for member in members])
+        result = {}
+
+        for member, payload in zip(members, payloads):
+            if payload is None:
+                continue
+
+            key = self._decode_key(member)
+            result[key] = self._loads(key, payload)
+
+        return result
+
+    async def _del_all_overdue_values(self):
+        members = await self._pop_overdue_members()
+
+        if self._metrics is not None:
+            for member in members:
+                self._count("overdue", self._decode_key(member))
+
+        await self._del_members(members)
+
+
+class LazyAutoCachedRedisStorage(BaseAutoRedisStorage, AbstractLazyAutoCached):
+    pass
+
+
+class StrictAutoCachedRedisStorage(BaseAutoRedisStorage, AbstractStrictAutoCached):
+    _indexed = True
+
+    def __init__(self, scheduled: bool = False, **kwargs):
+        """
+        :param scheduled: Refresh the overdue values by one background task
+        :param kwargs: The redis settings and the default arguments of the functions
+        """
+
+        super().__init__(**kwargs)
+
+        self._scheduled = scheduled
+
+    async def _update_all_if_overdue(self, *except_keys: str):
+        # The index is ordered by the expire time, so the fresh values aren't read
+        members = await self._redis.zrangebyscore(self._index_key, "-inf", f"({time.time()}")
+        keys = [self._decode_key(member) for member in members]
+        keys = [key for key in keys if key in self._functions and key not in except_keys]
+
+        if not keys:
+            return
+
+        payloads = await self._redis.mget([self._get_redis_key(self._encode_key(key)) for key in keys])
+
+        for key, payload in zip(keys, payloads):
+            # The evicted value is loaded again by its function
+            data = None if payload is None else self._loads(key, payload)
+
+            asyncio.create_task(self._background_update(key, data))
@@ -1,14 +1,24 @@
 
 
-import copy
-from typing import Any
+import time
+import asyncio
+from typing import Any, Iterable, Optional
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from functools import cached_property
 
+from weller.metrics import AbstractMetrics
 from weller.types.cache_data import CacheServiceData, CacheData
+from weller.storage.service.timer_wheel import Timer, get_timer_wheel
 
 
 class AbstractLazyCached(ABC):
+    # If specified, it receives the events of the storage
+    _metrics: Optional[AbstractMetrics] = None
+
+    # If true, the strict storages handle the overdue values by the event loop's timer wheel
+    # instead of the checks per each request
+    _timer_wheel: bool = False
+
     @abstractmethod
     def __init__(self, **kwargs):
         pass
@@ -28,7 +38,7 @@ class AbstractLazyCached(ABC):
 
     async def _set(self, key: Any, data: CacheData):
         """
-        This method get current datetime and add data to storage
+        This method stamps the data with the current time and add it to storage
         :param key: Value's index
         :param data: The data bus
         :return: nothing
@@ -36,7 +46,6 @@ class AbstractLazyCached(ABC):
 
         data = CacheServiceData(
             value=data.value,
-            set_time=datetime.now(),
             duration=data.duration
         )
 
@@ -50,6 +59,34 @@ class AbstractLazyCached(ABC):
     ):
         pass
 
+    async def set_many(self, mapping: dict[Any, Any], duration: float):
+        """
+        This method puts many values in a cache storage for a while by one storage access
+        :param mapping: The values by their indexes
+        :param duration: Values' cache time
+        :return: nothing
+        """
+
+        set_time = time.monotonic()
+
+        datum = {
+            key: CacheServiceData(value=value, set_time=set_time, duration=duration)
+            for key, value in mapping.items()
+        }
+
+        await self._add_many_data_to_storage(datum)
+
+    async def _add_many_data_to_storage(self, datum: dict[Any, CacheServiceData]):
+        """
+        Add many data to storage at once.
+        By default, it falls back to the single-key hook
+        :param datum: The data by their keys
+        :return: nothing
+        """
+
+        for key, data in datum.items():
+            await self._add_data_to_storage(key=key, data=data)
+
     async def get(self, key: Any) -> Any:
         """
         Get some data from a storage by key
@@ -66,11 +103,22 @@ class AbstractLazyCached(ABC):
         :return:
         """
 
-        data = await self._get_data_from_storage(key=key)
+        try:
+            data = await self._get_data_from_storage(key=key)
+
+        except KeyError:
+            self._count("misses", key)
+
+            raise
 
         if not self._get_data_is_overdue(data):
+            if self._metrics is not None:
+                self._metrics.increment("hits", key)
+
             return data.value
 
+        self._count("overdue", key)
+
         await self._del_data_from_storage(key=key)
 
         raise KeyError()
@@ -79,37 +127,237 @@ class AbstractLazyCached(ABC):
     async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
         pass
 
+    async def _peek_data_from_storage(self, key: Any) -> CacheServiceData:
+        """
+        Get the data for the storage's own checks, e.g. the sweeps and the background refreshes.
+        Unlike the _get_data_from_storage, it isn't a use of the value, e.g. for the eviction policy
+        :param key: Value's index
+        :return: The data
+        """
+
+        return await self._get_data_from_storage(key)
+
+    def _get_fresh_value(self, key: Any) -> Any:
+        """
+        Get the value that isn't overdue without the event loop, e.g. in the thread of a sync caller.
+        Storages whose reads are safe in any thread should override it
+        :param key: Value's index
+        :return: The value or Ellipsis if the caller should get it by the loop
+        """
+
+        return ...
+
+    def _count_fresh_hit(self, key: Any):
+        """
+        Count the hit of the value given by the _get_fresh_value, it is called in the loop later
+        :param key: Value's index
+        :return: nothing
+        """
+
+        self._count("hits", key)
+
+    async def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Get many values from a storage by one storage access
+        :param keys: Values' indexes
+        :return: The values by their keys, the missing and overdue keys are skipped
+        """
+
+        return await self._get_many([*keys])
+
+    async def _get_many(self, keys: list[Any]) -> dict[Any, Any]:
+        datum = await self._get_many_data_from_storage(keys)
+        result = {}
+
+        for key, data in datum.items():
+            if not self._get_data_is_overdue(data):
+                result[key] = data.value
+
+                continue
+
+            self._count("overdue", key)
+
+            await self._del_data_from_storage(key=key)
+
+        self._count_many(keys, result)
+
+        return result
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        """
+        Get many data from storage at once.
+        By default, it falls back to the single-key hook
+        :param keys: Values' indexes
+        :return: The data by their keys, the missing keys are skipped
+        """
+
+        result = {}
+
+        for key in keys:
+            try:
+                result[key] = await self._get_data_from_storage(key=key)
+
+            except KeyError:
+                continue
+
+        return result
+
+    def _count(self, name: str, key: Any):
+        if self._metrics is not None:
+            self._metrics.increment(name, key)
+
+    def _count_many(self, keys: list[Any], found: dict[Any, Any]):
+        """
+        Count the hits of the found keys and the misses of the rest
+        """
+
+        if self._metrics is None:
+            return
+
+        for key in keys:
+            self._metrics.increment("hits" if key in found else "misses", key)
+
     @staticmethod
     def _get_data_is_overdue(data: CacheServiceData) -> bool:
-        delta = timedelta(seconds=data.duration)
-
         # True if a data is overdue
-        return datetime.now() - data.set_time > delta
+        return time.monotonic() > data.expire_time
 
     @abstractmethod
     async def _del_data_from_storage(self, key: Any):
         pass
 
+    @cached_property
+    def _timers(self) -> dict[Any, Timer]:
+        """
+        The timers of the values' deadlines, by the value's key
+        """
+
+        return {}
+
+    def _schedule_deadline(self, key: Any, deadline: float):
+        timer = self._timers.get(key)
+
+        if timer is not None:
+            timer.cancel()
+
+        self._timers[key] = get_timer_wheel().schedule(deadline, self._on_deadline, key)
+
+    def _on_deadline(self, key: Any):
+        """
+        It is called by the timer wheel when the value become overdue
+        :param key: Value's index
+        :return: nothing
+        """
+
+        self._timers.pop(key, None)
+
+    async def close(self):
+        """
+        Release the storage's resources
+        :return: nothing
+        """
+
+        for timer in self._timers.values():
+            timer.cancel()
+
+        self._timers.clear()
+
 
 class AbstractStrictCached(AbstractLazyCached, ABC):
+    # If true, a request sweeps only a part of the values, so the read ones are checked as the lazy storage does
+    _partial_sweep: bool = False
+
+    async def _set(self, key: Any, data: CacheData):
+        await super()._set(key=key, data=data)
+
+        if self._timer_wheel:
+            self._schedule_deadline(key, time.monotonic() + data.duration)
+
+    async def set_many(self, mapping: dict[Any, Any], duration: float):
+        await super().set_many(mapping, duration)
+
+        if self._timer_wheel:
+            deadline = time.monotonic() + duration
+
+            for key in mapping:
+                self._schedule_deadline(key, deadline)
+
+    def _on_deadline(self, key: Any):
+        super()._on_deadline(key)
+
+        asyncio.ensure_future(self._del_if_overdue(key))
+
+    async def _del_if_overdue(self, key: Any):
+        try:
+            data = await self._peek_data_from_storage(key)
+
+        # It was deleted before
+        except KeyError:
+            return
+
+        if self._get_data_is_overdue(data):
+            self._count("overdue", key)
+
+            await self._del_data_from_storage(key)
+
     async def _get(self, key: Any) -> Any:
+        # The timer wheel may be a tick late, so the value is checked as the lazy storage does
+        if self._timer_wheel:
+            return await super()._get(key)
+
         await self._del_all_overdue_values()
 
-        result = await self._get_data_from_storage(key)
+        if self._partial_sweep:
+            return await super()._get(key)
+
+        try:
+            result = await self._get_data_from_storage(key)
+
+        except KeyError:
+            self._count("misses", key)
+
+            raise
+
+        self._count("hits", key)
 
         return result.value
 
+    async def _get_many(self, keys: list[Any]) -> dict[Any, Any]:
+        if self._timer_wheel:
+            return await super()._get_many(keys)
+
+        await self._del_all_overdue_values()
+
+        if self._partial_sweep:
+            return await super()._get_many(keys)
+
+        datum = await self._get_many_data_from_storage(keys)
+
+        self._count_many(keys, datum)
+
+        return {key: data.value for key, data in datum.items()}
+
     async def _del_all_overdue_values(self):
         """
         This method deletes all values whose time has expired
         :return:
         """
+
+        for key in await self._pop_overdue_keys():
+            self._count("overdue", key)
+
+            await self._del_data_from_storage(key)
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        """
+        Get the keys of all overdue values.
+        Storages with an expiry index should override it to skip the full scan
+        :return: The overdue keys
+        """
+
         datum = await self._get_all_data()
-        datum = copy.deepcopy(datum)
 
-        for key, item in datum.items():
-            if self._get_data_is_overdue(item):
-                await self._del_data_from_storage(key)
+        return [key for key, item in datum.items() if self._get_data_is_overdue(item)]
 
     @abstractmethod
     async def _get_all_data(self) -> dict[Any, CacheServiceData]:
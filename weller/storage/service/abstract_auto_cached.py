@@ -1,17 +1,32 @@
 
 
+import time
 import asyncio
-from typing import Any, Callable, Iterable
+from typing import Any, Awaitable, Callable, Iterable, Optional
 from abc import ABC, abstractmethod
-from datetime import datetime
-
-from fast_depends import inject
+from functools import cached_property
 
+from weller.lease import AbstractLease
+from weller.tracing import AbstractLoadHook, LoadEvent
 from weller.types.cache_data import CallableCacheData, CallableCacheServiceData
 from weller.storage.service.abstract import AbstractLazyCached
+from weller.storage.service.injection import compile_function
 
 
 class AbstractLazyAutoCached(AbstractLazyCached, ABC):
+    # If specified, a value is refreshed only by the worker that got its lease
+    _lease: Optional[AbstractLease] = None
+    _lease_ttl: float = 30
+
+    # The overdue value is returned at once and refreshed in background within this time
+    _stale_while_revalidate: Optional[float] = None
+
+    # The value overdue longer than this is never returned, the callers wait for its refresh
+    _max_stale: Optional[float] = None
+
+    # They wrap each call of the values' functions
+    _load_hooks: tuple[AbstractLoadHook, ...] = ()
+
     @abstractmethod
     def _get_default_arguments(self) -> dict[str, Any]:
         pass
@@ -21,12 +36,69 @@ class AbstractLazyAutoCached(AbstractLazyCached, ABC):
 
         return {**args, **fun_data}
 
+    @cached_property
+    def _in_flight(self) -> dict[Any, asyncio.Task]:
+        """
+        The loader calls that are running now, by the value's key
+        """
+
+        return {}
+
+    async def _load_once(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the loader or wait for the same key loader that is already running,
+        so the concurrent callers share one call.
+        The loader isn't cancelled with the callers
+        :param key: Value's index
+        :param loader: Coroutine function that loads and saves the value
+        :return: The loader result
+        """
+
+        return await asyncio.shield(self._get_load_task(key, loader))
+
+    def _get_load_task(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(loader())
+
+            self._in_flight[key] = task
+
+            def forget(_: asyncio.Task):
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+
+            task.add_done_callback(forget)
+
+        return task
+
+    async def cancel_load(self, key: Any) -> bool:
+        """
+        Cancel the running call of the value's function, its callers get the CancelledError
+        :param key: Value's index
+        :return: True if the function was running
+        """
+
+        task = self._in_flight.get(key)
+
+        if task is None:
+            return False
+
+        task.cancel()
+
+        # The function may delay its cancellation, so it ends before the next call
+        await asyncio.wait({task})
+
+        return True
+
     async def set(
             self,
             key: Any,
             duration: float,
             fun: Callable[..., Any],
             value: Any = ...,
+            use_di: bool = True,
+            arguments: Optional[dict[str, Any]] = None,
             **kwargs
     ):
 
@@ -36,35 +108,73 @@ class AbstractLazyAutoCached(AbstractLazyCached, ABC):
         :param key: Value's index
         :param value: Some dispather value, if not specified, it is taken from the function
         :param duration: Value's cache time
+        :param use_di: If false, the function is called without the dependency injection
+        with only the arguments it takes
+        :param arguments: The values that will passed to function, e.g. the call arguments,
+        unlike the kwargs they may be named as this method's parameters and override the key and the duration
         :param kwargs: The values that will passed to function
         :return: nothing
         """
 
-        args = kwargs
+        # The function and its arguments are prepared once and reused by each refresh
+        fun, args = compile_function(
+            fun,
+            {**self._get_common_arguments(**kwargs, key=key, duration=duration), **(arguments or {})},
+            use_di=use_di
+        )
 
-        if value is Ellipsis:
-            args = self._get_common_arguments(**kwargs, key=key, duration=duration)
+        if value is not Ellipsis:
+            data = CallableCacheData(
+                value=value,
+                duration=duration,
+                fun=fun,
+                fun_data=args
+            )
 
-            fun = inject(fun)
+            await self._set(key=key, data=data)
 
-            value = await fun(**args)
+            return
 
-        data = CallableCacheData(
-            value=value,
-            duration=duration,
-            fun=fun,
-            fun_data=args
-        )
+        async def loader():
+            loaded = CallableCacheData(
+                value=await self._call_function(key, fun, args, "cold"),
+                duration=duration,
+                fun=fun,
+                fun_data=args
+            )
+
+            await self._set(key=key, data=loaded)
+
+        await self._load_once(key, loader)
+
+    async def set_many(
+            self,
+            mapping: dict[Any, Callable[..., Any]],
+            duration: float,
+            use_di: bool = True,
+            **kwargs
+    ):
+        """
+        This method calls many functions concurrently and puts their values in a cache storage
+        :param mapping: The functions by their values' indexes
+        :param duration: Values' cache time
+        :param use_di: If false, the functions are called without the dependency injection
+        :param kwargs: The values that will passed to functions
+        :return: nothing
+        """
 
-        await self._set(key=key, data=data)
+        await asyncio.gather(*[
+            self.set(key=key, duration=duration, fun=fun, use_di=use_di, **kwargs)
+            for key, fun in mapping.items()
+        ])
 
     async def _set(self, key: Any, data: CallableCacheData):
         data = CallableCacheServiceData(
             value=data.value,
-            set_time=datetime.now(),
             duration=data.duration,
             fun=data.fun,
-            fun_data=data.fun_data
+            fun_data=data.fun_data,
+            bloked=data.bloked
         )
 
         await self._add_data_to_storage(key=key, data=data)
@@ -81,47 +191,205 @@ class AbstractLazyAutoCached(AbstractLazyCached, ABC):
     async def _get_data_from_storage(self, key: Any) -> CallableCacheServiceData:
         pass
 
-    async def _update_if_overdue(self, key: str) -> Any:
+    async def _set_blocked_in_storage(self, key: Any, data: CallableCacheServiceData):
+        """
+        Save the data's blocked flag, its value is the same.
+        Storages that can change the flag without the value should override it
+        :param key: Value's index
+        :param data: The data with the new flag
+        :return: nothing
+        """
+
+        await self._add_data_to_storage(key=key, data=data)
+
+    async def _update_if_overdue(self, key: str, background: bool = False) -> Any:
         """
         Check that data is overdue and update if true
         :param key: data's key
+        :param background: True if nobody requested the value, so it isn't a hit or a miss
         :return: A old value if not overdue else a new value
         """
 
-        data = await self._get_data_from_storage(key=key)
+        try:
+            if background:
+                data = await self._peek_data_from_storage(key)
+
+            else:
+                data = await self._get_data_from_storage(key=key)
+
+        except KeyError:
+            if not background:
+                self._count("misses", key)
+
+            raise
 
+        return await self._update_data_if_overdue(key, data, background)
+
+    async def _update_data_if_overdue(
+            self,
+            key: Any,
+            data: CallableCacheServiceData,
+            background: bool = False
+    ) -> Any:
         if not self._get_data_is_overdue(data):
-            return data.value
+            # The warm path checks the metrics inline
+            if self._metrics is not None and not background:
+                self._metrics.increment("hits", key)
 
-        if data.bloked:
             return data.value
 
-        data = CallableCacheData(
-            value=data.value,
-            duration=data.duration,
-            fun=data.fun,
-            fun_data=data.fun_data,
-            bloked=True
-        )
+        stale_time = time.monotonic() - data.expire_time
+        task = self._in_flight.get(key)
 
-        await self._set(
-            key=key,
-            data=data
-        )
+        reason = "background" if background else "overdue"
+
+        # Somebody already refreshes it, so the old value is returned if it isn't too old
+        if data.bloked or task is not None:
+            self._count("blocked", key)
+
+            if self._max_stale is None or stale_time <= self._max_stale:
+                return data.value
+
+            if task is not None:
+                return await asyncio.shield(task)
 
-        args = self._get_common_arguments(**data.fun_data)
-        value = await data.fun(**args)
+            # Other process blocked it and may have crashed, so the too old value is refreshed here
+
+        if self._stale_while_revalidate is not None and stale_time <= self._stale_while_revalidate:
+            if self._max_stale is None or stale_time <= self._max_stale:
+                self._count("stale", key)
+
+                task = self._get_load_task(key, lambda: self._update(key, data, "stale"))
+
+                # A failed refresh keeps the value overdue, so the next caller tries again
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+                return data.value
+
+        self._count("overdue", key)
+
+        return await self._load_once(key, lambda: self._update(key, data, reason))
+
+    async def reload(self, key: Any, reason: str = "manual") -> Any:
+        """
+        Call the value's function again, even if the value isn't overdue
+        :param key: Value's index
+        :param reason: The reason that the load hooks get
+        :return: A new value or the old one if other worker refreshes it
+        """
+
+        data = await self._peek_data_from_storage(key)
+
+        return await self._load_once(key, lambda: self._update(key, data, reason))
+
+    async def _update(self, key: Any, old_data: CallableCacheServiceData, reason: str) -> Any:
+        """
+        Call the data's function and save its result
+        :param key: data's key
+        :param old_data: The overdue data, it is restored if the function fails
+        :param reason: Why the function is called
+        :return: A new value or the old one if other worker refreshes it
+        """
+
+        if self._lease is None:
+            return await self._refresh(key, old_data, reason)
+
+        token = await self._lease.acquire(key, self._lease_ttl)
+
+        # Other worker refreshes it, this one checks the value again after a pause
+        if token is None:
+            await self._retry_later(key, old_data)
+
+            return old_data.value
+
+        try:
+            return await self._refresh(key, old_data, reason)
+
+        finally:
+            await self._lease.release(key, token)
+
+    async def _refresh(self, key: Any, data: CallableCacheServiceData, reason: str) -> Any:
+        # The data is updated in place. The blocked data stays overdue,
+        # so the other callers know how old it is
+        data.bloked = True
+
+        await self._set_blocked_in_storage(key=key, data=data)
+
+        try:
+            value = await self._call_function(key, data.fun, data.fun_data, reason)
+
+        except BaseException:
+            # Keep the data overdue, so the next request tries again
+            data.bloked = False
+
+            await self._set_blocked_in_storage(key=key, data=data)
+
+            raise
 
         data.bloked = False
-        data.value = value
+        data.renew(value)
 
-        await self._set(
-            key=key,
-            data=data
-        )
+        await self._add_data_to_storage(key=key, data=data)
 
         return value
 
+    async def _retry_later(self, key: Any, data: CallableCacheServiceData):
+        """
+        Plan the next refresh attempt of the value that wasn't refreshed,
+        the lazy storage refreshes it by the next request
+        :param key: Value's index
+        :param data: The value's data
+        :return: nothing
+        """
+
+        pass
+
+    async def _call_function(
+            self,
+            key: Any,
+            fun: Callable[..., Any],
+            args: dict[str, Any],
+            reason: str
+    ) -> Any:
+        """
+        Call the value's function, measure it and pass it to the load hooks
+        :param key: Value's index
+        :param fun: The compiled function
+        :param args: Its arguments
+        :param reason: Why the function is called, see the LoadEvent
+        :return: The function's result
+        """
+
+        if self._metrics is None and not self._load_hooks:
+            return await fun(**args)
+
+        event = LoadEvent(key=key, reason=reason)
+
+        for hook in self._load_hooks:
+            hook.before(event)
+
+        start = time.perf_counter()
+
+        try:
+            return await fun(**args)
+
+        except BaseException as error:
+            event.exception = error
+
+            if self._metrics is not None and isinstance(error, Exception):
+                self._metrics.increment("load_errors", key)
+
+            raise
+
+        finally:
+            event.duration = time.perf_counter() - start
+
+            if self._metrics is not None:
+                self._metrics.observe("load_seconds", key, event.duration)
+
+            for hook in reversed(self._load_hooks):
+                hook.after(event)
+
     async def _get(self, key: Any) -> Any:
         """
         This method get value from storage and check that time not expired.
@@ -132,31 +400,229 @@ class AbstractLazyAutoCached(AbstractLazyCached, ABC):
 
         return await self._update_if_overdue(key)
 
+    async def _get_many(self, keys: list[Any]) -> dict[Any, Any]:
+        """
+        This method get values from storage at once and refresh the overdue ones concurrently
+        :param keys: Values' indexes
+        :return: The values by their keys, the missing keys are skipped
+        """
+
+        datum = await self._get_many_data_from_storage(keys)
+        result = {}
+        overdue = {}
+
+        for key, data in datum.items():
+            if self._get_data_is_overdue(data):
+                overdue[key] = data
+
+            else:
+                result[key] = data.value
+
+        if self._metrics is not None:
+            self._count_many([key for key in keys if key not in overdue], result)
+
+        if overdue:
+            values = await asyncio.gather(*[
+                self._update_data_if_overdue(key, data)
+                for key, data in overdue.items()
+            ])
+
+            result.update(zip(overdue, values))
+
+        return {key: result[key] for key in keys if key in result}
+
 
 class AbstractStrictAutoCached(AbstractLazyAutoCached, ABC):
+    # If true, one background task refreshes the values when they become overdue
+    # instead of the checking all values per each request
+    _scheduled: bool = False
+    _scheduler_task: Optional[asyncio.Task] = None
+    _scheduler_wakeup: Optional[asyncio.Event] = None
+    _scheduler_stopping: bool = False
+
+    # The failed refresh or the lost lease is retried after this time or the value's duration if it is shorter
+    _retry_delay: float = 1
+
     @abstractmethod
     async def _get_all_keys(self) -> Iterable[Any]:
         pass
 
+    async def _get_next_deadline(self) -> Optional[float]:
+        """
+        Get the nearest time.monotonic() when some value become overdue.
+        Storages with an expiry index should override it to skip the full scan
+        :return: The deadline or None if the storage is empty
+        """
+
+        deadlines = [
+            (await self._peek_data_from_storage(key)).expire_time
+            for key in [*await self._get_all_keys()]
+        ]
+
+        return min(deadlines, default=None)
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        """
+        Get the keys of all overdue values.
+        Storages with an expiry index should override it to skip the full scan
+        :return: The overdue keys
+        """
+
+        result = []
+
+        for key in [*await self._get_all_keys()]:
+            if self._get_data_is_overdue(await self._peek_data_from_storage(key)):
+                result.append(key)
+
+        return result
+
     async def _update_all_if_overdue(self, *except_keys: str):
         keys = await self._get_all_keys()
-        list_keys = [*keys]
-
-        for key in except_keys:
-            list_keys.remove(key)
+        list_keys = [key for key in keys if key not in except_keys]
 
         for item_key in list_keys:
-            updater = self._update_if_overdue(item_key)
+            updater = self._background_update(item_key)
 
             asyncio.create_task(updater)
 
+    async def _set(self, key: Any, data: CallableCacheData):
+        await super()._set(key=key, data=data)
+
+        if self._scheduled:
+            self._wake_scheduler()
+
+        if self._timer_wheel:
+            self._schedule_deadline(key, time.monotonic() + data.duration)
+
+    async def _refresh(self, key: Any, data: CallableCacheServiceData, reason: str) -> Any:
+        try:
+            value = await super()._refresh(key=key, data=data, reason=reason)
+
+        except Exception:
+            # The failed value is put back with its overdue deadline, so it is retried after a pause
+            await self._retry_later(key, data)
+
+            raise
+
+        # The refreshed value has a new deadline
+        finally:
+            if self._scheduler_task is not None and not self._scheduler_task.done():
+                self._scheduler_wakeup.set()
+
+        if self._timer_wheel:
+            self._schedule_deadline(key, data.expire_time)
+
+        return value
+
+    async def _retry_later(self, key: Any, data: CallableCacheServiceData):
+        deadline = time.monotonic() + min(data.duration, self._retry_delay)
+
+        if self._timer_wheel and key not in self._timers:
+            self._schedule_deadline(key, deadline)
+
+        if self._scheduled:
+            await self._push_retry_deadline(key, deadline)
+
+            self._wake_scheduler()
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        """
+        Index the value again at the time of its next refresh attempt,
+        unless its deadline is not reached yet.
+        Storages with an expiry index should override it
+        :param key: Value's index
+        :param deadline: The time.monotonic() of the attempt
+        :return: nothing
+        """
+
+        pass
+
+    def _on_deadline(self, key: Any):
+        super()._on_deadline(key)
+
+        asyncio.ensure_future(self._background_update(key))
+
+    def _wake_scheduler(self):
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_wakeup = asyncio.Event()
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
+
+        self._scheduler_wakeup.set()
+
+    async def _run_scheduler(self):
+        """
+        Sleep until the nearest deadline and refresh only the overdue values
+        :return: nothing, works until the close
+        """
+
+        while not self._scheduler_stopping:
+            # Clear before the deadline calculation, so a new value can't be missed
+            self._scheduler_wakeup.clear()
+
+            deadline = await self._get_next_deadline()
+            timeout = None
+
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+
+            # The wait_for may swallow the cancellation if the event is set at the same time
+            waiter = asyncio.ensure_future(self._scheduler_wakeup.wait())
+
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+
+            finally:
+                waiter.cancel()
+
+            for key in await self._pop_overdue_keys():
+                asyncio.create_task(self._background_update(key))
+
+    async def _needs_refresh(self, key: Any) -> bool:
+        """
+        Check the value before its background refresh.
+        Storages that can read the expiry without the value should override it to skip the value's decoding
+        :param key: Value's index
+        :return: False if the value is fresh or somebody refreshes it
+        """
+
+        return True
+
+    async def _background_update(self, key: Any, data: Optional[CallableCacheServiceData] = None):
+        """
+        Refresh the value if it is overdue, the errors are left for the next request
+        :param key: Value's index
+        :param data: The value's data if the caller has already read it
+        :return: nothing
+        """
+
+        try:
+            if data is not None:
+                await self._update_data_if_overdue(key, data, background=True)
+
+            elif await self._needs_refresh(key):
+                await self._update_if_overdue(key, background=True)
+
+        # A failed value stays overdue until its retry or the next request,
+        # a deleted one is no longer needed
+        except Exception:
+            pass
+
     async def _get(self, key: Any) -> Any:
+        if self._scheduled or self._timer_wheel:
+            return await self._update_if_overdue(key)
+
         task = asyncio.create_task(self._update_if_overdue(key))
 
         await self._update_all_if_overdue(key)
 
         return await task
 
+    async def _get_many(self, keys: list[Any]) -> dict[Any, Any]:
+        if not self._scheduled and not self._timer_wheel:
+            await self._update_all_if_overdue(*keys)
+
+        return await super()._get_many(keys)
+
     async def refresh(self, *except_keys: str):
         """
         This Refresh all overdue values
@@ -165,3 +631,26 @@ class AbstractStrictAutoCached(AbstractLazyAutoCached, ABC):
         """
 
         await self._update_all_if_overdue(*except_keys)
+
+    async def close(self):
+        """
+        Stop the background refresh of the values
+        :return: nothing
+        """
+
+        if self._scheduler_task is not None:
+            # A client may swallow the cancellation during its command, then the scheduler stops by the flag
+            self._scheduler_stopping = True
+            self._scheduler_wakeup.set()
+            self._scheduler_task.cancel()
+
+            try:
+                await self._scheduler_task
+
+            except asyncio.CancelledError:
+                pass
+
+            self._scheduler_task = None
+            self._scheduler_stopping = False
+
+        await super().close()
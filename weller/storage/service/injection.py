@@ -0,0 +1,161 @@
+
+
+import asyncio
+import inspect
+from weakref import WeakKeyDictionary, ref
+from typing import Any, Callable, Optional
+
+from fast_depends import inject
+
+
+# The functions are compiled once, the dicts don't keep them alive.
+# The injected function keeps its original one, so it is referenced weakly
+# and lives while some value uses it
+_injected: "WeakKeyDictionary[Callable[..., Any], ref[Callable[..., Any]]]" = WeakKeyDictionary()
+_parameters: "WeakKeyDictionary[Callable[..., Any], Optional[frozenset[str]]]" = WeakKeyDictionary()
+
+
+def get_injected(fun: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Get the function with the resolved dependencies, it is built once while it is used
+    :param fun: Some function
+    :return: The injected function
+    """
+
+    try:
+        injected = _injected[fun]()
+
+        if injected is not None:
+            return injected
+
+    except KeyError:
+        pass
+
+    injected = inject(fun)
+
+    try:
+        _injected[fun] = ref(injected)
+
+    # The function can't be referenced weakly, so it is injected every time
+    except TypeError:
+        pass
+
+    return injected
+
+
+def get_parameters(fun: Callable[..., Any]) -> Optional[frozenset[str]]:
+    """
+    Get the names of the function's arguments
+    :param fun: Some function
+    :return: The names or None if the function takes any keyword arguments
+    """
+
+    try:
+        return _parameters[fun]
+
+    except KeyError:
+        pass
+
+    parameters = inspect.signature(fun).parameters
+    result = frozenset(parameters)
+
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        result = None
+
+    try:
+        _parameters[fun] = result
+
+    except TypeError:
+        pass
+
+    return result
+
+
+def offload(fun: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Make a sync function awaitable, it is called in the event loop's default executor,
+    so it doesn't block the loop
+    :param fun: Some sync function
+    :return: The coroutine function
+    """
+
+    async def call(**kwargs: Any) -> Any:
+        result = await asyncio.to_thread(fun, **kwargs)
+
+        # A callable object may return an awaitable
+        if inspect.isawaitable(result):
+            result = await result
+
+        return result
+
+    return call
+
+
+def has_variadic_parameters(fun: Callable[..., Any]) -> bool:
+    """
+    :param fun: Some function
+    :return: True if the function takes the *args or the **kwargs
+    """
+
+    return any(
+        parameter.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        for parameter in inspect.signature(fun).parameters.values()
+    )
+
+
+def bind_arguments(fun: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Make a function callable by its bound arguments' names, e.g. items=(1, 2) of the *items
+    is passed as the positional arguments and kw={"b": 2} of the **kw as b=2.
+    The other keyword arguments are dropped, so they don't get into the **kwargs
+    :param fun: Some function
+    :return: The function that takes only the keyword arguments
+    """
+
+    signature = inspect.signature(fun)
+
+    def expand(arguments: dict[str, Any]) -> inspect.BoundArguments:
+        return inspect.BoundArguments(signature, {
+            name: arguments[name] for name in signature.parameters if name in arguments
+        })
+
+    if inspect.iscoroutinefunction(fun):
+        async def call(**kwargs: Any) -> Any:
+            bound = expand(kwargs)
+
+            return await fun(*bound.args, **bound.kwargs)
+
+    else:
+        def call(**kwargs: Any) -> Any:
+            bound = expand(kwargs)
+
+            return fun(*bound.args, **bound.kwargs)
+
+    return call
+
+
+def compile_function(
+        fun: Callable[..., Any],
+        arguments: dict[str, Any],
+        use_di: bool = True
+) -> tuple[Callable[..., Any], dict[str, Any]]:
+    """
+    Prepare a function and its arguments, so they can be called many times as is
+    :param fun: Some function
+    :param arguments: All the arguments that may be passed to the function
+    :param use_di: If false, the function is called directly with only the arguments it takes
+    :return: The function to call and its arguments, a sync function is called in a thread
+    """
+
+    compiled = get_injected(fun) if use_di else fun
+
+    if not use_di:
+        parameters = get_parameters(fun)
+
+        if parameters is not None:
+            arguments = {name: value for name, value in arguments.items() if name in parameters}
+
+    if not inspect.iscoroutinefunction(fun):
+        compiled = offload(compiled)
+
+    return compiled, arguments
@@ -0,0 +1,143 @@
+
+
+import asyncio
+import functools
+from typing import Any, Iterable
+from functools import cached_property
+
+from weller.types.cache_data import CallableCacheData, CallableCacheServiceData
+
+
+class ValueMissing(KeyError):
+    """
+    The value isn't in the shared storage, but its function may be known
+    """
+
+
+class BaseAutoSharedStorage:
+    """
+    The base of the auto storages whose values are shared by the processes.
+    The functions can't be shared, so each process keeps its own ones,
+    the values without a function of this process are not given out.
+    The storage's _get_data_from_storage raises the ValueMissing if a value is gone
+    """
+
+    # The process that didn't get the lease of a missing value checks the storage this often
+    _lease_poll_interval: float = 0.05
+
+    @cached_property
+    def _functions(self) -> dict[Any, CallableCacheData]:
+        return {}
+
+    def _remember_function(self, key: Any, data: CallableCacheServiceData):
+        self._functions[key] = CallableCacheData(
+            value=None,
+            duration=data.duration,
+            fun=data.fun,
+            fun_data=data.fun_data
+        )
+
+    async def _add_data_to_storage(self, key: Any, data: CallableCacheServiceData):
+        self._remember_function(key, data)
+
+        await super()._add_data_to_storage(key=key, data=data)
+
+    async def _add_many_data_to_storage(self, datum: dict[Any, CallableCacheServiceData]):
+        for key, data in datum.items():
+            self._remember_function(key, data)
+
+        await super()._add_many_data_to_storage(datum)
+
+    async def _get_all_keys(self) -> Iterable[Any]:
+        # The values of the other processes can't be refreshed without their functions
+        return [key for key in await super()._get_all_keys() if key in self._functions]
+
+    async def _get_data_from_storage(self, key: Any) -> CallableCacheServiceData:
+        if key not in self._functions:
+            raise KeyError(key)
+
+        return await super()._get_data_from_storage(key)
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CallableCacheServiceData]:
+        return await super()._get_many_data_from_storage([key for key in keys if key in self._functions])
+
+    async def _get_many(self, keys: list[Any]) -> dict[Any, Any]:
+        result = await super()._get_many(keys)
+
+        # The values evicted from the storage, but their functions are known
+        missing = [key for key in keys if key not in result and key in self._functions]
+
+        if missing:
+            values = await asyncio.gather(*[
+                self._load_once(key, functools.partial(self._reload, key))
+                for key in missing
+            ])
+
+            result.update(zip(missing, values))
+
+        return {key: result[key] for key in keys if key in result}
+
+    async def _update_if_overdue(self, key: Any, background: bool = False) -> Any:
+        try:
+            return await super()._update_if_overdue(key, background)
+
+        # The value was evicted from the storage, but the function is known
+        except ValueMissing:
+            reason = "background" if background else "cold"
+
+            return await self._load_once(key, lambda: self._reload(key, reason))
+
+    async def _reload(self, key: Any, reason: str = "cold") -> Any:
+        """
+        Load the missing value. With the lease, only its owner calls the function
+        and the other processes wait for the value in the storage
+        :param key: Value's index
+        :param reason: Why the function is called
+        :return: A new value
+        """
+
+        if self._lease is None:
+            return await self._load(key, reason)
+
+        while True:
+            token = await self._lease.acquire(key, self._lease_ttl)
+
+            if token is not None:
+                break
+
+            await asyncio.sleep(self._lease_poll_interval)
+
+            try:
+                return (await self._peek_data_from_storage(key)).value
+
+            except ValueMissing:
+                pass
+
+        try:
+            # The previous owner may have saved it before its release
+            try:
+                data = await self._peek_data_from_storage(key)
+
+                if not self._get_data_is_overdue(data):
+                    return data.value
+
+            except ValueMissing:
+                pass
+
+            return await self._load(key, reason)
+
+        finally:
+            await self._lease.release(key, token)
+
+    async def _load(self, key: Any, reason: str) -> Any:
+        function = self._functions[key]
+        data = CallableCacheData(
+            value=await self._call_function(key, function.fun, function.fun_data, reason),
+            duration=function.duration,
+            fun=function.fun,
+            fun_data=function.fun_data
+        )
+
+        await self._set(key=key, data=data)
+
+        return data.value
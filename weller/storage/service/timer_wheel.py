@@ -0,0 +1,279 @@
+
+
+import math
+import time
+import asyncio
+from weakref import WeakKeyDictionary, ref
+from typing import Any, Callable, Optional
+
+
+# Each level has 2 ** BITS slots, a slot of the next level covers all slots of the previous one
+BITS = 6
+SLOTS = 1 << BITS
+MASK = SLOTS - 1
+
+
+class Timer:
+    """
+    The handle of a callback scheduled by the timer wheel
+    """
+
+    __slots__ = ("deadline", "callback", "args", "_expires", "_wheel", "_level", "_bucket")
+
+    def __init__(self, deadline: float, callback: Callable[..., Any], args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+
+        # The tick when the callback is called
+        self._expires = 0
+
+        self._wheel: Optional["TimerWheel"] = None
+        self._level = 0
+        self._bucket: Optional[set] = None
+
+    @property
+    def active(self) -> bool:
+        return self._bucket is not None
+
+    def cancel(self):
+        """
+        Don't call the callback, it is safe to cancel a fired or cancelled timer
+        :return: nothing
+        """
+
+        if self._bucket is None:
+            return
+
+        self._bucket.discard(self)
+        self._wheel._counts[self._level] -= 1
+        self._bucket = None
+
+    def __repr__(self) -> str:
+        return f"Timer(deadline={self.deadline!r}, callback={self.callback!r}, active={self.active!r})"
+
+
+class TimerWheel:
+    """
+    The hierarchical timer wheel: the callbacks are put in the slots by their deadlines
+    and called by the coarse ticks, so a schedule and a cancel are O(1).
+    A far timer is kept in a higher level and moved to the lower ones while its deadline comes closer.
+    The wheel sleeps until its nearest non-empty slot, it doesn't tick while it is empty
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, tick: float = 0.01, levels: int = 4):
+        """
+        :param loop: The event loop of the callbacks, the running one by default
+        :param tick: The callbacks are called no later than this after their deadlines
+        :param levels: The wheel keeps the exact slots for the deadlines within tick * 64 ** levels,
+        the farther ones are moved again when they come closer
+        """
+
+        # A loop-wide wheel lives while its loop does, so it doesn't keep the loop itself
+        self._loop = ref(asyncio.get_running_loop() if loop is None else loop)
+        self._tick = tick
+        self._start = time.monotonic()
+        self._current = 0
+
+        self._wheels: list[list[set[Timer]]] = [[set() for _ in range(SLOTS)] for _ in range(levels)]
+        self._counts = [0] * levels
+
+        # The loop keeps its pending handle and the handle keeps the loop
+        self._handle: Optional["ref[asyncio.TimerHandle]"] = None
+        self._handle_tick: Optional[int] = None
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def schedule(self, deadline: float, callback: Callable[..., Any], *args: Any) -> Timer:
+        """
+        Call the callback in the loop after the deadline
+        :param deadline: The time.monotonic() of the call
+        :param callback: A plain function, it shouldn't block the loop
+        :param args: The callback's arguments
+        :return: The handle to cancel the call
+        """
+
+        timer = Timer(deadline, callback, args)
+
+        # The tick after the deadline, so the callback never sees the time before it
+        timer._expires = max(math.floor((deadline - self._start) / self._tick) + 1, self._current + 1)
+
+        self._place(timer)
+
+        if self._handle_tick is None or timer._expires < self._handle_tick:
+            self._arm()
+
+        return timer
+
+    def _place(self, timer: Timer):
+        delta = timer._expires - self._current
+        expires = timer._expires
+        levels = len(self._wheels)
+        level = 0
+
+        while delta >= SLOTS and level < levels - 1:
+            delta >>= BITS
+            level += 1
+
+        # Beyond the wheel, it is put in the farthest slot of the top level and moved again from it
+        if delta >= SLOTS:
+            expires = self._current + (1 << (BITS * levels)) - 1
+
+        bucket = self._wheels[level][(expires >> (BITS * level)) & MASK]
+        bucket.add(timer)
+
+        timer._wheel = self
+        timer._level = level
+        timer._bucket = bucket
+
+        self._counts[level] += 1
+
+    def _next_tick(self) -> Optional[int]:
+        """
+        Find the nearest tick that calls the callbacks or moves them to a lower level
+        """
+
+        current = self._current
+        result = None
+
+        if self._counts[0]:
+            level = self._wheels[0]
+
+            for tick in range(current + 1, current + SLOTS):
+                if level[tick & MASK]:
+                    result = tick
+
+                    break
+
+        # A higher level's boundary is also the lower levels' one, so the lowest non-empty level is the nearest.
+        # It may come before a level 0 timer, then its timers are moved first
+        for level in range(1, len(self._wheels)):
+            if self._counts[level]:
+                span = 1 << (BITS * level)
+                boundary = (current // span + 1) * span
+
+                return boundary if result is None else min(result, boundary)
+
+        return result
+
+    def _disarm(self):
+        handle = None if self._handle is None else self._handle()
+
+        if handle is not None:
+            handle.cancel()
+
+        self._handle = None
+
+    def _arm(self):
+        self._disarm()
+
+        self._handle_tick = self._next_tick()
+        loop = self._loop()
+
+        if self._handle_tick is None or loop is None or loop.is_closed():
+            return
+
+        delay = self._start + self._handle_tick * self._tick - time.monotonic()
+
+        self._handle = ref(loop.call_later(max(delay, 0), self._run))
+
+    def _run(self):
+        self._handle = None
+
+        self._advance(math.floor((time.monotonic() - self._start) / self._tick))
+        self._arm()
+
+    def _advance(self, target: int):
+        """
+        Pass all ticks until the target, the empty ones are skipped
+        :param target: The current tick
+        :return: nothing
+        """
+
+        while True:
+            tick = self._next_tick()
+
+            if tick is None or tick > target:
+                self._current = max(self._current, target)
+
+                return
+
+            self._current = tick
+
+            # The higher levels first, they may move the timers to the slots of this tick
+            for level in range(len(self._wheels) - 1, 0, -1):
+                if tick & ((1 << (BITS * level)) - 1) == 0:
+                    self._cascade(level, (tick >> (BITS * level)) & MASK)
+
+            self._fire(self._wheels[0][tick & MASK])
+
+    def _cascade(self, level: int, slot: int):
+        bucket = self._wheels[level][slot]
+
+        if not bucket:
+            return
+
+        self._wheels[level][slot] = set()
+        self._counts[level] -= len(bucket)
+
+        for timer in bucket:
+            self._place(timer)
+
+    def _fire(self, bucket: set[Timer]):
+        if not bucket:
+            return
+
+        timers = [*bucket]
+
+        bucket.clear()
+        self._counts[0] -= len(timers)
+
+        for timer in timers:
+            timer._bucket = None
+
+            try:
+                timer.callback(*timer.args)
+
+            except Exception as e:
+                self._loop().call_exception_handler({
+                    "message": "Exception in the timer wheel callback",
+                    "exception": e,
+                    "timer": timer
+                })
+
+    def close(self):
+        """
+        Cancel all timers
+        :return: nothing
+        """
+
+        self._disarm()
+        self._handle_tick = None
+
+        for level, wheel in enumerate(self._wheels):
+            for bucket in wheel:
+                for timer in bucket:
+                    timer._bucket = None
+
+                bucket.clear()
+
+            self._counts[level] = 0
+
+
+_wheels: "WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel]" = WeakKeyDictionary()
+
+
+def get_timer_wheel() -> TimerWheel:
+    """
+    Get the timer wheel shared by all storages of the running event loop
+    :return: The wheel, it is created by the first call in the loop
+    """
+
+    loop = asyncio.get_running_loop()
+    wheel = _wheels.get(loop)
+
+    if wheel is None:
+        wheel = _wheels[loop] = TimerWheel(loop)
+
+    return wheel
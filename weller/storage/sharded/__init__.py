@@ -0,0 +1,8 @@
+
+
+from .sharded_storage import (
+    LazyCachedShardedMemoryStorage,
+    StrictCachedShardedMemoryStorage,
+    LazyAutoCachedShardedMemoryStorage,
+    StrictAutoCachedShardedMemoryStorage
+)
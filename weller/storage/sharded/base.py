@@ -0,0 +1,150 @@
+
+
+import math
+import time
+import asyncio
+from typing import Any, Iterable, Optional
+
+from weller.types.cache_data import CacheServiceData
+from weller.storage.memory.base import BaseMemoryStorage, BaseAutoMemoryStorage
+from weller.storage.memory.eviction import AbstractEvictionPolicy
+from weller.storage.memory.snapshot import SnapshotEntry
+
+
+class BaseShardedMemoryStorage(BaseMemoryStorage):
+    """
+    The memory storage whose keys are hashed into the independent shards.
+    Each shard has its own values, expiry index, eviction policy and counters,
+    so the sweeps, the refreshes and the snapshots handle one shard at a time
+    """
+
+    def __init__(self, shards: int = 16, **kwargs):
+        """
+        :param shards: The number of the shards
+        :param kwargs: The memory storage settings, the max_entries and the max_bytes are split between the shards
+        """
+
+        super().__init__(**kwargs)
+
+        eviction = kwargs.get("eviction", "lru")
+
+        if isinstance(eviction, AbstractEvictionPolicy):
+            raise ValueError("Each shard needs its own eviction policy, pass the policy's name")
+
+        max_entries = self._max_entries
+        max_bytes = self._max_bytes
+
+        self._shards = [
+            BaseMemoryStorage(
+                max_entries=None if max_entries is None else math.ceil(max_entries / shards),
+                max_bytes=None if max_bytes is None else math.ceil(max_bytes / shards),
+                eviction=eviction,
+                sizeof=self._sizeof,
+                metrics=self._metrics
+            )
+            for _ in range(shards)
+        ]
+
+        # The next shard to sweep
+        self._cursor = 0
+
+    def _get_shard(self, key: Any) -> BaseMemoryStorage:
+        return self._shards[hash(key) % len(self._shards)]
+
+    @property
+    def evictions(self) -> int:
+        return sum(shard.evictions for shard in self._shards)
+
+    @property
+    def shard_sizes(self) -> list[int]:
+        """
+        The number of the values in each shard
+        """
+
+        return [len(shard._storage) for shard in self._shards]
+
+    async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
+        return await self._get_shard(key)._get_data_from_storage(key)
+
+    async def _peek_data_from_storage(self, key: Any) -> CacheServiceData:
+        return await self._get_shard(key)._peek_data_from_storage(key)
+
+    def _get_fresh_value(self, key: Any) -> Any:
+        return self._get_shard(key)._get_fresh_value(key)
+
+    def _count_fresh_hit(self, key: Any):
+        self._get_shard(key)._count_fresh_hit(key)
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        groups: dict[int, list[Any]] = {}
+        count = len(self._shards)
+
+        for key in keys:
+            groups.setdefault(hash(key) % count, []).append(key)
+
+        result = {}
+
+        for index, group in groups.items():
+            result.update(await self._shards[index]._get_many_data_from_storage(group))
+
+        return result
+
+    async def _add_data_to_storage(self, key: Any, data: CacheServiceData):
+        await self._get_shard(key)._add_data_to_storage(key=key, data=data)
+
+    async def _del_data_from_storage(self, key: Any):
+        await self._get_shard(key)._del_data_from_storage(key)
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        """
+        Pop the overdue keys of the next shard that has them,
+        the other shards are handled by the next calls
+        """
+
+        now = time.monotonic()
+        count = len(self._shards)
+
+        for offset in range(count):
+            index = (self._cursor + offset) % count
+            deadline = self._shards[index]._expiry_index.next_deadline()
+
+            if deadline is not None and deadline < now:
+                self._cursor = (index + 1) % count
+
+                return self._shards[index]._expiry_index.pop_overdue(now)
+
+        return []
+
+    async def _get_next_deadline(self) -> Optional[float]:
+        deadlines = [shard._expiry_index.next_deadline() for shard in self._shards]
+
+        return min([deadline for deadline in deadlines if deadline is not None], default=None)
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        await self._get_shard(key)._push_retry_deadline(key, deadline)
+
+    async def _get_all_data(self) -> dict[Any, CacheServiceData]:
+        result = {}
+
+        for shard in self._shards:
+            result.update(shard._storage)
+
+        return result
+
+    async def _get_all_keys(self) -> Iterable[Any]:
+        return [key for shard in self._shards for key in shard._storage]
+
+    async def _get_snapshot_entries(self) -> list[SnapshotEntry]:
+        entries = []
+
+        for shard in self._shards:
+            entries.extend(await shard._get_snapshot_entries())
+
+            # The other tasks run between the shards
+            await asyncio.sleep(0)
+
+        return entries
+
+
+class BaseAutoShardedMemoryStorage(BaseShardedMemoryStorage, BaseAutoMemoryStorage):
+    pass
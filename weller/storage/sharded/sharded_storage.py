@@ -0,0 +1,62 @@
+
+
+import asyncio
+from weller.storage.service import (
+    AbstractLazyCached,
+    AbstractStrictCached,
+    AbstractLazyAutoCached,
+    AbstractStrictAutoCached
+)
+
+from weller.storage.sharded.base import BaseShardedMemoryStorage, BaseAutoShardedMemoryStorage
+
+
+class LazyCachedShardedMemoryStorage(BaseShardedMemoryStorage, AbstractLazyCached):
+    pass
+
+
+class StrictCachedShardedMemoryStorage(BaseShardedMemoryStorage, AbstractStrictCached):
+    # Each request sweeps one shard
+    _partial_sweep = True
+
+    def __init__(self, timer_wheel: bool = False, **kwargs):
+        """
+        :param timer_wheel: Delete the overdue values by the event loop's timer wheel
+        instead of the sweep per each request
+        :param kwargs: The shards and the storage settings
+        """
+
+        super().__init__(**kwargs)
+
+        self._timer_wheel = timer_wheel
+
+
+class LazyAutoCachedShardedMemoryStorage(BaseAutoShardedMemoryStorage, AbstractLazyAutoCached):
+    pass
+
+
+class StrictAutoCachedShardedMemoryStorage(BaseAutoShardedMemoryStorage, AbstractStrictAutoCached):
+    def __init__(self, scheduled: bool = False, timer_wheel: bool = False, **kwargs):
+        """
+        :param scheduled: Refresh the overdue values by one background task
+        :param timer_wheel: Refresh the overdue values by the event loop's timer wheel, shared by all storages
+        :param kwargs: The shards settings and the default arguments of the functions
+        """
+
+        super().__init__(**kwargs)
+
+        self._scheduled = scheduled
+        self._timer_wheel = timer_wheel
+
+    async def _update_all_if_overdue(self, *except_keys: str):
+        # Only the overdue values of one shard, the others are refreshed by the next requests
+        for key in await self._pop_overdue_keys():
+            if key not in except_keys:
+                asyncio.create_task(self._background_update(key))
+
+    async def refresh(self, *except_keys: str):
+        for _ in range(len(self._shards)):
+            await self._update_all_if_overdue(*except_keys)
+
+            # The other tasks run between the shards
+            await asyncio.sleep(0)
@@ -0,0 +1,9 @@
+
+
+from .segment import SharedSegment
+from .shared_storage import (
+    LazyCachedSharedMemoryStorage,
+    StrictCachedSharedMemoryStorage,
+    LazyAutoCachedSharedMemoryStorage,
+    StrictAutoCachedSharedMemoryStorage
+)
@@ -0,0 +1,228 @@
+
+
+import os
+import time
+import pickle
+import tempfile
+from typing import Any, Callable, Iterable, Optional
+
+from weller.lease import AbstractLease
+from weller.metrics import AbstractMetrics
+from weller.tracing import AbstractLoadHook
+from weller.serializers import AbstractSerializer, PickleSerializer
+from weller.storage.shared.segment import SharedSegment, SharedEntry
+from weller.types.cache_data import CacheServiceData, CallableCacheServiceData
+from weller.storage.service.shared import BaseAutoSharedStorage, ValueMissing
+
+
+def get_default_path() -> str:
+    # The /dev/shm is the memory without a disk
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+    return os.path.join(directory, "weller.cache")
+
+
+class BaseSharedMemoryStorage:
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_entries: int = 1024,
+            size: int = 64 * 1024 * 1024,
+            serializer: Optional[AbstractSerializer] = None,
+            metrics: Optional[AbstractMetrics] = None
+    ):
+        """
+        :param path: The file of the segment, the processes with the same path share the values
+        :param max_entries: If the segment is created, it keeps no more values than this
+        :param size: If the segment is created, it keeps no more bytes of the keys and the values than this
+        :param serializer: Encodes the values, the PickleSerializer by default
+        :param metrics: Receives the hits, the misses, the evictions and the other events
+        """
+
+        self._metrics = metrics
+        self._serializer = PickleSerializer() if serializer is None else serializer
+        self._segment = SharedSegment(
+            path=get_default_path() if path is None else path,
+            max_entries=max_entries,
+            size=size
+        )
+
+    @staticmethod
+    def _encode_key(key: Any) -> bytes:
+        return pickle.dumps(key, protocol=4)
+
+    @staticmethod
+    def _decode_key(member: bytes) -> Any:
+        return pickle.loads(member)
+
+    def _is_blocked(self, data: CacheServiceData) -> bool:
+        return False
+
+    def _make_data(self, key: Any, entry: SharedEntry) -> CacheServiceData:
+        return CacheServiceData(value=entry.value, duration=entry.duration, set_time=entry.set_time)
+
+    def _count_evictions(self, members: list[bytes]):
+        if self._metrics is not None:
+            for member in members:
+                self._metrics.increment("evictions", self._decode_key(member))
+
+    async def _add_data_to_storage(self, key: Any, data: CacheServiceData):
+        evicted = self._segment.set(
+            self._encode_key(key),
+            self._serializer.dumps(data.value),
+            data.set_time,
+            data.duration,
+            self._is_blocked(data)
+        )
+
+        self._count_evictions(evicted)
+
+    async def _add_many_data_to_storage(self, datum: dict[Any, CacheServiceData]):
+        evicted = self._segment.set_many([
+            (self._encode_key(key), self._serializer.dumps(data.value), data.set_time, data.duration, self._is_blocked(data))
+            for key, data in datum.items()
+        ])
+
+        self._count_evictions(evicted)
+
+    async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
+        entry = self._segment.get(self._encode_key(key), self._serializer.loads)
+
+        if entry is None:
+            raise ValueMissing(key)
+
+        return self._make_data(key, entry)
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        entries = self._segment.get_many([self._encode_key(key) for key in keys], self._serializer.loads)
+
+        return {
+            key: self._make_data(key, entry)
+            for key, entry in zip(keys, entries)
+            if entry is not None
+        }
+
+    async def _del_data_from_storage(self, key: Any):
+        self._segment.delete(self._encode_key(key))
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        return [self._decode_key(member) for member in self._segment.pop_overdue(time.monotonic())]
+
+    async def _get_next_deadline(self) -> Optional[float]:
+        return self._segment.next_deadline()
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        self._segment.push_if_due(self._encode_key(key), deadline, time.monotonic())
+
+    async def _get_all_keys(self) -> Iterable[Any]:
+        return [self._decode_key(member) for member in self._segment.keys()]
+
+    async def _get_all_data(self) -> dict[Any, CacheServiceData]:
+        result = {}
+
+        for entry in self._segment.items(self._serializer.loads):
+            key = self._decode_key(entry.key)
+            result[key] = self._make_data(key, entry)
+
+        return result
+
+    async def close(self):
+        await super().close()
+
+        self._segment.close()
+
+
+class BaseAutoSharedMemoryStorage(BaseAutoSharedStorage, BaseSharedMemoryStorage):
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_entries: int = 1024,
+            size: int = 64 * 1024 * 1024,
+            serializer: Optional[AbstractSerializer] = None,
+            lease: Optional[AbstractLease] = None,
+            lease_ttl: float = 30,
+            stale_while_revalidate: Optional[float] = None,
+            max_stale: Optional[float] = None,
+            metrics: Optional[AbstractMetrics] = None,
+            load_hooks: Iterable[AbstractLoadHook] = (),
+            **kwargs
+    ):
+        """
+        :param path: The file of the segment, the processes with the same path share the values
+        :param max_entries: If the segment is created, it keeps no more values than this
+        :param size: If the segment is created, it keeps no more bytes of the keys and the values than this
+        :param serializer: Encodes the values, the PickleSerializer by default
+        :param lease: The lease that is acquired before a refresh, e.g. the MemoryLease can't be shared
+        by the processes, so each one refreshes the value
+        :param lease_ttl: The lease is released by itself after this time
+        :param stale_while_revalidate: Within this time after the expiry,
+        the old value is returned at once and refreshed in background
+        :param max_stale: The value overdue longer than this is never returned, the callers wait for its refresh
+        :param metrics: Receives the hits, the misses, the evictions, the functions' durations and the other events
+        :param load_hooks: They wrap each call of the functions, e.g. by a tracing span
+        :param kwargs: The default arguments of the functions
+        """
+
+        super().__init__(
+            path=path,
+            max_entries=max_entries,
+            size=size,
+            serializer=serializer,
+            metrics=metrics
+        )
+
+        self._arguments = kwargs
+        self._lease = lease
+        self._lease_ttl = lease_ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._max_stale = max_stale
+        self._load_hooks = tuple(load_hooks)
+
+    def _get_default_arguments(self) -> dict[str, Any]:
+        return self._arguments
+
+    def _is_blocked(self, data: CallableCacheServiceData) -> bool:
+        return data.bloked
+
+    async def _set_blocked_in_storage(self, key: Any, data: CallableCacheServiceData):
+        # The flag is flipped in the slot, the payload is appended again only if the entry was evicted
+        if not self._segment.set_blocked(self._encode_key(key), data.bloked):
+            await self._add_data_to_storage(key=key, data=data)
+
+    def _make_data(self, key: Any, entry: SharedEntry) -> CallableCacheServiceData:
+        function = self._functions[key]
+
+        return CallableCacheServiceData(
+            value=entry.value,
+            set_time=entry.set_time,
+            duration=entry.duration,
+            fun=function.fun,
+            fun_data=function.fun_data,
+            bloked=entry.blocked
+        )
+
+    async def set(
+            self,
+            key: Any,
+            duration: float,
+            fun: Callable[..., Any],
+            value: Any = ...,
+            use_di: bool = True,
+            arguments: Optional[dict[str, Any]] = None,
+            **kwargs
+    ):
+        entry = None
+
+        if value is Ellipsis:
+            entry = self._segment.get(self._encode_key(key), self._serializer.loads)
+
+        if entry is None or entry.set_time + duration < time.monotonic():
+            return await super().set(key=key, duration=duration, fun=fun, value=value, use_di=use_di, arguments=arguments, **kwargs)
+
+        # Other process has already loaded it, the function isn't called
+        await super().set(key=key, duration=duration, fun=fun, value=entry.value, use_di=use_di, arguments=arguments, **kwargs)
+
+        data = await self._get_data_from_storage(key)
+        data.renew(entry.value, entry.set_time)
+
+        await self._add_data_to_storage(key=key, data=data)
@@ -0,0 +1,565 @@
+
+
+"""
+The file mapped to the memory of all processes on one host.
+
+    header | slots table | data
+
+A slot keeps the times of the entry and the place of its key and value in the data,
+the slots are found by the open addressing of the key's hash.
+The data is appended, the space of the replaced and deleted entries is reclaimed by a compaction.
+The writers lock the file exclusively, the readers lock it shared.
+The times are the time.monotonic() seconds, it is the same clock for all processes of a host
+"""
+
+import os
+import mmap
+import math
+import fcntl
+import struct
+import hashlib
+from typing import Any, Callable, Iterable, Optional
+
+
+MAGIC = b"WELLSHM1"
+VERSION = 2
+
+# Magic, version, slots capacity, data size, data tail, used slots, deleted slots
+HEADER = struct.Struct("<8sQQQQQQ")
+HEADER_SIZE = 64
+
+# No index time of the slots is earlier, so the pops before it skip the slots
+NEAREST = struct.Struct("<d")
+NEAREST_FIELD = 56
+
+# Index time, set time, duration, key hash, data offset, key length, value length, state
+SLOT = struct.Struct("<dddQQQQQ")
+SLOT_SIZE = 64
+SLOT_DOUBLES = SLOT_SIZE // 8
+
+INDEX_TIME = struct.Struct("<d")
+OFFSET = struct.Struct("<Q")
+STATE = struct.Struct("<Q")
+
+INDEX_TIME_FIELD = 0
+OFFSET_FIELD = 32
+STATE_FIELD = 56
+
+EMPTY = 0
+USED = 1
+DELETED = 2
+STATE_MASK = 0xFF
+BLOCKED = 0x100
+
+# The table is rehashed when the used and the deleted slots take more of it
+MAX_LOAD = 0.75
+
+
+class SharedEntry:
+    __slots__ = ("key", "value", "set_time", "duration", "blocked")
+
+    def __init__(self, key: bytes, value: Any, set_time: float, duration: float, blocked: bool):
+        self.key = key
+        self.value = value
+        self.set_time = set_time
+        self.duration = duration
+        self.blocked = blocked
+
+
+def _hash(key: bytes) -> int:
+    # The builtin hash is randomized per process
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedSegment:
+    def __init__(self, path: str, max_entries: int = 1024, size: int = 64 * 1024 * 1024):
+        """
+        Open the segment or create it if it doesn't exist.
+        The sizes of the existing segment are kept, it is shared with the processes that created it
+        :param path: The file, /dev/shm is the memory without a disk
+        :param max_entries: The entries are evicted beyond this number
+        :param size: The bytes of the keys and the values, the entries are evicted beyond it
+        """
+
+        self._path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                self._create(max_entries, size)
+
+            self._mmap = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        magic, version, capacity, data_size, *_ = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+
+            raise ValueError(f"{path} is not a weller segment of the version {VERSION}")
+
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._max_entries = capacity // 2
+        self._data_start = HEADER_SIZE + capacity * SLOT_SIZE
+        self._data_size = data_size
+
+        # The index times of all slots, so the deadline is found without unpacking the slots
+        self._view = memoryview(self._mmap)
+        self._doubles = self._view[HEADER_SIZE:self._data_start].cast("d")
+        self._index_times = self._doubles[::SLOT_DOUBLES]
+
+    def _create(self, max_entries: int, size: int):
+        capacity = 1 << max(3, (2 * max_entries - 1).bit_length())
+        table = SLOT.pack(math.inf, 0, 0, 0, 0, 0, 0, EMPTY) * capacity
+
+        os.ftruncate(self._fd, HEADER_SIZE + len(table) + size)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, capacity, size, 0, 0, 0) + NEAREST.pack(math.inf), 0)
+        os.pwrite(self._fd, table, HEADER_SIZE)
+
+    def close(self):
+        for view in ("_index_times", "_doubles", "_view"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+
+        if hasattr(self, "_mmap"):
+            self._mmap.close()
+
+        os.close(self._fd)
+
+    def unlink(self):
+        """
+        Delete the segment's file, the processes that mapped it keep their memory
+        """
+
+        os.unlink(self._path)
+
+    # Locks
+
+    def _lock_shared(self):
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+
+    def _lock_exclusive(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _unlock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # Slots
+
+    def _slot_offset(self, index: int) -> int:
+        return HEADER_SIZE + index * SLOT_SIZE
+
+    def _read_slot(self, index: int) -> tuple:
+        return SLOT.unpack_from(self._mmap, self._slot_offset(index))
+
+    def _read_key(self, slot: tuple) -> bytes:
+        start = self._data_start + slot[4]
+
+        return self._mmap[start:start + slot[5]]
+
+    def _find(self, key: bytes, key_hash: int) -> tuple[int, int]:
+        """
+        :return: The index of the key's slot or -1 and the index for its insert
+        """
+
+        index = key_hash & self._mask
+        free = -1
+
+        for _ in range(self._capacity):
+            slot = self._read_slot(index)
+            state = slot[7] & STATE_MASK
+
+            if state == EMPTY:
+                return -1, index if free == -1 else free
+
+            if state == DELETED:
+                if free == -1:
+                    free = index
+
+            elif slot[3] == key_hash and self._read_key(slot) == key:
+                return index, index
+
+            index = (index + 1) & self._mask
+
+        return -1, free
+
+    def _read_value(self, slot: tuple, loads: Callable[[Any], Any]) -> Any:
+        start = self._data_start + slot[4] + slot[5]
+
+        # The serializer reads the segment without a copy of the payload
+        with self._view[start:start + slot[6]] as payload:
+            return loads(payload)
+
+    def _make_entry(self, key: bytes, slot: tuple, loads: Callable[[Any], Any]) -> SharedEntry:
+        return SharedEntry(
+            key=key,
+            value=self._read_value(slot, loads),
+            set_time=slot[1],
+            duration=slot[2],
+            blocked=bool(slot[7] & BLOCKED)
+        )
+
+    def _read_header(self) -> list[int]:
+        return list(HEADER.unpack_from(self._mmap, 0)[4:])
+
+    def _write_header(self, tail: int, used: int, deleted: int):
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, self._capacity, self._data_size, tail, used, deleted)
+
+    def _read_nearest(self) -> float:
+        return NEAREST.unpack_from(self._mmap, NEAREST_FIELD)[0]
+
+    def _lower_nearest(self, index_time: float):
+        if index_time < self._read_nearest():
+            NEAREST.pack_into(self._mmap, NEAREST_FIELD, index_time)
+
+    def _used_slots(self) -> list[tuple[int, tuple]]:
+        result = []
+
+        for index in range(self._capacity):
+            slot = self._read_slot(index)
+
+            if slot[7] & STATE_MASK == USED:
+                result.append((index, slot))
+
+        return result
+
+    # Reads
+
+    def get(self, key: bytes, loads: Callable[[Any], Any]) -> Optional[SharedEntry]:
+        self._lock_shared()
+
+        try:
+            index, _ = self._find(key, _hash(key))
+
+            if index == -1:
+                return None
+
+            return self._make_entry(key, self._read_slot(index), loads)
+
+        finally:
+            self._unlock()
+
+    def get_many(self, keys: Iterable[bytes], loads: Callable[[Any], Any]) -> list[Optional[SharedEntry]]:
+        self._lock_shared()
+
+        try:
+            result = []
+
+            for key in keys:
+                index, _ = self._find(key, _hash(key))
+                result.append(None if index == -1 else self._make_entry(key, self._read_slot(index), loads))
+
+            return result
+
+        finally:
+            self._unlock()
+
+    def items(self, loads: Callable[[Any], Any]) -> list[SharedEntry]:
+        self._lock_shared()
+
+        try:
+            return [self._make_entry(self._read_key(slot), slot, loads) for _, slot in self._used_slots()]
+
+        finally:
+            self._unlock()
+
+    def keys(self) -> list[bytes]:
+        self._lock_shared()
+
+        try:
+            return [self._read_key(slot) for _, slot in self._used_slots()]
+
+        finally:
+            self._unlock()
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        :return: The nearest expire time of the entries that are not popped as overdue,
+        it may be earlier if the entry of that time is replaced or deleted after the last pop
+        """
+
+        self._lock_shared()
+
+        try:
+            deadline = self._read_nearest()
+
+        finally:
+            self._unlock()
+
+        return None if deadline == math.inf else deadline
+
+    # Writes
+
+    def set(self, key: bytes, payload: bytes, set_time: float, duration: float, blocked: bool = False) -> list[bytes]:
+        """
+        :return: The keys of the entries evicted for it
+        """
+
+        return self.set_many([(key, payload, set_time, duration, blocked)])
+
+    def set_many(self, entries: Iterable[tuple[bytes, bytes, float, float, bool]]) -> list[bytes]:
+        """
+        :param entries: The keys, the payloads, the set times, the durations and the blocked flags
+        :return: The keys of the entries evicted for them
+        """
+
+        self._lock_exclusive()
+
+        try:
+            evicted = []
+
+            for key, payload, set_time, duration, blocked in entries:
+                self._set(key, payload, set_time, duration, blocked, evicted)
+
+            return evicted
+
+        finally:
+            self._unlock()
+
+    def _set(self, key: bytes, payload: bytes, set_time: float, duration: float, blocked: bool, evicted: list):
+        length = len(key) + len(payload)
+
+        if length > self._data_size:
+            raise ValueError(f"The entry of {length} bytes is bigger than the segment")
+
+        key_hash = _hash(key)
+        index, free = self._find(key, key_hash)
+        tail, used, deleted = self._read_header()
+
+        if index == -1:
+            if used >= self._max_entries:
+                evicted.extend(self._evict(1, 0))
+
+            tail, used, deleted = self._read_header()
+
+            if used + deleted + 1 > self._capacity * MAX_LOAD:
+                self._rehash()
+
+            index, free = self._find(key, key_hash)
+            tail, used, deleted = self._read_header()
+
+        if tail + length > self._data_size:
+            # The replaced entry's space is reclaimed too
+            if index != -1:
+                self._delete_slot(index)
+
+            evicted.extend(self._evict(0, length))
+
+            index, free = self._find(key, key_hash)
+            tail, used, deleted = self._read_header()
+
+        start = self._data_start + tail
+
+        self._mmap[start:start + len(key)] = key
+        self._mmap[start + len(key):start + length] = payload
+
+        state = USED | (BLOCKED if blocked else 0)
+
+        if index == -1:
+            index = free
+            used += 1
+
+            if self._read_slot(index)[7] & STATE_MASK == DELETED:
+                deleted -= 1
+
+        SLOT.pack_into(
+            self._mmap,
+            self._slot_offset(index),
+            set_time + duration,
+            set_time,
+            duration,
+            key_hash,
+            tail,
+            len(key),
+            len(payload),
+            state
+        )
+
+        self._lower_nearest(set_time + duration)
+        self._write_header(tail + length, used, deleted)
+
+    def set_blocked(self, key: bytes, blocked: bool) -> bool:
+        """
+        Flip the blocked flag in the entry's slot, its payload isn't written again
+        :return: False if the entry is missing
+        """
+
+        self._lock_exclusive()
+
+        try:
+            index, _ = self._find(key, _hash(key))
+
+            if index == -1:
+                return False
+
+            offset = self._slot_offset(index) + STATE_FIELD
+            state = STATE.unpack_from(self._mmap, offset)[0]
+
+            STATE.pack_into(self._mmap, offset, state | BLOCKED if blocked else state & ~BLOCKED)
+
+            return True
+
+        finally:
+            self._unlock()
+
+    def delete(self, key: bytes) -> bool:
+        self._lock_exclusive()
+
+        try:
+            index, _ = self._find(key, _hash(key))
+
+            if index == -1:
+                return False
+
+            self._delete_slot(index)
+
+            return True
+
+        finally:
+            self._unlock()
+
+    def _delete_slot(self, index: int):
+        offset = self._slot_offset(index)
+        tail, used, deleted = self._read_header()
+
+        INDEX_TIME.pack_into(self._mmap, offset + INDEX_TIME_FIELD, math.inf)
+        STATE.pack_into(self._mmap, offset + STATE_FIELD, DELETED)
+
+        self._write_header(tail, used - 1, deleted + 1)
+
+    def pop_overdue(self, now: float) -> list[bytes]:
+        """
+        Take the overdue entries out of the index, so each one is given to the only process.
+        The entries stay in the segment until they are replaced or deleted
+        :param now: The monotonic time
+        :return: Their keys
+        """
+
+        deadline = self.next_deadline()
+
+        # Most calls find nothing, so they don't wait for the writers and don't walk the slots
+        if deadline is None or deadline >= now:
+            return []
+
+        self._lock_exclusive()
+
+        try:
+            result = []
+
+            # Other process may have popped them
+            if self._read_nearest() >= now:
+                return result
+
+            nearest = math.inf
+
+            for index, index_time in enumerate(self._index_times):
+                if index_time >= now:
+                    nearest = min(nearest, index_time)
+
+                    continue
+
+                offset = self._slot_offset(index)
+
+                INDEX_TIME.pack_into(self._mmap, offset + INDEX_TIME_FIELD, math.inf)
+                result.append(self._read_key(self._read_slot(index)))
+
+            NEAREST.pack_into(self._mmap, NEAREST_FIELD, nearest)
+
+            return result
+
+        finally:
+            self._unlock()
+
+    def push_if_due(self, key: bytes, deadline: float, now: float):
+        """
+        Index the entry again unless its deadline is not reached yet,
+        e.g. it is popped as overdue and its refresh is retried later
+        :param deadline: The monotonic time of the next check
+        :param now: The monotonic time
+        """
+
+        self._lock_exclusive()
+
+        try:
+            index, _ = self._find(key, _hash(key))
+
+            # The popped entry has the infinite index time
+            if index != -1 and (self._index_times[index] < now or self._index_times[index] == math.inf):
+                INDEX_TIME.pack_into(self._mmap, self._slot_offset(index) + INDEX_TIME_FIELD, deadline)
+
+                self._lower_nearest(deadline)
+
+        finally:
+            self._unlock()
+
+    def _evict(self, count: int, length: int) -> list[bytes]:
+        """
+        Delete the entries that expire first, until the count is deleted and the length fits the data
+        :return: The evicted keys
+        """
+
+        self._compact()
+
+        tail, used, deleted = self._read_header()
+        slots = sorted(self._used_slots(), key=lambda item: item[1][1] + item[1][2])
+        result = []
+
+        for index, slot in slots:
+            if count <= 0 and tail + length <= self._data_size:
+                break
+
+            result.append(self._read_key(slot))
+            self._delete_slot(index)
+
+            count -= 1
+            tail -= slot[5] + slot[6]
+
+        if result:
+            self._compact()
+
+        return result
+
+    def _compact(self):
+        """
+        Move the entries' data together to the start of the data
+        """
+
+        tail, used, deleted = self._read_header()
+        new_tail = 0
+
+        for index, slot in sorted(self._used_slots(), key=lambda item: item[1][4]):
+            length = slot[5] + slot[6]
+
+            if slot[4] != new_tail:
+                self._mmap.move(self._data_start + new_tail, self._data_start + slot[4], length)
+
+                OFFSET.pack_into(self._mmap, self._slot_offset(index) + OFFSET_FIELD, new_tail)
+
+            new_tail += length
+
+        self._write_header(new_tail, used, deleted)
+
+    def _rehash(self):
+        """
+        Put the used slots again, so the deleted slots don't lengthen the searches
+        """
+
+        tail, used, deleted = self._read_header()
+        slots = [slot for _, slot in self._used_slots()]
+
+        self._mmap[HEADER_SIZE:self._data_start] = SLOT.pack(math.inf, 0, 0, 0, 0, 0, 0, EMPTY) * self._capacity
+
+        for slot in slots:
+            index = slot[3] & self._mask
+
+            while self._read_slot(index)[7] & STATE_MASK != EMPTY:
+                index = (index + 1) & self._mask
+
+            SLOT.pack_into(self._mmap, self._slot_offset(index), *slot)
+
+        self._write_header(tail, used, 0)
@@ -0,0 +1,34 @@
+
+
+from weller.storage.service import (
+    AbstractLazyCached,
+    AbstractStrictCached,
+    AbstractLazyAutoCached,
+    AbstractStrictAutoCached
+)
+
+from weller.storage.shared.base import BaseSharedMemoryStorage, BaseAutoSharedMemoryStorage
+
+
+class LazyCachedSharedMemoryStorage(BaseSharedMemoryStorage, AbstractLazyCached):
+    pass
+
+
+class StrictCachedSharedMemoryStorage(BaseSharedMemoryStorage, AbstractStrictCached):
+    pass
+
+
+class LazyAutoCachedSharedMemoryStorage(BaseAutoSharedMemoryStorage, AbstractLazyAutoCached):
+    pass
+
+
+class StrictAutoCachedSharedMemoryStorage(BaseAutoSharedMemoryStorage, AbstractStrictAutoCached):
+    def __init__(self, scheduled: bool = False, **kwargs):
+        """
+        :param scheduled: Refresh the overdue values by one background task
+        :param kwargs: The segment settings and the default arguments of the functions
+        """
+
+        super().__init__(**kwargs)
+
+        self._scheduled = scheduled
@@ -0,0 +1,9 @@
+
+
+from .invalidation import AbstractInvalidation
+from .tiered_storage import (
+    LazyCachedTieredStorage,
+    StrictCachedTieredStorage,
+    LazyAutoCachedTieredStorage,
+    StrictAutoCachedTieredStorage
+)
@@ -0,0 +1,219 @@
+
+
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from weller.lease import AbstractLease
+from weller.metrics import AbstractMetrics
+from weller.tracing import AbstractLoadHook
+from weller.types.cache_data import CacheServiceData
+from weller.storage.service import AbstractLazyCached
+from weller.storage.service.shared import BaseAutoSharedStorage, ValueMissing
+from weller.storage.tiered.invalidation import AbstractInvalidation
+
+
+class BaseTieredStorage:
+    """
+    The small first tier in the process memory in front of the second tier storage.
+    The first tier keeps the entries for a short time, then they are read from the second tier again.
+    The writes go to both tiers
+    """
+
+    def __init__(
+            self,
+            storage: AbstractLazyCached,
+            ttl: float = 1,
+            max_entries: int = 1024,
+            invalidation: Optional[AbstractInvalidation] = None,
+            metrics: Optional[AbstractMetrics] = None
+    ):
+        """
+        :param storage: The second tier, e.g. a redis storage. Its type is the same as the tiered storage's one:
+        lazy or strict, auto or not
+        :param ttl: The first tier keeps an entry no longer than this
+        :param max_entries: The first tier keeps no more entries than this, the least recently used are dropped
+        :param invalidation: If specified, the other processes drop the changed values from their first tier
+        :param metrics: Receives the hits, the misses and the other events
+        """
+
+        self._metrics = metrics
+        self._second_tier = storage
+        self._first_tier_ttl = ttl
+        self._first_tier_max_entries = max_entries
+        self._first_tier: OrderedDict[Any, tuple[float, CacheServiceData]] = OrderedDict()
+
+        self._invalidation = invalidation
+        self._subscribed = False
+
+    async def _subscribe(self):
+        self._subscribed = True
+
+        await self._invalidation.subscribe(self._drop)
+
+    def _drop(self, key: Any):
+        self._first_tier.pop(key, None)
+
+    def _put(self, key: Any, data: CacheServiceData):
+        first_tier = self._first_tier
+
+        first_tier[key] = (time.monotonic() + self._first_tier_ttl, data)
+        first_tier.move_to_end(key)
+
+        if len(first_tier) > self._first_tier_max_entries:
+            first_tier.popitem(last=False)
+
+    async def _changed(self, key: Any):
+        if self._invalidation is None:
+            return
+
+        if not self._subscribed:
+            await self._subscribe()
+
+        await self._invalidation.publish(key)
+
+    async def _get_data_from_storage(self, key: Any) -> CacheServiceData:
+        item = self._first_tier.get(key)
+
+        if item is not None and item[0] > time.monotonic():
+            self._first_tier.move_to_end(key)
+
+            return item[1]
+
+        if self._invalidation is not None and not self._subscribed:
+            await self._subscribe()
+
+        try:
+            data = await self._second_tier._get_data_from_storage(key)
+
+        # The second tier may evict the values by itself, e.g. the memory storage with max_entries
+        except ValueMissing:
+            raise
+
+        except KeyError:
+            raise ValueMissing(key)
+
+        self._put(key, data)
+
+        return data
+
+    async def _get_many_data_from_storage(self, keys: list[Any]) -> dict[Any, CacheServiceData]:
+        now = time.monotonic()
+        result = {}
+        missing = []
+
+        for key in keys:
+            item = self._first_tier.get(key)
+
+            if item is not None and item[0] > now:
+                result[key] = item[1]
+
+            else:
+                missing.append(key)
+
+        if missing:
+            if self._invalidation is not None and not self._subscribed:
+                await self._subscribe()
+
+            datum = await self._second_tier._get_many_data_from_storage(missing)
+
+            for key, data in datum.items():
+                self._put(key, data)
+
+            result.update(datum)
+
+        return result
+
+    async def _add_data_to_storage(self, key: Any, data: CacheServiceData):
+        self._put(key, data)
+
+        await self._second_tier._add_data_to_storage(key=key, data=data)
+        await self._changed(key)
+
+    async def _add_many_data_to_storage(self, datum: dict[Any, CacheServiceData]):
+        for key, data in datum.items():
+            self._put(key, data)
+
+        await self._second_tier._add_many_data_to_storage(datum)
+
+        for key in datum:
+            await self._changed(key)
+
+    async def _del_data_from_storage(self, key: Any):
+        self._drop(key)
+
+        await self._second_tier._del_data_from_storage(key)
+        await self._changed(key)
+
+    async def _pop_overdue_keys(self) -> Iterable[Any]:
+        return await self._second_tier._pop_overdue_keys()
+
+    async def _get_next_deadline(self) -> Optional[float]:
+        return await self._second_tier._get_next_deadline()
+
+    async def _push_retry_deadline(self, key: Any, deadline: float):
+        await self._second_tier._push_retry_deadline(key, deadline)
+
+    async def _get_all_keys(self) -> Iterable[Any]:
+        return await self._second_tier._get_all_keys()
+
+    async def _get_all_data(self) -> dict[Any, CacheServiceData]:
+        return await self._second_tier._get_all_data()
+
+    async def close(self):
+        await super().close()
+
+        if self._invalidation is not None:
+            await self._invalidation.close()
+
+        await self._second_tier.close()
+
+
+class BaseAutoTieredStorage(BaseAutoSharedStorage, BaseTieredStorage):
+    def __init__(
+            self,
+            storage: AbstractLazyCached,
+            ttl: float = 1,
+            max_entries: int = 1024,
+            invalidation: Optional[AbstractInvalidation] = None,
+            lease: Optional[AbstractLease] = None,
+            lease_ttl: float = 30,
+            stale_while_revalidate: Optional[float] = None,
+            max_stale: Optional[float] = None,
+            metrics: Optional[AbstractMetrics] = None,
+            load_hooks: Iterable[AbstractLoadHook] = (),
+            **kwargs
+    ):
+        """
+        :param storage: The second tier, an auto storage, e.g. the StrictAutoCachedRedisStorage.
+        Its own refresh settings are not used, the tiered storage refreshes the values
+        :param ttl: The first tier keeps an entry no longer than this
+        :param max_entries: The first tier keeps no more entries than this, the least recently used are dropped
+        :param invalidation: If specified, the other processes drop the changed values from their first tier
+        :param lease: The lease that is acquired before a refresh
+        :param lease_ttl: The lease is released by itself after this time
+        :param stale_while_revalidate: Within this time after the expiry,
+        the old value is returned at once and refreshed in background
+        :param max_stale: The value overdue longer than this is never returned, the callers wait for its refresh
+        :param metrics: Receives the hits, the misses, the functions' durations and the other events
+        :param load_hooks: They wrap each call of the functions, e.g. by a tracing span
+        :param kwargs: The default arguments of the functions
+        """
+
+        super().__init__(
+            storage=storage,
+            ttl=ttl,
+            max_entries=max_entries,
+            invalidation=invalidation,
+            metrics=metrics
+        )
+
+        self._arguments = kwargs
+        self._lease = lease
+        self._lease_ttl = lease_ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._max_stale = max_stale
+        self._load_hooks = tuple(load_hooks)
+
+    def _get_default_arguments(self) -> dict[str, Any]:
+        return self._arguments
@@ -0,0 +1,27 @@
+
+
+from typing import Any, Callable
+from abc import ABC, abstractmethod
+
+
+class AbstractInvalidation(ABC):
+    """
+    Tells the other processes which values are changed, so they drop them from their first tier
+    """
+
+    @abstractmethod
+    async def publish(self, key: Any):
+        """
+        :param key: The index of the changed value
+        """
+
+    @abstractmethod
+    async def subscribe(self, callback: Callable[[Any], None]):
+        """
+        Start to deliver the keys changed by the other processes
+        :param callback: It is called with each key
+        """
+
+    @abstractmethod
+    async def close(self):
+        pass
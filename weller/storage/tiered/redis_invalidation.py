@@ -0,0 +1,78 @@
+
+
+import uuid
+import pickle
+import asyncio
+from typing import Any, Callable, Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from weller.storage.tiered.invalidation import AbstractInvalidation
+
+
+class RedisInvalidation(AbstractInvalidation):
+    """
+    The invalidation by the redis pub/sub channel
+    """
+
+    def __init__(self, redis: Redis, channel: str = "weller:invalidation", poll_interval: float = 1):
+        """
+        :param redis: A client
+        :param channel: The channel of the processes that share the values
+        :param poll_interval: The listener checks that it is closed at least this often
+        """
+
+        self._redis = redis
+        self._channel = channel
+        self._poll_interval = poll_interval
+        self._closed = False
+
+        # The messages of this process are skipped
+        self._sender = uuid.uuid4().bytes
+        self._pubsub: Optional[PubSub] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, key: Any):
+        await self._redis.publish(self._channel, self._sender + pickle.dumps(key, protocol=4))
+
+    async def subscribe(self, callback: Callable[[Any], None]):
+        self._pubsub = self._redis.pubsub()
+
+        await self._pubsub.subscribe(self._channel)
+
+        self._listener = asyncio.create_task(self._listen(callback))
+
+    async def _listen(self, callback: Callable[[Any], None]):
+        sender_size = len(self._sender)
+
+        # The client may swallow the cancellation, so the listener also stops by the flag
+        while not self._closed:
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=self._poll_interval)
+
+            if message is None or message["type"] != "message":
+                continue
+
+            data = message["data"]
+
+            if data[:sender_size] != self._sender:
+                callback(pickle.loads(data[sender_size:]))
+
+    async def close(self):
+        self._closed = True
+
+        if self._listener is not None:
+            self._listener.cancel()
+
+            try:
+                await self._listener
+
+            except asyncio.CancelledError:
+                pass
+
+            self._listener = None
+
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+            self._pubsub = None
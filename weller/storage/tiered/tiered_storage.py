@@ -0,0 +1,34 @@
+
+
+from weller.storage.service import (
+    AbstractLazyCached,
+    AbstractStrictCached,
+    AbstractLazyAutoCached,
+    AbstractStrictAutoCached
+)
+
+from weller.storage.tiered.base import BaseTieredStorage, BaseAutoTieredStorage
+
+
+class LazyCachedTieredStorage(BaseTieredStorage, AbstractLazyCached):
+    pass
+
+
+class StrictCachedTieredStorage(BaseTieredStorage, AbstractStrictCached):
+    pass
+
+
+class LazyAutoCachedTieredStorage(BaseAutoTieredStorage, AbstractLazyAutoCached):
+    pass
+
+
+class StrictAutoCachedTieredStorage(BaseAutoTieredStorage, AbstractStrictAutoCached):
+    def __init__(self, scheduled: bool = False, **kwargs):
+        """
+        :param scheduled: Refresh the overdue values by one background task
+        :param kwargs: The tiers settings and the default arguments of the functions
+        """
+
+        super().__init__(**kwargs)
+
+        self._scheduled = scheduled
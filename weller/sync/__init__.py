@@ -0,0 +1,5 @@
+
+
+from .runner import SyncRunner
+from .storage import SyncStorage
+from .weller import SyncWeller
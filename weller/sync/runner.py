@@ -0,0 +1,138 @@
+
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Optional
+
+from weller.storage.service import AbstractLazyCached
+
+
+class SyncRunner:
+    """
+    Runs the coroutines of the async API for the sync callers of any thread.
+    All storage's work is done in one event loop, so the storages need no locks,
+    only the warm hits of the memory storages are read in the callers' threads
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, max_workers: Optional[int] = None):
+        """
+        :param loop: The running event loop of the async API, e.g. of the ASGI server,
+        so the sync callers share the values with it. If not specified, the runner starts its own loop in a thread
+        :param max_workers: How many sync functions the own loop may call at once in its threads
+        """
+
+        self._loop = loop
+        self._own = loop is None
+        self._max_workers = max_workers
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # The hits served without the loop, the loop counts them by one callback
+        self._hits: list[tuple[AbstractLazyCached, Any]] = []
+        self._hits_lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            # Other thread has started it while this one waited for the lock
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+
+            self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="weller-loader")
+            loop.set_default_executor(self._executor)
+
+            self._thread = threading.Thread(target=loop.run_forever, name="weller-loop", daemon=True)
+            self._thread.start()
+
+            self._loop = loop
+
+        return loop
+
+    def run(self, coroutine: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run the coroutine in the loop and wait for its result in this thread
+        :param coroutine: Some call of the async API
+        :param timeout: If specified, concurrent.futures.TimeoutError is raised after this time
+        :return: The coroutine's result
+        """
+
+        loop = self._get_loop()
+
+        # The loop can't run the coroutine while its own thread waits for it
+        if self._is_loop_thread(loop):
+            coroutine.close()
+
+            raise RuntimeError("The sync API is called from its event loop, await the async API there")
+
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+    @staticmethod
+    def _is_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+
+        except RuntimeError:
+            return False
+
+    def get_fresh(self, storage: AbstractLazyCached, key: Any) -> Any:
+        """
+        Get the value that isn't overdue in this thread, so the warm hit doesn't wait for the loop
+        :param storage: The storage of the runner's loop
+        :param key: Value's index
+        :return: The value or Ellipsis if the storage can't give it without the loop
+        """
+
+        loop = self._get_loop()
+
+        # The run raises the error of the loop's thread
+        if self._is_loop_thread(loop):
+            return ...
+
+        value = storage._get_fresh_value(key)
+
+        if value is Ellipsis:
+            return value
+
+        with self._hits_lock:
+            self._hits.append((storage, key))
+
+            is_first = len(self._hits) == 1
+
+        if is_first:
+            loop.call_soon_threadsafe(self._count_hits)
+
+        return value
+
+    def _count_hits(self):
+        with self._hits_lock:
+            hits, self._hits = self._hits, []
+
+        for storage, key in hits:
+            storage._count_fresh_hit(key)
+
+    def close(self):
+        """
+        Stop the own loop and its threads, the given loop is left as is
+        :return: nothing
+        """
+
+        with self._lock:
+            if not self._own or self._loop is None:
+                return
+
+            loop = self._loop
+
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+            self._executor.shutdown(wait=True)
+
+            self._loop = None
+            self._thread = None
+            self._executor = None
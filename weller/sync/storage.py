@@ -0,0 +1,88 @@
+
+
+from typing import Any, Iterable, Optional
+
+from weller.storage.service import AbstractLazyCached
+from weller.sync.runner import SyncRunner
+
+
+class SyncStorage:
+    """
+    The sync facade of a storage, it may be called from many threads at once.
+    The values are shared with the storage's async API if both work in the runner's loop
+    """
+
+    def __init__(self, storage: AbstractLazyCached, runner: Optional[SyncRunner] = None):
+        """
+        :param storage: Some storage, e.g. the StrictAutoCachedMemoryStorage
+        :param runner: The loop of the storage, if not specified, the facade starts its own one
+        """
+
+        self._storage = storage
+        self._own_runner = runner is None
+        self._runner = SyncRunner() if runner is None else runner
+
+    @property
+    def storage(self) -> AbstractLazyCached:
+        return self._storage
+
+    def get(self, key: Any) -> Any:
+        """
+        :param key: Value's index
+        :return: The value, KeyError if it isn't cached
+        """
+
+        # Only the misses and the overdue values go to the loop
+        value = self._runner.get_fresh(self._storage, key)
+
+        if value is not Ellipsis:
+            return value
+
+        return self._runner.run(self._storage.get(key))
+
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        :param keys: Values' indexes
+        :return: The values by their keys, the missing keys are skipped
+        """
+
+        return self._runner.run(self._storage.get_many([*keys]))
+
+    def set(self, key: Any, *args: Any, **kwargs: Any):
+        """
+        The same arguments as the storage's set: the value and the duration,
+        or the duration and the function for the auto storages. A sync function is called in the runner's threads
+        :param key: Value's index
+        :return: nothing
+        """
+
+        self._runner.run(self._storage.set(key, *args, **kwargs))
+
+    def set_many(self, mapping: dict[Any, Any], *args: Any, **kwargs: Any):
+        """
+        The same arguments as the storage's set_many
+        :param mapping: The values or the functions by their indexes
+        :return: nothing
+        """
+
+        self._runner.run(self._storage.set_many(mapping, *args, **kwargs))
+
+    def reload(self, key: Any) -> Any:
+        """
+        Call the value's function again, for the auto storages only
+        :param key: Value's index
+        :return: A new value
+        """
+
+        return self._runner.run(self._storage.reload(key))
+
+    def close(self):
+        """
+        Close the storage and stop the own loop
+        :return: nothing
+        """
+
+        self._runner.run(self._storage.close())
+
+        if self._own_runner:
+            self._runner.close()
@@ -0,0 +1,93 @@
+
+
+import functools
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from weller.dispather import Weller
+from weller.sync.runner import SyncRunner
+from weller.types.warmup_report import WarmupReport
+
+
+class SyncWeller:
+    """
+    The sync facade of a Weller, it may be called from many threads at once.
+    The functions are registered by the Weller itself, the sync ones are called in the runner's threads
+    """
+
+    def __init__(self, weller: Weller, runner: Optional[SyncRunner] = None):
+        """
+        :param weller: Some Weller
+        :param runner: The loop of the Weller's storage, if not specified, the facade starts its own one
+        """
+
+        self._weller = weller
+        self._own_runner = runner is None
+        self._runner = SyncRunner() if runner is None else runner
+
+    @property
+    def weller(self) -> Weller:
+        return self._weller
+
+    def get(self, key: str) -> Any:
+        """
+        :param key: Value's index, its function is registered by the Weller's add
+        :return: The value
+        """
+
+        # Only the misses and the overdue values go to the loop
+        if self._weller._ready or key in self._weller._loaded:
+            value = self._runner.get_fresh(self._weller._storage, key)
+
+            if value is not Ellipsis:
+                return value
+
+        return self._runner.run(self._weller.get(key))
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        :param keys: Values' indexes
+        :return: The values by their keys
+        """
+
+        return self._runner.run(self._weller.get_many([*keys]))
+
+    def cached(
+            self,
+            duration: float,
+            key_builder: Optional[Callable[..., Hashable]] = None,
+            use_di: bool = True
+    ) -> Callable[..., Any]:
+        """
+        The sync version of the Weller's cached, the decorated function may be sync or async,
+        the result is called as a sync one
+        """
+
+        def decorator(func) -> Callable[..., Any]:
+            cached = self._weller.cached(duration=duration, key_builder=key_builder, use_di=use_di)(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                return self._runner.run(cached(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def warmup(self, concurrency: Optional[int] = None, timeout: Optional[float] = None) -> WarmupReport:
+        """
+        Load all values before the first get, see Weller.warmup
+        """
+
+        return self._runner.run(self._weller.warmup(concurrency=concurrency, timeout=timeout))
+
+    def close(self):
+        """
+        Stop the refresh-ahead, close the storage and stop the own loop
+        :return: nothing
+        """
+
+        self._runner.run(self._weller.close())
+        self._runner.run(self._weller._storage.close())
+
+        if self._own_runner:
+            self._runner.close()
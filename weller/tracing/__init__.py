@@ -0,0 +1,4 @@
+
+
+from weller.types.load_event import LoadEvent
+from .abstract import AbstractLoadHook
@@ -0,0 +1,26 @@
+
+
+from abc import ABC, abstractmethod
+
+from weller.types.load_event import LoadEvent
+
+
+class AbstractLoadHook(ABC):
+    """
+    Wraps each call of the values' functions, e.g. by a tracing span or a profiler.
+    The hooks are called synchronously on the call's path, so they shouldn't raise or block
+    """
+
+    @abstractmethod
+    def before(self, event: LoadEvent):
+        """
+        The function is about to be called
+        :param event: The call's key and reason
+        """
+
+    @abstractmethod
+    def after(self, event: LoadEvent):
+        """
+        The function has returned or raised
+        :param event: The same event with the duration and the exception
+        """
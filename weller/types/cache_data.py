@@ -1,7 +1,7 @@
 
 
-from typing import Any, Callable
-from datetime import datetime
+import time
+from typing import Any, Callable, Optional
 from dataclasses import dataclass
 
 
@@ -18,11 +18,53 @@ class CallableCacheData(CacheData):
     bloked: bool = False
 
 
-@dataclass
-class CacheServiceData(CacheData):
-    set_time: datetime
+class CacheServiceData:
+    """
+    The stored entry. The times are the time.monotonic() seconds,
+    so a check of the expiry is one float comparison
+    """
 
+    __slots__ = ("value", "duration", "set_time", "expire_time")
 
-@dataclass
-class CallableCacheServiceData(CallableCacheData, CacheServiceData):
-    pass
+    def __init__(self, value: Any, duration: float, set_time: Optional[float] = None):
+        self.value = value
+        self.duration = duration
+        self.set_time = time.monotonic() if set_time is None else set_time
+        self.expire_time = self.set_time + duration
+
+    def renew(self, value: Any, set_time: Optional[float] = None):
+        """
+        Replace the value in place and start its duration again
+        :param value: A new value
+        :param set_time: The monotonic time of the set, now if not specified
+        :return: nothing
+        """
+
+        self.value = value
+        self.set_time = time.monotonic() if set_time is None else set_time
+        self.expire_time = self.set_time + self.duration
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(value={self.value!r}, duration={self.duration!r}, "
+            f"set_time={self.set_time!r})"
+        )
+
+
+class CallableCacheServiceData(CacheServiceData):
+    __slots__ = ("fun", "fun_data", "bloked")
+
+    def __init__(
+            self,
+            value: Any,
+            duration: float,
+            fun: Callable[..., Any],
+            fun_data: dict[str, Any],
+            set_time: Optional[float] = None,
+            bloked: bool = False
+    ):
+        super().__init__(value=value, duration=duration, set_time=set_time)
+
+        self.fun = fun
+        self.fun_data = fun_data
+        self.bloked = bloked
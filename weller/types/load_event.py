@@ -0,0 +1,29 @@
+
+
+from typing import Any, Optional
+
+
+class LoadEvent:
+    """
+    One call of a value's function.
+    The reasons: "cold" - the value isn't cached yet, "overdue" - a caller waits for the refresh,
+    "stale" - the stale value is returned and refreshed in background,
+    "background" - the strict storage refreshes it without callers,
+    "refresh-ahead" - the Weller refreshes it before the expiry, "manual" - the reload
+    """
+
+    __slots__ = ("key", "reason", "duration", "exception", "context")
+
+    def __init__(self, key: Any, reason: str):
+        self.key = key
+        self.reason = reason
+
+        # They are set after the call
+        self.duration: Optional[float] = None
+        self.exception: Optional[BaseException] = None
+
+        # The hooks keep here what they need after the call, e.g. a span
+        self.context: Any = None
+
+    def __repr__(self) -> str:
+        return f"LoadEvent(key={self.key!r}, reason={self.reason!r}, duration={self.duration!r})"
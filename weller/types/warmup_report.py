@@ -0,0 +1,51 @@
+
+
+from typing import Any, Optional
+
+
+class WarmupResult:
+    """
+    The load of one value by the warmup
+    """
+
+    __slots__ = ("key", "duration", "exception")
+
+    def __init__(self, key: Any, duration: float, exception: Optional[BaseException] = None):
+        self.key = key
+        self.duration = duration
+
+        # asyncio.TimeoutError if the function was too long
+        self.exception = exception
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+    def __repr__(self) -> str:
+        return f"WarmupResult(key={self.key!r}, duration={self.duration!r}, exception={self.exception!r})"
+
+
+class WarmupReport:
+    """
+    The results of the warmup in the order the values were started
+    """
+
+    __slots__ = ("results", "duration")
+
+    def __init__(self, results: list[WarmupResult], duration: float):
+        self.results = results
+        self.duration = duration
+
+    @property
+    def loaded(self) -> list[Any]:
+        return [result.key for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> dict[Any, BaseException]:
+        return {result.key: result.exception for result in self.results if not result.ok}
+
+    def __repr__(self) -> str:
+        return (
+            f"WarmupReport(loaded={len(self.loaded)}, "
+            f"failed={len(self.failed)}, duration={self.duration!r})"
+        )
@@ -1,11 +1,26 @@
 
 
 from typing import Any, Callable
-from pydantic import BaseModel
 
 
-class FunctionData(BaseModel):
-    key: str
-    duration: int
-    fun:  Callable[..., Any]
-    fun_data: dict[str, Any]
+class FunctionData:
+    __slots__ = ("key", "duration", "fun", "fun_data", "use_di", "priority")
+
+    def __init__(
+            self,
+            key: str,
+            duration: float,
+            fun: Callable[..., Any],
+            fun_data: dict[str, Any],
+            use_di: bool = True,
+            priority: int = 0
+    ):
+        self.key = key
+        self.duration = duration
+        self.fun = fun
+        self.fun_data = fun_data
+        self.use_di = use_di
+        self.priority = priority
+
+    def __repr__(self) -> str:
+        return f"FunctionData(key={self.key!r}, duration={self.duration!r}, fun={self.fun!r})"